@@ -0,0 +1,117 @@
+"""Benchmark the Client CRUD methods against a local stand-in FDP.
+
+Every create, read, update and delete method of Client is measured for each
+metadata format and document size, and the throughput and latency
+percentiles are written to a JSON file.
+
+Usage:
+    python -m benchmarks.bench_client [--sizes 10 100 1000]
+        [--formats turtle nt ...] [--iterations N] [--output results.json]
+"""
+import argparse
+import datetime
+import json
+import platform
+import sys
+
+import rdflib
+import requests
+
+from fdpclient import DATA_FORMATS, __version__
+from fdpclient.client import Client
+from benchmarks.server import MockFDPServer
+from benchmarks.synthetic import make_catalog, serialize
+from benchmarks.timing import measure, summarize
+
+TYPES = ('fdp', 'catalog', 'dataset', 'distribution')
+
+
+def _record(results, method, format, size, nbytes, latencies):
+    result = {'method': method, 'format': format, 'size': size, 'bytes': nbytes}
+    result.update(summarize(latencies))
+    results.append(result)
+    print(f"{method:22} {format or '-':8} {size if size is not None else '-':>6} "
+          f"{result['throughput']:9.1f}/s  p50 {result['latency_ms']['p50']:8.2f} ms  "
+          f"p99 {result['latency_ms']['p99']:8.2f} ms")
+
+
+def run(sizes, formats, iterations):
+    """Run the benchmarks and return the results.
+
+    Args:
+        sizes(list of int): the numbers of datasets of the synthetic catalogs.
+        formats(list of str): the formats, see :const:`fdpclient.DATA_FORMATS`.
+        iterations(int): the number of measured calls per benchmark.
+
+    Returns:
+        list of dict: one result per method, format and size.
+    """
+    results = []
+    with MockFDPServer() as server, Client(server.url, fdp_path='fdp') as client:
+        for size in sizes:
+            for format in formats:
+                for type in TYPES:
+                    path = '/fdp' if type == 'fdp' else f'/{type}/bench-{size}-{format}'
+                    g = make_catalog(server.url + path, size)
+                    body = serialize(g, format)
+                    server.documents[path] = (body, DATA_FORMATS[format])
+
+                    if type == 'fdp':
+                        read = lambda: client.read_fdp(format=format)
+                        update = lambda: client.update_fdp(body, format=format)
+                    else:
+                        id = path.rsplit('/', 1)[1]
+                        read = getattr(client, f'read_{type}')
+                        read = lambda read=read, id=id: read(id, format=format)
+                        update = getattr(client, f'update_{type}')
+                        update = lambda update=update, id=id: update(id, body, format=format)
+                    create = getattr(client, f'create_{type}')
+
+                    _record(results, f'read_{type}', format, size, len(body),
+                            measure(read, iterations))
+                    _record(results, f'create_{type}', format, size, len(body),
+                            measure(lambda: create(body, format=format), iterations))
+                    _record(results, f'update_{type}', format, size, len(body),
+                            measure(update, iterations))
+
+        for type in TYPES[1:]:
+            delete = getattr(client, f'delete_{type}')
+            _record(results, f'delete_{type}', None, None, 0,
+                    measure(lambda: delete('bench'), iterations))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000],
+                        help='numbers of datasets in the synthetic catalogs')
+    parser.add_argument('--formats', nargs='+', default=list(DATA_FORMATS),
+                        choices=list(DATA_FORMATS), help='metadata formats')
+    parser.add_argument('--iterations', type=int, default=20,
+                        help='measured calls per benchmark')
+    parser.add_argument('--output', default='bench_results.json',
+                        help='the JSON file to write the results to')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.formats, args.iterations)
+    report = {
+        'meta': {
+            'fdpclient': __version__,
+            'rdflib': rdflib.__version__,
+            'requests': requests.__version__,
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'sizes': args.sizes,
+            'formats': args.formats,
+            'iterations': args.iterations,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
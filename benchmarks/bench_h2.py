@@ -0,0 +1,67 @@
+"""Benchmark concurrent reads over HTTP/1.1 and multiplexed HTTP/2.
+
+A reverse proxy in front of an FDP typically limits the connections per
+client. Over HTTP/1.1 each in-flight request needs a connection of the
+pooled session, so the concurrent reads are bounded by that limit; over
+HTTP/2 they are multiplexed on a single connection.
+
+Usage:
+    python -m benchmarks.bench_h2 [--requests N] [--workers N]
+        [--connections N] [--latency SECONDS] [--size N]
+"""
+import argparse
+import time
+
+from fdpclient import DATA_FORMATS
+from fdpclient.client import Client
+from fdpclient.session import create_session
+from fdpclient.transport import HTTP2Transport
+from benchmarks.h2server import H2FDPServer
+from benchmarks.synthetic import make_catalog, serialize
+
+
+def _run(server, session, ids, workers):
+    connections = server.connections
+    with Client(server.url, session=session, fdp_path='fdp') as client:
+        start = time.perf_counter()
+        for id, result in client.read_many('catalog', ids, workers=workers):
+            if isinstance(result, Exception):
+                raise result
+        elapsed = time.perf_counter() - start
+    return len(ids) / elapsed, server.connections - connections
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=400,
+                        help='number of catalogs read per run')
+    parser.add_argument('--workers', type=int, default=32,
+                        help='number of concurrent reads')
+    parser.add_argument('--connections', type=int, default=4,
+                        help='connections per host allowed over HTTP/1.1')
+    parser.add_argument('--latency', type=float, default=0.1,
+                        help='server time per request in seconds')
+    parser.add_argument('--size', type=int, default=10,
+                        help='number of datasets per catalog')
+    args = parser.parse_args(argv)
+
+    ids = [f'catalog{i}' for i in range(args.requests)]
+    documents = {}
+    for id in ids:
+        g = make_catalog(f'http://localhost/catalog/{id}', args.size)
+        documents[f'/catalog/{id}'] = (serialize(g, 'nt'), DATA_FORMATS['nt'])
+
+    with H2FDPServer(documents, latency=args.latency) as server:
+        session = create_session(pool_maxsize=args.connections, pool_block=True)
+        http1, http1_connections = _run(server, session, ids, args.workers)
+        # plain http URLs are sent over HTTP/2 with prior knowledge
+        session = HTTP2Transport(http1=False)
+        http2, http2_connections = _run(server, session, ids, args.workers)
+
+    print(f'HTTP/1.1: {http1:8.1f} requests/sec over {http1_connections} connections')
+    print(f'HTTP/2:   {http2:8.1f} requests/sec over {http2_connections} connections')
+    print(f'speedup:  {http2 / http1:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
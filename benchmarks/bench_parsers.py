@@ -0,0 +1,75 @@
+"""Benchmark the parser backends of fdpclient.parsers on synthetic catalogs.
+
+Usage:
+    python -m benchmarks.bench_parsers [--sizes N [N ...]] [--repeat N]
+"""
+import argparse
+import time
+
+import rdflib
+
+from fdpclient import parsers
+from benchmarks.synthetic import make_catalog
+
+
+def _rdflib(format):
+    def parse(data):
+        g = rdflib.Graph()
+        g.parse(data=data, format=format)
+        return g
+    return parse
+
+
+def _backend(format):
+    def parse(data):
+        return parsers.parse(data, format, rdflib.Graph())
+    return parse
+
+
+def _triples(format):
+    def parse(data):
+        with parsers._backends_lock:
+            name, parser = parsers._backends[format][0]
+        return list(parser(data))
+    return parse
+
+
+#: (name, format, parse function)
+BACKENDS = [
+    ('rdflib turtle', 'turtle', _rdflib('turtle')),
+    ('rdflib nt', 'nt', _rdflib('nt')),
+    ('fdpclient nt', 'nt', _backend('nt')),
+    ('fdpclient nt, triples only', 'nt', _triples('nt')),
+]
+
+
+def _run(parse, data, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='numbers of datasets of the catalogs')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per backend, the fastest is reported')
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        g = make_catalog('http://example.org/catalog/catalog01', size)
+        documents = {format: g.serialize(format=format) for format in ('turtle', 'nt')}
+        print(f'catalog of {size} datasets, {len(g)} triples:')
+        baseline = None
+        for name, format, parse in BACKENDS:
+            elapsed = _run(parse, documents[format], args.repeat)
+            baseline = baseline or elapsed
+            print(f'  {name:28} {elapsed * 1000:9.1f} ms  {baseline / elapsed:6.2f}x')
+
+
+if __name__ == '__main__':
+    main()
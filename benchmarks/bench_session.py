@@ -0,0 +1,40 @@
+"""Benchmark reads with and without a pooled keep-alive session.
+
+Usage:
+    python -m benchmarks.bench_session [--requests N]
+"""
+import argparse
+import time
+
+from fdpclient import operations
+from fdpclient.session import create_session
+from benchmarks.server import MockFDPServer, FDP_TURTLE
+
+
+def _run(url, n, session):
+    start = time.perf_counter()
+    for _ in range(n):
+        operations.read(url, session=session)
+    return n / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500,
+                        help='number of read requests per run')
+    args = parser.parse_args(argv)
+
+    documents = {'/catalog/catalog01': (FDP_TURTLE, 'text/turtle')}
+    with MockFDPServer(documents) as server:
+        url = server.url + '/catalog/catalog01'
+        without_pool = _run(url, args.requests, None)
+        with create_session() as session:
+            with_pool = _run(url, args.requests, session)
+
+    print(f'without pooling: {without_pool:8.1f} requests/sec')
+    print(f'with pooling:    {with_pool:8.1f} requests/sec')
+    print(f'speedup:         {with_pool / without_pool:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
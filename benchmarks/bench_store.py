@@ -0,0 +1,48 @@
+"""Benchmark the memory and query time of the rdflib memory store and CompactStore.
+
+Usage:
+    python -m benchmarks.bench_store [--size N]
+"""
+import argparse
+import time
+import tracemalloc
+
+import rdflib
+from rdflib.namespace import DCAT, RDF
+
+from fdpclient.store import CompactStore
+from benchmarks.synthetic import make_catalog
+
+
+def _run(data, store):
+    tracemalloc.start()
+    start = time.perf_counter()
+    g = rdflib.Graph() if store is None else rdflib.Graph(store=store())
+    g.parse(data=data, format='nt')
+    parse = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    datasets = list(g.subjects(RDF.type, DCAT.Dataset))
+    for dataset in datasets[:1000]:
+        list(g.predicate_objects(dataset))
+    query = time.perf_counter() - start
+    return len(g), parse, query, memory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=20000,
+                        help='number of datasets in the catalog')
+    args = parser.parse_args(argv)
+
+    data = make_catalog('http://example.org/catalog/catalog01', args.size).serialize(format='nt')
+    for name, store in (('memory', None), ('compact', CompactStore)):
+        triples, parse, query, memory = _run(data, store)
+        print(f'{name:8} {triples} triples: parse {parse:6.2f}s, '
+              + f'query {query * 1000:7.1f}ms, memory {memory / 2 ** 20:7.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Compare two benchmark result files and report throughput regressions.
+
+Usage:
+    python -m benchmarks.compare baseline.json current.json [--threshold 0.1]
+
+Exits with status 1 if any benchmark is slower than the baseline by more than
+the threshold.
+"""
+import argparse
+import json
+import sys
+
+
+def _key(result):
+    return result['method'], result['format'], result['size']
+
+
+def compare(baseline, current, threshold):
+    """Compare the throughput of matching benchmarks.
+
+    Args:
+        baseline(dict): the baseline report.
+        current(dict): the current report.
+        threshold(float): the relative throughput drop counted as regression.
+
+    Returns:
+        list of tuple: ``(key, baseline, current, ratio)`` of the regressions.
+    """
+    before = {_key(r): r['throughput'] for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        key = _key(result)
+        if key not in before:
+            continue
+        ratio = result['throughput'] / before[key]
+        flag = 'REGRESSION' if ratio < 1 - threshold else ''
+        print(f'{key[0]:22} {key[1] or "-":8} {key[2] if key[2] is not None else "-":>6} '
+              f'{before[key]:9.1f}/s -> {result["throughput"]:9.1f}/s  {ratio:6.2f}x {flag}')
+        if flag:
+            regressions.append((key, before[key], result['throughput'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative throughput drop counted as regression')
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    print(f'{len(regressions)} regression(s)')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""A local stand-in FAIR Data Point server speaking HTTP/1.1 and HTTP/2.
+
+The server answers GET requests from a dictionary of documents after a fixed
+latency, emulating the processing time of a real FDP. HTTP/2 is served with
+prior knowledge, i.e. to clients starting the connection with the HTTP/2
+preface, and HTTP/1.1 to the others, on the same port. It runs in its own
+process, so that it does not compete with the client threads for the GIL.
+"""
+import asyncio
+import multiprocessing
+
+import h2.config
+import h2.connection
+import h2.events
+
+from benchmarks.server import FDP_TURTLE
+
+PREFACE = b'PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n'
+
+class _H2Connection:
+    """Serve the streams of an HTTP/2 connection concurrently"""
+
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.conn = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False, header_encoding='utf-8'))
+        self.window_updated = asyncio.Event()
+
+    async def run(self, data):
+        self.conn.initiate_connection()
+        self._receive(data)
+        while True:
+            data = await self.reader.read(65536)
+            if not data:
+                break
+            self._receive(data)
+
+    def _receive(self, data):
+        for event in self.conn.receive_data(data):
+            if isinstance(event, h2.events.RequestReceived):
+                headers = dict(event.headers)
+                asyncio.ensure_future(self._respond(event.stream_id, headers[':path']))
+            elif isinstance(event, h2.events.DataReceived):
+                self.conn.acknowledge_received_data(event.flow_controlled_length,
+                                                    event.stream_id)
+            elif isinstance(event, h2.events.WindowUpdated):
+                self.window_updated.set()
+        self.writer.write(self.conn.data_to_send())
+
+    async def _respond(self, stream_id, path):
+        await asyncio.sleep(self.server.latency)
+        status, body, content_type = self.server.lookup(path)
+        self.conn.send_headers(stream_id, [(':status', str(status)),
+                                           ('content-type', content_type),
+                                           ('content-length', str(len(body)))])
+        while body:
+            window = self.conn.local_flow_control_window(stream_id)
+            if window < 1:
+                self.window_updated.clear()
+                await self.window_updated.wait()
+                continue
+            size = min(window, len(body), self.conn.max_outbound_frame_size)
+            self.conn.send_data(stream_id, body[:size])
+            body = body[size:]
+            self.writer.write(self.conn.data_to_send())
+        self.conn.end_stream(stream_id)
+        self.writer.write(self.conn.data_to_send())
+
+
+class _Server:
+    """The asyncio server of the server process"""
+
+    def __init__(self, documents, latency, connections):
+        self.documents = documents
+        self.latency = latency
+        self.connections = connections
+
+    def lookup(self, path):
+        doc = self.documents.get(path.split('?')[0].rstrip('/'))
+        if doc is None:
+            return 404, b'Not Found', 'text/plain'
+        return (200,) + doc
+
+    async def serve(self, port, pipe):
+        server = await asyncio.start_server(self.handle, '127.0.0.1', port)
+        pipe.send(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        with self.connections.get_lock():
+            self.connections.value += 1
+        try:
+            line = await reader.readline()
+            if line == PREFACE[:16]:
+                rest = await reader.readexactly(len(PREFACE) - 16)
+                await _H2Connection(self, reader, writer).run(line + rest)
+            else:
+                await self.handle_http1(line, reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_http1(self, line, reader, writer):
+        while line:
+            path = line.split()[1].decode('latin-1')
+            length = 0
+            while True:
+                header = await reader.readline()
+                if header in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = header.decode('latin-1').partition(':')
+                if name.strip().lower() == 'content-length':
+                    length = int(value)
+            if length:
+                await reader.readexactly(length)
+            await asyncio.sleep(self.latency)
+            status, body, content_type = self.lookup(path)
+            writer.write(f'HTTP/1.1 {status} OK\r\nContent-Type: {content_type}\r\n'
+                         f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body)
+            await writer.drain()
+            line = await reader.readline()
+
+
+def _serve(documents, latency, port, pipe, connections):
+    server = _Server(documents, latency, connections)
+    asyncio.run(server.serve(port, pipe))
+
+
+class H2FDPServer:
+    """FDP server process answering over HTTP/1.1 and HTTP/2.
+
+    Args:
+        documents(dict, optional): mapping of URL paths to
+            ``(body, content_type)`` tuples, served from the start of the
+            server. The fdp metadata is always served on ``/fdp``.
+        latency(float, optional): the time to answer a request, in seconds.
+            Defaults to 0.02.
+        port(int, optional): the port to listen on. Defaults to 0, i.e. a
+            free port.
+
+    Examples:
+        >>> with H2FDPServer(documents, latency=0.05) as server:
+        ...     client = Client(server.url, transport='http2')
+    """
+
+    def __init__(self, documents=None, latency=0.02, port=0):
+        self.documents = {'/fdp': (FDP_TURTLE, 'text/turtle')}
+        self.documents.update(documents or {})
+        self.latency = latency
+        self.port = port
+        self._connections = multiprocessing.Value('i', 0)
+        self._process = None
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    @property
+    def connections(self):
+        """int: the number of connections accepted."""
+        return self._connections.value
+
+    def start(self):
+        parent, child = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_serve, daemon=True,
+            args=(self.documents, self.latency, self.port, child, self._connections))
+        self._process.start()
+        self.port = parent.recv()
+        return self
+
+    def stop(self):
+        self._process.terminate()
+        self._process.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
@@ -0,0 +1,107 @@
+"""A local stand-in FAIR Data Point server for benchmarks.
+
+The server answers every request in-process from a dictionary of documents,
+so the benchmarks measure the client and not a real FDP deployment.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FDP_TURTLE = b"""@prefix dct: <http://purl.org/dc/terms/>.
+@prefix r3d: <http://www.re3data.org/schema/3-0#>.
+@prefix ldp: <http://www.w3.org/ns/ldp#>.
+
+<http://localhost/fdp> a r3d:Repository;
+    dct:title "Benchmark FDP";
+    dct:hasVersion "1.0".
+"""
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b'', content_type='text/turtle'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def do_GET(self):
+        doc = self.server.documents.get(self.path.split('?')[0].rstrip('/'))
+        if doc is None:
+            self._send(404, b'Not Found', 'text/plain')
+        else:
+            body, content_type = doc
+            self._send(200, body, content_type)
+
+    def do_POST(self):
+        self._read_body()
+        self._send(201)
+
+    def do_PUT(self):
+        body = self._read_body()
+        path = self.path.rstrip('/')
+        content_type = self.headers.get('Content-Type', 'text/turtle')
+        self.server.documents[path] = (body, content_type)
+        self._send(200)
+
+    def do_DELETE(self):
+        self.server.documents.pop(self.path.rstrip('/'), None)
+        self._send(204)
+
+
+class MockFDPServer:
+    """In-process HTTP server serving FDP metadata documents.
+
+    Args:
+        documents(dict, optional): mapping of URL paths to
+            ``(body, content_type)`` tuples. The fdp metadata is always
+            served on ``/fdp``.
+        port(int, optional): the port to listen on. Defaults to 0, i.e. a
+            free port.
+
+    Examples:
+        >>> with MockFDPServer() as server:
+        ...     client = Client(server.url)
+    """
+
+    def __init__(self, documents=None, port=0):
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.documents = {'/fdp': (FDP_TURTLE, 'text/turtle')}
+        self._httpd.documents.update(documents or {})
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def documents(self):
+        return self._httpd.documents
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
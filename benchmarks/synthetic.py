@@ -0,0 +1,49 @@
+"""Synthetic FAIR Data Point metadata of configurable size for benchmarks."""
+import rdflib
+from rdflib import Literal, URIRef
+from rdflib.namespace import DCAT, DCTERMS, RDF, XSD
+
+FDP = rdflib.Namespace('http://rdf.biosemantics.org/ontologies/fdp-o#')
+
+
+def make_catalog(url, size):
+    """Make a catalog graph listing ``size`` datasets.
+
+    Each dataset is linked with ``dcat:dataset`` and described with a few
+    literals, so the document grows linearly with ``size`` (about six
+    triples per dataset).
+
+    Args:
+        url(str): the URL of the catalog.
+        size(int): the number of datasets.
+
+    Returns:
+        :class:`rdflib.Graph`: the catalog graph.
+    """
+    g = rdflib.Graph()
+    g.bind('dcat', DCAT)
+    g.bind('dcterms', DCTERMS)
+    g.bind('fdp', FDP)
+    catalog = URIRef(url)
+    base = url.rsplit('/catalog/', 1)[0]
+    g.add((catalog, RDF.type, DCAT.Catalog))
+    g.add((catalog, DCTERMS.title, Literal(f'Synthetic catalog of {size} datasets')))
+    g.add((catalog, DCTERMS.hasVersion, Literal('1.0')))
+    g.add((catalog, FDP.metadataIssued,
+           Literal('2021-01-01T00:00:00', datatype=XSD.dateTime)))
+    for i in range(size):
+        dataset = URIRef(f'{base}/dataset/dataset{i:06d}')
+        g.add((catalog, DCAT.dataset, dataset))
+        g.add((dataset, RDF.type, DCAT.Dataset))
+        g.add((dataset, DCTERMS.title, Literal(f'Dataset {i}')))
+        g.add((dataset, DCTERMS.description,
+               Literal(f'Synthetic dataset number {i} of the benchmark catalog.')))
+        g.add((dataset, DCAT.keyword, Literal(f'keyword{i % 10}')))
+        g.add((dataset, DCTERMS.isPartOf, catalog))
+    return g
+
+
+def serialize(graph, format):
+    """Serialize a graph to bytes, for rdflib versions returning str or bytes."""
+    data = graph.serialize(format=format)
+    return data.encode('utf-8') if isinstance(data, str) else data
@@ -0,0 +1,60 @@
+"""Timing helpers shared by the benchmarks."""
+import statistics
+import time
+
+
+def measure(func, iterations, warmup=1):
+    """Call a function repeatedly and return the latency of each call.
+
+    Args:
+        func(callable): the function to call without arguments.
+        iterations(int): the number of measured calls.
+        warmup(int, optional): the number of calls before measuring.
+            Defaults to 1.
+
+    Returns:
+        list of float: the latencies in seconds.
+    """
+    for _ in range(warmup):
+        func()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def percentile(values, q):
+    """Return the q-th percentile (0-100) of values by linear interpolation."""
+    values = sorted(values)
+    if len(values) == 1:
+        return values[0]
+    k = (len(values) - 1) * q / 100
+    lower = int(k)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (k - lower)
+
+
+def summarize(latencies):
+    """Summarize latencies as throughput and latency percentiles.
+
+    Args:
+        latencies(list of float): the latencies in seconds.
+
+    Returns:
+        dict: 'iterations', 'throughput' (calls/sec) and 'latency_ms' with
+        'mean', 'min', 'p50', 'p90', 'p99' and 'max'.
+    """
+    return {
+        'iterations': len(latencies),
+        'throughput': len(latencies) / sum(latencies),
+        'latency_ms': {
+            'mean': statistics.mean(latencies) * 1000,
+            'min': min(latencies) * 1000,
+            'p50': percentile(latencies, 50) * 1000,
+            'p90': percentile(latencies, 90) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'max': max(latencies) * 1000,
+        },
+    }
@@ -2,9 +2,21 @@ import logging
 from .__version__ import __version__
 
 from .config import DATA_FORMATS
-from .operations import create, read, update, delete
 
 logging.getLogger(__name__)
 
 __author__ = "Cunliang Geng"
-__email__ = 'c.geng@esciencecenter.nl'
\ No newline at end of file
+__email__ = 'c.geng@esciencecenter.nl'
+
+# The operations are imported on first use: they load requests, and rdflib
+# when they parse or serialize graphs, which would slow down every import
+_OPERATIONS = ('create', 'read', 'read_raw', 'update', 'delete')
+
+def __getattr__(name):
+    if name in _OPERATIONS:
+        from . import operations
+        return getattr(operations, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+def __dir__():
+    return sorted(list(globals()) + list(_OPERATIONS))
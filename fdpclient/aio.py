@@ -0,0 +1,325 @@
+import asyncio
+import logging
+import time
+import weakref
+from fdpclient import negotiation
+from fdpclient import operations
+from fdpclient.client import _BaseClient, _FDP_FORMAT
+from fdpclient.exceptions import HTTPError, TransportError
+from fdpclient.retry import parse_retry_after
+
+try:
+    import httpx
+except ImportError: # pragma: no cover
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+async def create(url, data, format='turtle', client=None, retry=None, **kwargs):
+    """Send a create request asynchronously.
+
+    Args:
+        url(str): URL for creating a metadata.
+        data(str, bytes, file-like object or :class:`rdflib.Graph`):
+            the content of metadata to send in the request body.
+        format (str, optional): the format of the metadata.
+            This argument overwrites the request header ``content-type``.
+            Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+            Defaults to 'turtle'.
+        client(:class:`httpx.AsyncClient`, optional): the HTTP client used to
+            send the request. Defaults to `None`, i.e. a new HTTP client for
+            the request.
+        retry(:class:`fdpclient.retry.RetryPolicy`, optional): the policy to
+            retry failed requests with. Defaults to `None`, i.e. no retries.
+        **kwargs: Optional arguments that :meth:`httpx.AsyncClient.request` takes.
+    """
+    logger.debug(f'Create metadata on {url} with the content: \n{data}')
+    operations._set_content_type(kwargs, format)
+    content = _read_data(operations._check_data(data, format))
+    await _send(client, 'POST', url, lambda s: s < 300, retry, content=content, **kwargs)
+
+async def read(url, format='turtle', client=None, retry=None, policy=None, **kwargs):
+    """Send a read request asynchronously.
+
+    The response is parsed in a worker thread, so that parsing large
+    documents does not block the event loop.
+
+    Args:
+        url(str): URL for reading a metadata.
+        format (str, optional): the preferred format of the metadata, see
+            :func:`fdpclient.operations.read`.
+            This argument overwrites the request header ``accept``.
+            Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+            Defaults to 'turtle'.
+        client(:class:`httpx.AsyncClient`, optional): the HTTP client used to
+            send the request. Defaults to `None`, i.e. a new HTTP client for
+            the request.
+        retry(:class:`fdpclient.retry.RetryPolicy`, optional): the policy to
+            retry failed requests with. Defaults to `None`, i.e. no retries.
+        policy(:class:`fdpclient.negotiation.FormatPolicy`, optional): the
+            policy ordering the ``accept`` header, and recording the format
+            of the response and its parse time. Defaults to `None`.
+        **kwargs: Optional arguments that :meth:`httpx.AsyncClient.request` takes.
+
+    Returns:
+        :class:`rdflib.Graph`:  RDF graph of the requested metadata.
+    """
+    logger.debug(f'Read metadata: {url}')
+    if policy is not None:
+        operations._set_accept(kwargs, policy.accept(url, format))
+    else:
+        operations._set_accept(kwargs, negotiation.accept_header(
+            negotiation.ranked_formats(format)))
+    r = await _send(client, 'GET', url, lambda s: s == 200, retry, **kwargs)
+    received = negotiation.format_of(r.headers.get('Content-Type'))
+    if received is None:
+        received = format
+    elif policy is not None:
+        policy.record_response(url, format, received)
+    loop = asyncio.get_running_loop()
+    try:
+        g, seconds = await loop.run_in_executor(None, _parse, r.text, received)
+    except Exception:
+        if policy is not None:
+            policy.record_failure(url, received)
+        raise
+    if policy is not None:
+        policy.record_parse(received, len(r.content), seconds)
+    return g
+
+async def update(url, data, format='turtle', client=None, retry=None, **kwargs):
+    """Send an update request asynchronously.
+
+    Args:
+        url(str): URL for updating a metadata.
+        data(str, bytes, file-like object or :class:`rdflib.Graph`):
+            the content of metadata to send in the request body.
+        format (str, optional): the format of the metadata.
+            This argument overwrites the request header ``content-type``.
+            Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+            Defaults to 'turtle'.
+        client(:class:`httpx.AsyncClient`, optional): the HTTP client used to
+            send the request. Defaults to `None`, i.e. a new HTTP client for
+            the request.
+        retry(:class:`fdpclient.retry.RetryPolicy`, optional): the policy to
+            retry failed requests with. Defaults to `None`, i.e. no retries.
+        **kwargs: Optional arguments that :meth:`httpx.AsyncClient.request` takes.
+    """
+    logger.debug(f'Update metadata on {url} with the content: \n{data}')
+    operations._set_content_type(kwargs, format)
+    content = _read_data(operations._check_data(data, format))
+    await _send(client, 'PUT', url, lambda s: s < 300, retry, content=content, **kwargs)
+
+async def delete(url, client=None, retry=None, **kwargs):
+    """Send a delete request asynchronously.
+
+    Args:
+        url(str): URL for deleting a metadata.
+        client(:class:`httpx.AsyncClient`, optional): the HTTP client used to
+            send the request. Defaults to `None`, i.e. a new HTTP client for
+            the request.
+        retry(:class:`fdpclient.retry.RetryPolicy`, optional): the policy to
+            retry failed requests with. Defaults to `None`, i.e. no retries.
+        **kwargs: Optional arguments that :meth:`httpx.AsyncClient.request` takes.
+    """
+    logger.debug(f'Delete metadata: {url}')
+    await _send(client, 'DELETE', url, lambda s: s < 300, retry, **kwargs)
+
+
+class AsyncClient(_BaseClient):
+    def __init__(self, host, concurrency=10, client=None, fdp_path=None,
+                 fdp_path_file=None, retry=None, format_policy=None):
+        """The asyncio Client object to connect to a FAIR Data Point server.
+
+        It has the same ``create_*``, ``read_*``, ``update_*`` and
+        ``delete_*`` methods as :class:`fdpclient.client.Client`, but each
+        method returns a coroutine. At most ``concurrency`` requests are in
+        flight at the same time on each event loop, the others wait for a
+        free slot.
+
+        The fdp url is detected on the first fdp-level request, and then
+        remembered for the host by all clients of the process.
+
+        AsyncClient requires the optional dependency ``httpx``, install it
+        with ``pip install fairdatapoint-client[async]``.
+
+        Args:
+            host(str): the host URL
+            concurrency(int, optional): the maximum number of concurrent
+                requests. Defaults to 10.
+            client(:class:`httpx.AsyncClient`, optional): the HTTP client to
+                send requests with. Defaults to `None`, i.e. the client
+                creates (and owns) an HTTP client with a connection pool of
+                ``concurrency`` connections.
+            fdp_path(str, optional): the 'fdp' path, i.e. 'fdp' or ''. Giving
+                it skips the detection. Defaults to `None`.
+            fdp_path_file(str, optional): a JSON file to persist the detected
+                'fdp' paths in. Defaults to `None`.
+            retry(:class:`fdpclient.retry.RetryPolicy`, optional): the policy
+                to retry failed requests with. Defaults to `None`, i.e. no
+                retries.
+            format_policy(:class:`fdpclient.negotiation.FormatPolicy`, optional):
+                the policy choosing the format of reads without a format, see
+                :class:`fdpclient.client.Client`. Defaults to `None`, i.e.
+                :func:`fdpclient.parsers.preferred_format`.
+
+        Examples:
+            >>> async with AsyncClient('http://fdp.fairdatapoint.nl') as client:
+            ...     catalogs = await client.gather(
+            ...         client.read_catalog('catalog01'),
+            ...         client.read_catalog('catalog02'))
+        """
+        if httpx is None:
+            raise ImportError('AsyncClient requires httpx, install it with '
+                              + '"pip install fairdatapoint-client[async]"')
+        if concurrency < 1:
+            raise ValueError(f'Invalid concurrency: {concurrency}')
+        super().__init__(host, fdp_path=fdp_path, fdp_path_file=fdp_path_file,
+                         format_policy=format_policy)
+        self.concurrency = concurrency
+        self.retry = retry
+        self._owns_client = client is None
+        if client is None:
+            limits = httpx.Limits(max_connections=concurrency,
+                                  max_keepalive_connections=concurrency)
+            client = httpx.AsyncClient(limits=limits)
+        self.client = client
+        # asyncio semaphores are bound to the loop they are first used on
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the HTTP client of the client if it was created by the client."""
+        if self._owns_client:
+            await self.client.aclose()
+
+    async def gather(self, *aws, return_exceptions=False):
+        """Run request coroutines concurrently and return their results.
+
+        The number of concurrent requests is bounded by ``concurrency``.
+
+        Args:
+            *aws: the coroutines returned by the client methods.
+            return_exceptions(bool, optional): whether to return exceptions
+                as results instead of raising the first one, see
+                :func:`asyncio.gather`. Defaults to `False`.
+
+        Returns:
+            list: the results in the order of the given coroutines.
+        """
+        return await asyncio.gather(*aws, return_exceptions=return_exceptions)
+
+    # Private methods
+    async def _detect_fdp_url(self):
+        """Detect the internal path of fdp, see
+        :meth:`fdpclient.client.Client._detect_fdp_url`.
+        """
+        if self._fdp_id is not None:
+            return self._fdp_id
+        path = self._known_fdp_path()
+        if path is not None:
+            self._fdp_id = path
+            return path
+
+        for url, path in self._fdp_candidates():
+            r = await self.client.get(url, headers={'Accept': _FDP_FORMAT})
+            if self._is_fdp_response(r.status_code, r.headers):
+                self._remember_fdp_path(path)
+                return path
+
+        raise RuntimeError('Failed to detect the fdp url. Check if the server '
+                        + 'uses "<host>" or "<host>/fdp" as the fdp url.')
+
+    async def _request(self, operation, type, id=None, data=None, format='turtle', **kwargs):
+        """Private request method, see :meth:`fdpclient.client.Client._request`.
+
+        Returns:
+            `None` or :class:`rdflib.Graph`: RDF graph of the requested metadata.
+        """
+        if type == 'fdp':
+            type = await self._detect_fdp_url()
+        url = self._prepare_url(operation, type, id=id, data=data)
+        format = self._resolve_format(operation, url, format)
+
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+
+        logger.debug(f'Request: {operation} metadata on {url}')
+        request = globals()[operation]
+        kwargs.setdefault('client', self.client)
+        kwargs.setdefault('retry', self.retry)
+        if operation == 'read' and self.format_policy is not None:
+            kwargs.setdefault('policy', self.format_policy)
+        async with semaphore:
+            if operation == 'delete':
+                r = await request(url=url, data=data, **kwargs)
+            else:
+                r = await request(url=url, data=data, format=format, **kwargs)
+        return r
+
+
+def _parse(text, format):
+    """Parse a response body in a worker thread, return the graph and the
+    parse time in seconds"""
+    start = time.perf_counter()
+    g = operations._parse(text, format)
+    return g, time.perf_counter() - start
+
+def _read_data(data):
+    """Read file-like data, async HTTP clients do not stream sync files"""
+    if hasattr(data, 'read'):
+        return data.read()
+    return data
+
+async def _send(client, method, url, ok, retry=None, **kwargs):
+    """Send a request, retry it by the policy if any and check the status.
+
+    Raises:
+        HTTPError: the response status is not ok.
+        TransportError: the request failed without a response.
+    """
+    operation = operations._OPERATIONS[method.lower()]
+    if retry is not None:
+        retry.record_request()
+
+    attempt = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            if client is None:
+                async with httpx.AsyncClient() as temp_client:
+                    r = await temp_client.request(method, url, **kwargs)
+            else:
+                r = await client.request(method, url, **kwargs)
+        except Exception as error:
+            delay = None if retry is None else retry.delay(operation, attempt, error=error)
+            if delay is None:
+                if not isinstance(error, (httpx.TransportError, OSError)):
+                    raise
+                logger.error(f'Unexpected error when connecting to {url}: {error!r}')
+                raise TransportError(url, error, elapsed=time.perf_counter() - start,
+                                     attempts=attempt + 1) from error
+        else:
+            if ok(r.status_code):
+                return r
+            elapsed = time.perf_counter() - start
+            delay = None
+            if retry is not None:
+                delay = retry.delay(operation, attempt, r.status_code, r.headers)
+            if delay is None:
+                logger.error(f'HTTP error: {r.status_code} {r.reason_phrase} for {url}')
+                logger.debug(f'Response message: {r.text}')
+                raise HTTPError(r.status_code, r.reason_phrase, url, r.text,
+                                elapsed=elapsed, attempts=attempt + 1,
+                                retry_after=parse_retry_after(r.headers.get('Retry-After')))
+
+        attempt += 1
+        logger.debug(f'Retry {attempt} of {operation} {url} in {delay:.2f}s')
+        await asyncio.sleep(delay)
@@ -0,0 +1,241 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+import rdflib
+from fdpclient.parallel import _pop
+
+logger = logging.getLogger(__name__)
+
+#: The formats serialized on the process pool: writing the other formats
+#: costs about as much as pickling the graph for a process, or less
+POOLED_FORMATS = ('turtle', 'n3', 'json-ld')
+
+class BulkResult:
+    """The result of one item of a bulk create or update.
+
+    Attributes:
+        index(int): the position of the item in the input.
+        id(str): the identifier of the metadata, `None` for creates.
+        error(Exception): the exception raised for the item, `None` if it
+            succeeded.
+        elapsed(float): the time in seconds to send the item, excluding
+            serialization and waiting for a free worker.
+    """
+
+    def __init__(self, index, id=None, error=None, elapsed=None):
+        self.index = index
+        self.id = id
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        """bool: whether the item succeeded."""
+        return self.error is None
+
+    def __repr__(self):
+        status = 'ok' if self.ok else f'error={self.error!r}'
+        return f'BulkResult(index={self.index}, id={self.id!r}, {status})'
+
+
+def create_many(client, type, items, format='turtle', workers=4, processes=None,
+                max_in_flight=None, ordered=False, **kwargs):
+    """Create many metadata of a type, pipelining serialization and upload.
+
+    :class:`rdflib.Graph` items in one of :const:`POOLED_FORMATS` are
+    serialized on a pool of ``processes`` processes, as serialization is
+    CPU-bound, while the serialized items are uploaded concurrently by
+    ``workers`` threads on the pooled session of the client. A graph is
+    pickled to be sent to a process, which costs about as much as writing it
+    in N-Triples or RDF/XML, so the graphs in the other formats are
+    serialized in the upload threads instead. At most ``max_in_flight`` items are held between serialization
+    and the end of their upload, the items are not consumed further until a
+    result is taken, and the pending items are cancelled if the results are
+    not all taken.
+
+    The serialization processes are started with the 'spawn' method on the
+    first graph to serialize, so a script calling this function must guard
+    its main code with ``if __name__ == '__main__':``. The graphs in the
+    ``serialization_cache`` of the client are not serialized again; their
+    hashes are computed in the upload threads.
+
+    Args:
+        client(:class:`fdpclient.client.Client`): the client to send with.
+        type(str): the type of metadata.
+            Available types: 'catalog', 'dataset' and 'distribution'.
+        items(iterable): the metadata, each a :class:`rdflib.Graph`, str,
+            bytes, file-like object or :class:`os.PathLike` path of a file.
+        format (str, optional): the format of the metadata.
+            Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+            Defaults to 'turtle'.
+        workers(int, optional): the number of concurrent uploads.
+            Defaults to 4.
+        processes(int, optional): the number of serialization processes, 0 to
+            serialize in the upload threads. Defaults to `None`, i.e. the
+            number of CPUs.
+        max_in_flight(int, optional): the maximum number of items in
+            progress. Defaults to `None`, i.e. ``2 * workers``.
+        ordered(bool, optional): whether to yield the results in the order of
+            the items. Defaults to `False`, i.e. in completion order.
+        **kwargs: Optional arguments that :func:`requests.request` takes.
+
+    Yields:
+        :class:`BulkResult`: the result of each item.
+
+    Examples:
+        >>> for r in create_many(client, 'dataset', graphs, workers=8):
+        ...     if not r.ok:
+        ...         print(f'Failed to create item {r.index}: {r.error}')
+    """
+    items = ((None, data) for data in items)
+    return _pipeline(client, 'create', type, items, format, workers, processes,
+                     max_in_flight, ordered, kwargs)
+
+def update_many(client, type, items, format='turtle', workers=4, processes=None,
+                max_in_flight=None, ordered=False, **kwargs):
+    """Update many metadata of a type, pipelining serialization and upload.
+
+    See :func:`create_many`.
+
+    Args:
+        client(:class:`fdpclient.client.Client`): the client to send with.
+        type(str): the type of metadata.
+            Available types: 'catalog', 'dataset' and 'distribution'.
+        items(iterable of tuple): ``(id, data)`` pairs of the identifier and
+            the metadata, see :func:`create_many`.
+        format (str, optional): the format of the metadata.
+            Defaults to 'turtle'.
+        workers(int, optional): the number of concurrent uploads.
+            Defaults to 4.
+        processes(int, optional): the number of serialization processes, 0 to
+            serialize in the upload threads. Defaults to `None`, i.e. the
+            number of CPUs.
+        max_in_flight(int, optional): the maximum number of items in
+            progress. Defaults to `None`, i.e. ``2 * workers``.
+        ordered(bool, optional): whether to yield the results in the order of
+            the items. Defaults to `False`, i.e. in completion order.
+        **kwargs: Optional arguments that :func:`requests.request` takes.
+
+    Yields:
+        :class:`BulkResult`: the result of each item.
+    """
+    return _pipeline(client, 'update', type, items, format, workers, processes,
+                     max_in_flight, ordered, kwargs)
+
+def _pipeline(client, operation, type, items, format, workers, processes,
+              max_in_flight, ordered, kwargs):
+    """Serialize, upload and yield the results of the items"""
+    if type not in ('catalog', 'dataset', 'distribution'):
+        raise ValueError(f'Invalid metadata type: {type}')
+    if workers < 1:
+        raise ValueError(f'Invalid number of workers: {workers}')
+    max_in_flight = 2 * workers if max_in_flight is None else max_in_flight
+    if max_in_flight < 1:
+        raise ValueError(f'Invalid max_in_flight: {max_in_flight}')
+    return _run(client, operation, type, items, format, workers, processes,
+                max_in_flight, ordered, kwargs)
+
+def _run(client, operation, type, items, format, workers, processes,
+         max_in_flight, ordered, kwargs):
+    uploader = ThreadPoolExecutor(max_workers=workers)
+    serializer = None
+    serializer_lock = threading.Lock()
+    cache = client.serialization_cache
+    # the executor futures of the pending items, cancelled if the results
+    # are not all taken
+    work = {}
+    closed = []
+
+    def upload(index, id, data, done):
+        start = time.perf_counter()
+        try:
+            client._request(operation, type, id=id, data=_load(data),
+                            format=format, **dict(kwargs))
+        except Exception as error:
+            logger.debug(f'Failed to {operation} item {index}: {error}')
+            done.set_result(BulkResult(index, id, error, time.perf_counter() - start))
+        else:
+            done.set_result(BulkResult(index, id, None, time.perf_counter() - start))
+
+    def on_serialized(index, id, key, done):
+        def callback(future):
+            if closed or future.cancelled():
+                done.cancel()
+                return
+            try:
+                data = future.result()
+            except Exception as error:
+                done.set_result(BulkResult(index, id, error))
+            else:
+                if key is not None:
+                    cache.put(key, data)
+                work[index] = uploader.submit(upload, index, id, data, done)
+        return callback
+
+    def serialize(index, id, graph, done):
+        # run in the upload threads, the graph is hashed and then uploaded if
+        # its serialization is cached, or sent to the processes
+        nonlocal serializer
+        key = None
+        if cache is not None:
+            key = cache.key(graph, format)
+            data = cache.get(key)
+            if data is not None:
+                upload(index, id, data, done)
+                return
+        with serializer_lock:
+            if closed:
+                done.cancel()
+                return
+            if serializer is None:
+                # the upload threads are running, which forking is not safe with
+                serializer = ProcessPoolExecutor(max_workers=processes or os.cpu_count(),
+                                                 mp_context=get_context('spawn'))
+            future = serializer.submit(_serialize, graph, format)
+        work[index] = future
+        future.add_done_callback(on_serialized(index, id, key, done))
+
+    pending = deque()
+    try:
+        for index, (id, data) in enumerate(items):
+            done = Future()
+            if (processes != 0 and format in POOLED_FORMATS
+                    and isinstance(data, rdflib.Graph)):
+                work[index] = uploader.submit(serialize, index, id, data, done)
+            else:
+                work[index] = uploader.submit(upload, index, id, data, done)
+            pending.append((done, index))
+            if len(pending) >= max_in_flight:
+                index, result = _pop(pending, ordered)
+                work.pop(index, None)
+                yield result
+        while pending:
+            index, result = _pop(pending, ordered)
+            work.pop(index, None)
+            yield result
+    finally:
+        with serializer_lock:
+            closed.append(True)
+        for _, index in pending:
+            future = work.get(index)
+            if future is not None:
+                future.cancel()
+        uploader.shutdown(wait=True)
+        if serializer is not None:
+            serializer.shutdown(wait=True)
+
+def _serialize(graph, format):
+    """Serialize a graph to bytes, run in the serialization processes"""
+    data = graph.serialize(format=format)
+    return data.encode('utf-8') if isinstance(data, str) else data
+
+def _load(data):
+    """Read the content of a file path, other data are sent as they are"""
+    if isinstance(data, os.PathLike):
+        with open(data, 'rb') as f:
+            return f.read()
+    return data
@@ -0,0 +1,500 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+import rdflib
+from rdflib.graph import ModificationException
+from fdpclient.hashing import graph_hash
+from fdpclient.parsers import parse
+
+logger = logging.getLogger(__name__)
+
+class CacheEntry:
+    """A cached response of a read request.
+
+    Args:
+        url(str): the URL of the metadata.
+        format(str): the format of the metadata.
+        body(str): the response body.
+        etag(str, optional): the ``ETag`` response header.
+        last_modified(str, optional): the ``Last-Modified`` response header.
+        graph(:class:`rdflib.Graph`, optional): the parsed response body.
+            Defaults to `None`, i.e. the body is parsed on first use.
+    """
+
+    def __init__(self, url, format, body, etag=None, last_modified=None, graph=None):
+        self.url = url
+        self.format = format
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.graph = graph
+
+    def validators(self):
+        """Return the conditional request headers to revalidate the entry."""
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def get_graph(self):
+        """Return the parsed graph of the entry, parsing the body if needed."""
+        if self.graph is None:
+            self.graph = parse(self.body, self.format, rdflib.Graph())
+        return self.graph
+
+
+class MemoryStorage:
+    """In-memory LRU storage of cache entries.
+
+    Args:
+        maxsize(int, optional): the maximum number of entries. The least
+            recently used entry is dropped when it is exceeded.
+            Defaults to 128.
+    """
+
+    def __init__(self, maxsize=128):
+        if maxsize < 1:
+            raise ValueError(f'Invalid cache size: {maxsize}')
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FileStorage:
+    """On-disk storage of cache entries, one pair of files per entry.
+
+    The parsed graphs are not stored, a response body read from disk is
+    parsed when it is served from the cache.
+
+    Args:
+        directory(str): the directory to store the entries in. It is
+            created if it does not exist.
+    """
+
+    def __init__(self, directory):
+        self.directory = os.path.expanduser(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key, suffix):
+        name = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + suffix)
+
+    def get(self, key):
+        try:
+            with open(self._path(key, '.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(self._path(key, '.body'), encoding='utf-8') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(meta['url'], meta['format'], body,
+                          etag=meta['etag'], last_modified=meta['last_modified'])
+
+    def set(self, key, entry):
+        meta = {'url': entry.url, 'format': entry.format,
+                'etag': entry.etag, 'last_modified': entry.last_modified}
+        _write_atomic(self._path(key, '.body'), entry.body)
+        _write_atomic(self._path(key, '.json'), json.dumps(meta))
+
+    def delete(self, key):
+        for suffix in ('.json', '.body'):
+            try:
+                os.remove(self._path(key, suffix))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(('.json', '.body')):
+                os.remove(os.path.join(self.directory, name))
+
+
+class HTTPCache:
+    """HTTP cache for read requests, revalidated with conditional requests.
+
+    A cached response is revalidated by sending its ``ETag`` in the
+    ``If-None-Match`` header and its ``Last-Modified`` date in the
+    ``If-Modified-Since`` header. When the server answers 304 Not Modified, the
+    cached graph is returned without downloading and parsing the metadata.
+    Only responses with at least one of these validators are cached.
+
+    Args:
+        storage(optional): the storage of the cache entries, e.g.
+            :class:`MemoryStorage` or :class:`FileStorage`.
+            Defaults to `None`, i.e. a :class:`MemoryStorage` of 128 entries.
+
+    Attributes:
+        stats(dict): the counters of the cache:
+            'hits' (served from cache after a 304 response),
+            'misses' (no cache entry),
+            'revalidations' (conditional requests sent) and
+            'stores' (responses stored).
+
+    Examples:
+        >>> cache = HTTPCache(FileStorage('~/.cache/fdpclient'))
+        >>> client = Client('http://fdp.fairdatapoint.nl', cache=cache)
+        >>> client.read_catalog('catalog01')
+        >>> client.read_catalog('catalog01')
+        >>> cache.stats['hits']
+        1
+    """
+
+    def __init__(self, storage=None):
+        self.storage = MemoryStorage() if storage is None else storage
+        self.stats = {'hits': 0, 'misses': 0, 'revalidations': 0, 'stores': 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    @staticmethod
+    def _key(url, format):
+        return f'{format} {url}'
+
+    def get(self, url, format):
+        """Look up the cache entry of a read request.
+
+        Args:
+            url(str): the URL of the metadata.
+            format(str): the format of the metadata.
+
+        Returns:
+            :class:`CacheEntry` or `None`: the cache entry to revalidate.
+        """
+        entry = self.storage.get(self._key(url, format))
+        self._count('misses' if entry is None else 'revalidations')
+        return entry
+
+    def hit(self, entry):
+        """Return a copy of the graph of an entry the server did not modify.
+
+        Args:
+            entry(:class:`CacheEntry`): the revalidated entry.
+
+        Returns:
+            :class:`rdflib.Graph`: a copy of the cached graph.
+        """
+        self._count('hits')
+        logger.debug(f'Cache hit: {entry.url}')
+        return copy_graph(entry.get_graph())
+
+    def put(self, url, format, headers, body, graph, body_format=None):
+        """Store the response of a read request if it has validators.
+
+        Args:
+            url(str): the URL of the metadata.
+            format(str): the requested format of the metadata.
+            headers(dict): the response headers.
+            body(str): the response body.
+            graph(:class:`rdflib.Graph`): the parsed response body.
+            body_format(str, optional): the format of the body, if the server
+                answered in another format than requested. Defaults to `None`,
+                i.e. ``format``.
+        """
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if etag is None and last_modified is None:
+            return
+        entry = CacheEntry(url, body_format or format, body, etag=etag,
+                           last_modified=last_modified, graph=copy_graph(graph))
+        self.storage.set(self._key(url, format), entry)
+        self._count('stores')
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        self.storage.clear()
+
+
+class GraphCache:
+    """In-process LRU cache of parsed graphs, keyed by URL and format.
+
+    A cached graph is returned without sending a request, so unlike
+    :class:`HTTPCache` it may be stale when the metadata is changed by
+    another client. Use ``ttl`` to bound the staleness; changes made by the
+    :class:`fdpclient.client.Client` owning the cache invalidate the cached
+    graph of the changed URL.
+
+    Callers never get the cached graph itself: they get a copy in a store of
+    the same type, or with ``readonly=True`` a cheaper read-only
+    :class:`rdflib.Graph` over the store of the cached graph, that raises
+    :class:`rdflib.graph.ModificationException` on changes.
+
+    Args:
+        maxsize(int, optional): the maximum number of graphs.
+            Defaults to 128.
+        max_triples(int, optional): the maximum total number of triples of
+            the cached graphs. Defaults to `None`, i.e. no limit.
+        ttl(float, optional): the time in seconds a graph stays valid.
+            Defaults to `None`, i.e. until evicted or invalidated.
+        readonly(bool, optional): whether to return read-only views instead
+            of copies. Defaults to `False`.
+
+    Attributes:
+        stats(dict): the counters of the cache: 'hits', 'misses' and
+            'evictions'.
+
+    Examples:
+        >>> client = Client('http://fdp.fairdatapoint.nl',
+        ...                 graph_cache=GraphCache(max_triples=10**6, ttl=600))
+    """
+
+    def __init__(self, maxsize=128, max_triples=None, ttl=None, readonly=False):
+        if maxsize < 1:
+            raise ValueError(f'Invalid cache size: {maxsize}')
+        self.maxsize = maxsize
+        self.max_triples = max_triples
+        self.ttl = ttl
+        self.readonly = readonly
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._entries = OrderedDict()
+        self._triples = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, format):
+        """Return the cached graph of a URL and format.
+
+        Args:
+            url(str): the URL of the metadata.
+            format(str): the format of the metadata.
+
+        Returns:
+            :class:`rdflib.Graph` or `None`: a copy or read-only view of the
+            cached graph, `None` if it is not cached or expired.
+        """
+        key = (url, format)
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and self.ttl is not None \
+                    and time.monotonic() - item[1] > self.ttl:
+                self._remove(key)
+                item = None
+            if item is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+        logger.debug(f'Graph cache hit: {url}')
+        return self._view(item[0])
+
+    def put(self, url, format, graph):
+        """Cache a graph of a URL and format.
+
+        The cache keeps the given graph, so the caller should not change it
+        afterwards.
+
+        Args:
+            url(str): the URL of the metadata.
+            format(str): the format of the metadata.
+            graph(:class:`rdflib.Graph`): the parsed metadata.
+        """
+        key = (url, format)
+        size = len(graph)
+        if self.max_triples is not None and size > self.max_triples:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (graph, time.monotonic(), size)
+            self._triples += size
+            while len(self._entries) > self.maxsize or (
+                    self.max_triples is not None and self._triples > self.max_triples):
+                self._remove(next(iter(self._entries)))
+                self.stats['evictions'] += 1
+
+    def invalidate(self, url=None):
+        """Remove the cached graphs of a URL in all formats.
+
+        Args:
+            url(str, optional): the URL of the metadata.
+                Defaults to `None`, i.e. remove all cached graphs.
+        """
+        with self._lock:
+            keys = [k for k in self._entries if url is None or k[0] == url]
+            for key in keys:
+                self._remove(key)
+
+    def _remove(self, key):
+        graph, _, size = self._entries.pop(key)
+        self._triples -= size
+
+    def _view(self, graph):
+        if self.readonly:
+            return _ReadOnlyGraph(graph)
+        return copy_graph(graph)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SerializationCache:
+    """LRU cache of serialized graphs, keyed by graph content hash and format.
+
+    Graphs with the same triples, even if they are different objects or have
+    different blank node labels, share the serialized bytes, see
+    :func:`fdpclient.hashing.graph_hash`. Retrying or repeating a create or
+    update of the same graph then skips the serialization.
+
+    Args:
+        max_bytes(int, optional): the maximum total size of the serialized
+            graphs. Defaults to 64 MiB.
+
+    Attributes:
+        stats(dict): the counters of the cache: 'hits' and 'misses'.
+
+    Examples:
+        >>> client = Client('http://fdp.fairdatapoint.nl',
+        ...                 serialization_cache=SerializationCache())
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0}
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def serialize(self, graph, format):
+        """Serialize a graph, or return its cached serialization.
+
+        Args:
+            graph(:class:`rdflib.Graph`): the graph to serialize.
+            format(str): the format to serialize to.
+
+        Returns:
+            bytes: the serialized graph.
+        """
+        key = self.key(graph, format)
+        data = self.get(key)
+        if data is None:
+            data = graph.serialize(format=format)
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            self.put(key, data)
+        return data
+
+    def key(self, graph, format):
+        """Return the cache key of a graph serialized to a format.
+
+        Args:
+            graph(:class:`rdflib.Graph`): the graph.
+            format(str): the format.
+
+        Returns:
+            tuple: the key of :meth:`get` and :meth:`put`.
+        """
+        return (graph_hash(graph), format)
+
+    def get(self, key):
+        """Return a cached serialization, counted as a hit or a miss.
+
+        Args:
+            key(tuple): the key returned by :meth:`key`.
+
+        Returns:
+            bytes: the serialized graph, or `None` if it is not cached.
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return data
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, key, data):
+        """Store a serialization, e.g. of a graph serialized elsewhere.
+
+        Args:
+            key(tuple): the key returned by :meth:`key`.
+            data(bytes): the serialized graph, not stored if it is larger
+                than ``max_bytes``.
+        """
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = data
+                self._size += len(data)
+            while self._size > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self._size -= len(old)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def copy_graph(graph):
+    """Copy a graph with its namespace bindings into a new store of the type
+    of its store, e.g. :class:`fdpclient.store.CompactStore`.
+
+    Args:
+        graph(:class:`rdflib.Graph`): the graph to copy.
+
+    Returns:
+        :class:`rdflib.Graph`: the copy.
+    """
+    try:
+        store = type(graph.store)()
+    except TypeError:
+        # a store class taking required arguments
+        store = 'default'
+    g = rdflib.Graph(store=store)
+    for prefix, namespace in graph.namespaces():
+        g.bind(prefix, namespace, override=True)
+    g += graph
+    return g
+
+class _ReadOnlyGraph(rdflib.Graph):
+    """A graph over the store of a cached graph, whose changes raise
+    :class:`rdflib.graph.ModificationException`"""
+
+    def __init__(self, graph):
+        super().__init__(store=graph.store, identifier=graph.identifier,
+                         namespace_manager=graph.namespace_manager)
+
+    def _modify(self, *args, **kwargs):
+        raise ModificationException()
+
+    add = addN = remove = set = parse = update = destroy = _modify
+    __iadd__ = __isub__ = _modify
+
+
+def _write_atomic(path, text):
+    """Write a text file by replacing it, so readers never see partial files"""
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
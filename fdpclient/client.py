@@ -1,41 +1,51 @@
+import json
 import logging
-import requests
+import os
+import threading
+import time
 from fdpclient import operations
+from fdpclient.metrics import RequestEvent, emit
+from fdpclient.parallel import imap
+from fdpclient.parsers import preferred_format
+from fdpclient.transport import create_transport
 
-logger = logging.getLogger(__name__)
+# The modules loading rdflib are imported by the methods using them, so that
+# the clients only deleting or reading raw metadata do not load it
 
-class Client:
-    def __init__(self, host):
-        """The Client object to connect to a FAIR Data Point server.
+logger = logging.getLogger(__name__)
 
-        FAIR Data Point server contains 4 types of metadata as described in the
-        `specification`_:
+#: The arguments of the read and of the update operations only
+_READ_ARGS = ('cache', 'stream', 'store', 'policy')
+#: The read arguments changing the result from a graph, invalid in a sync
+_RESULT_ARGS = ('result', 'predicates', 'pages')
+_WRITE_ARGS = ('serialization_cache', 'compress', 'compress_level')
 
-        ============  ======================
-        type          path
-        ============  ======================
-        fdp           <host>/fdp or <host>
-        catalog       <host>/catalog
-        dataset       <host>/dataset
-        distribution  <host>/distribution
-        ============  ======================
+#: Content type expected from the fdp url when detecting it
+_FDP_FORMAT = 'text/turtle'
 
-        A server may use the host URL to store the 'fdp' metadata, and then
-        the 'fdp' path is the same as the host.
+#: Detected fdp paths per host, shared by all clients of the process
+_fdp_paths = {}
+_fdp_paths_lock = threading.Lock()
 
-        .. _`specification`: https://github.com/FAIRDataTeam/FAIRDataPoint-Spec/blob/master/spec.md
+class _BaseClient:
+    """Metadata methods shared by :class:`Client` and
+    :class:`fdpclient.aio.AsyncClient`.
 
-        Args:
-            host(str): the host URL
+    Subclasses send the requests by implementing :meth:`_request`, the URL
+    building and argument validation are done by :meth:`_prepare_url`.
+    """
 
-        Examples:
-            >>> client = Client('http://fdp.fairdatapoint.nl`)
-            >>> fdp_metadata = client.read_fdp()
-            >>> catalog_metadata = client.read_catalog('catalog01')
-            >>> print(fdp_metadata, catalog_metadata)
-        """
+    def __init__(self, host, fdp_path=None, fdp_path_file=None, format_policy=None):
         self.host = host.rstrip('/')
-        self.fdp_id = self._detect_fdp_url()
+        self.fdp_path_file = fdp_path_file
+        self.format_policy = format_policy
+        self._fdp_id = None if fdp_path is None else fdp_path.strip('/')
+
+    @property
+    def fdp_id(self):
+        """str: the internal path of fdp, i.e. 'fdp' or '', or `None` if it is
+        not known yet."""
+        return self._fdp_id
 
     # Create metadata
     def create_fdp(self, data, format='turtle', **kwargs):
@@ -50,7 +60,7 @@ class Client:
                 Defaults to 'turtle'.
             **kwargs: Optional arguments that :func:`requests.request` takes.
         """
-        self._request('create', self.fdp_id, data=data, format=format, **kwargs)
+        return self._request('create', 'fdp', data=data, format=format, **kwargs)
 
     def create_catalog(self, data, format='turtle', **kwargs):
         """Create a new catalog metadata.
@@ -64,7 +74,7 @@ class Client:
                 Defaults to 'turtle'.
             **kwargs: Optional arguments that :func:`requests.request` takes.
         """
-        self._request('create', 'catalog', data=data, format=format, **kwargs)
+        return self._request('create', 'catalog', data=data, format=format, **kwargs)
 
     def create_dataset(self, data, format='turtle', **kwargs):
         """Create a new dataset metadata.
@@ -78,7 +88,7 @@ class Client:
                 Defaults to 'turtle'.
             **kwargs: Optional arguments that :func:`requests.request` takes.
         """
-        self._request('create', 'dataset', data=data, format=format, **kwargs)
+        return self._request('create', 'dataset', data=data, format=format, **kwargs)
 
     def create_distribution(self, data, format='turtle', **kwargs):
         """Create a new distribution metadata.
@@ -92,25 +102,27 @@ class Client:
                 Defaults to 'turtle'.
             **kwargs: Optional arguments that :func:`requests.request` takes.
         """
-        self._request('create', 'distribution', data=data, format=format, **kwargs)
+        return self._request('create', 'distribution', data=data, format=format, **kwargs)
 
     # Read metadata
-    def read_fdp(self, format='turtle', **kwargs):
+    def read_fdp(self, format=None, **kwargs):
         """Read the fdp metadata.
 
         Args:
             format (str, optional): the format of the metadata.
                 This argument overwrites the request header ``accept``.
                 Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
-                Defaults to 'turtle'.
+                Defaults to `None`, i.e.
+                :func:`fdpclient.parsers.preferred_format`, 'nt' with the
+                built-in fast N-Triples parser.
             **kwargs: Optional arguments that :func:`requests.request` takes.
 
         Returns:
             :class:`rdflib.Graph`: RDF graph of the requested metadata.
         """
-        return self._request('read', self.fdp_id, id='', format=format, **kwargs)
+        return self._request('read', 'fdp', id='', format=format, **kwargs)
 
-    def read_catalog(self, id, format='turtle', **kwargs):
+    def read_catalog(self, id, format=None, **kwargs):
         """Read a catalog metadata.
 
         Args:
@@ -118,7 +130,9 @@ class Client:
             format (str, optional): the format of the metadata.
                 This argument overwrites the request header ``accept``.
                 Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
-                Defaults to 'turtle'.
+                Defaults to `None`, i.e.
+                :func:`fdpclient.parsers.preferred_format`, 'nt' with the
+                built-in fast N-Triples parser.
             **kwargs: Optional arguments that :func:`requests.request` takes.
 
         Returns:
@@ -126,7 +140,7 @@ class Client:
         """
         return self._request('read', 'catalog', id=id, format=format, **kwargs)
 
-    def read_dataset(self, id, format='turtle', **kwargs):
+    def read_dataset(self, id, format=None, **kwargs):
         """Read a dataset metadata.
 
         Args:
@@ -134,7 +148,9 @@ class Client:
             format (str, optional): the format of the metadata.
                 This argument overwrites the request header ``accept``.
                 Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
-                Defaults to 'turtle'.
+                Defaults to `None`, i.e.
+                :func:`fdpclient.parsers.preferred_format`, 'nt' with the
+                built-in fast N-Triples parser.
             **kwargs: Optional arguments that :func:`requests.request` takes.
 
         Returns:
@@ -142,7 +158,7 @@ class Client:
         """
         return self._request('read', 'dataset', id=id, format=format, **kwargs)
 
-    def read_distribution(self, id, format='turtle', **kwargs):
+    def read_distribution(self, id, format=None, **kwargs):
         """Read a distribution metadata.
 
         Args:
@@ -150,7 +166,9 @@ class Client:
             format (str, optional): the format of the metadata.
                 This argument overwrites the request header ``accept``.
                 Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
-                Defaults to 'turtle'.
+                Defaults to `None`, i.e.
+                :func:`fdpclient.parsers.preferred_format`, 'nt' with the
+                built-in fast N-Triples parser.
             **kwargs: Optional arguments that :func:`requests.request` takes.
 
         Returns:
@@ -171,7 +189,7 @@ class Client:
                 Defaults to 'turtle'.
             **kwargs: Optional arguments that :func:`requests.request` takes.
         """
-        self._request('update', self.fdp_id, id='', data=data, format=format, **kwargs)
+        return self._request('update', 'fdp', id='', data=data, format=format, **kwargs)
 
     def update_catalog(self, id, data, format='turtle', **kwargs):
         """Update a catalog metadata.
@@ -186,7 +204,7 @@ class Client:
                 Defaults to 'turtle'.
             **kwargs: Optional arguments that :func:`requests.request` takes.
         """
-        self._request('update', 'catalog', id=id, data=data, format=format, **kwargs)
+        return self._request('update', 'catalog', id=id, data=data, format=format, **kwargs)
 
     def update_dataset(self, id, data, format='turtle', **kwargs):
         """Update a dataset metadata.
@@ -201,7 +219,7 @@ class Client:
                 Defaults to 'turtle'.
             **kwargs: Optional arguments that :func:`requests.request` takes.
         """
-        self._request('update', 'dataset', id=id, data=data, format=format, **kwargs)
+        return self._request('update', 'dataset', id=id, data=data, format=format, **kwargs)
 
     def update_distribution(self, id, data, format='turtle', **kwargs):
         """Update a distribution metadata.
@@ -216,7 +234,7 @@ class Client:
                 Defaults to 'turtle'.
             **kwargs: Optional arguments that :func:`requests.request` takes.
         """
-        self._request('update', 'distribution', id=id, data=data, format=format, **kwargs)
+        return self._request('update', 'distribution', id=id, data=data, format=format, **kwargs)
 
     # Delete metadata
     def delete_catalog(self, id, **kwargs):
@@ -226,7 +244,7 @@ class Client:
             id(str): the identifier of the metadata.
             **kwargs: Optional arguments that :func:`requests.request` takes.
         """
-        self._request('delete', 'catalog', id=id, **kwargs)
+        return self._request('delete', 'catalog', id=id, **kwargs)
 
     def delete_dataset(self, id, **kwargs):
         """Delete a dataset metadata.
@@ -235,7 +253,7 @@ class Client:
             id(str): the identifier of the metadata.
             **kwargs: Optional arguments that :func:`requests.request` takes.
         """
-        self._request('delete', 'dataset', id=id, **kwargs)
+        return self._request('delete', 'dataset', id=id, **kwargs)
 
     def delete_distribution(self, id, **kwargs):
         """Delete a distribution metadata.
@@ -244,9 +262,665 @@ class Client:
             id(str): the identifier of the metadata.
             **kwargs: Optional arguments that :func:`requests.request` takes.
         """
-        self._request('delete', 'distribution', id=id, **kwargs)
+        return self._request('delete', 'distribution', id=id, **kwargs)
 
     # Private methods
+    def _prepare_url(self, operation, path, id=None, data=None):
+        """Validate the request arguments and build the request URL.
+
+        Args:
+            operation(str): the request operation.
+                Available options: 'create', 'read', 'read_raw', 'update'
+                and 'delete'.
+            path(str): the path of metadata type, e.g. 'catalog'.
+            id(str): the identifier of the metadata.
+                Defaults to `None`.
+            data(str, bytes, file-like object or :class:`rdflib.Graph`):
+                the content of metadata to send in the request body.
+                Defaults to `None`.
+
+        Raises:
+            ValueError: invalid operation or missing "id" or "data".
+
+        Returns:
+            str: the request URL.
+        """
+        request_methods = ('create', 'read', 'read_raw', 'update', 'delete')
+
+        if operation not in request_methods:
+            raise ValueError(f'Invalid request method: {operation}')
+
+        if operation in ('read', 'read_raw', 'delete', 'update') and id is None:
+            raise ValueError(f'Metadata "id" must be given for request method {operation}')
+
+        if operation in ('create', 'update') and data is None:
+            raise ValueError(f'Metadata "data" must be given for request method {operation}')
+
+        if id is not None:
+            url = '/'.join([self.host, path, id])
+        else:
+            url = '/'.join([self.host, path])
+        url = url.rstrip('/')
+        return url
+
+    def _resolve_format(self, operation, url, format):
+        """Return the format of a request, for reads without a format the one
+        chosen by the format policy of the client if it has one"""
+        if format is not None:
+            return format
+        if self.format_policy is not None and operation == 'read':
+            return self.format_policy.choose(url)
+        return preferred_format()
+
+    def _known_fdp_path(self):
+        """Return the fdp path of the host detected before, or `None`.
+
+        The path is looked up in the paths detected by clients of this process,
+        and then in ``fdp_path_file`` if it is given.
+        """
+        with _fdp_paths_lock:
+            path = _fdp_paths.get(self.host)
+            if path is None and self.fdp_path_file is not None:
+                path = _load_fdp_paths(self.fdp_path_file).get(self.host)
+                if path is not None:
+                    _fdp_paths[self.host] = path
+        return path
+
+    def _remember_fdp_path(self, path):
+        """Memoize the detected fdp path of the host"""
+        with _fdp_paths_lock:
+            _fdp_paths[self.host] = path
+            if self.fdp_path_file is not None:
+                paths = _load_fdp_paths(self.fdp_path_file)
+                paths[self.host] = path
+                _save_fdp_paths(self.fdp_path_file, paths)
+        self._fdp_id = path
+
+    def _fdp_candidates(self):
+        """Return the (url, path) pairs to probe when detecting the fdp url"""
+        return [(self.host + '/fdp', 'fdp'), (self.host, '')]
+
+    @staticmethod
+    def _is_fdp_response(status_code, headers):
+        """Check if a probe response is served from the fdp url"""
+        return status_code == 200 and headers.get('content-type') == _FDP_FORMAT
+
+    def _request(self, operation, type, id=None, data=None, format='turtle', **kwargs):
+        """Send a request, implemented by subclasses."""
+        raise NotImplementedError
+
+
+class Client(_BaseClient):
+    def __init__(self, host, session=None, cache=None, graph_cache=None,
+                 serialization_cache=None, fdp_path=None, fdp_path_file=None,
+                 hooks=None, retry=None, limiter=None, compress=None,
+                 compress_level=None, format_policy=None, transport=None):
+        """The Client object to connect to a FAIR Data Point server.
+
+        FAIR Data Point server contains 4 types of metadata as described in the
+        `specification`_:
+
+        ============  ======================
+        type          path
+        ============  ======================
+        fdp           <host>/fdp or <host>
+        catalog       <host>/catalog
+        dataset       <host>/dataset
+        distribution  <host>/distribution
+        ============  ======================
+
+        A server may use the host URL to store the 'fdp' metadata, and then
+        the 'fdp' path is the same as the host.
+
+        .. _`specification`: https://github.com/FAIRDataTeam/FAIRDataPoint-Spec/blob/master/spec.md
+
+        The 'fdp' path is detected on the first fdp-level request, and then
+        remembered for the host by all clients of the process.
+
+        All requests of a client are sent with one pooled
+        :class:`requests.Session`, so connections to the server are kept alive
+        and reused between metadata calls, or with another transport, e.g.
+        HTTP/2 multiplexing the concurrent requests on one connection.
+
+        Args:
+            host(str): the host URL
+            session(:class:`requests.Session`, optional): the session to send
+                requests with. Use :func:`fdpclient.session.create_session` to
+                configure pool size, keep-alive, per-host limits and retries.
+                Defaults to `None`, i.e. the client creates (and owns) a
+                session with the default settings.
+            cache(:class:`fdpclient.cache.HTTPCache`, optional): the cache of
+                read responses, revalidated with conditional requests.
+                Defaults to `None`, i.e. no caching.
+            graph_cache(:class:`fdpclient.cache.GraphCache`, optional): the
+                in-process cache of parsed graphs. Reads served from it send
+                no request; updates and deletes of the client invalidate it.
+                Defaults to `None`, i.e. no caching.
+            serialization_cache(:class:`fdpclient.cache.SerializationCache`, optional):
+                the cache of graphs serialized for creates and updates.
+                Defaults to `None`, i.e. no caching.
+            fdp_path(str, optional): the 'fdp' path, i.e. 'fdp' or ''. Giving
+                it skips the detection. Defaults to `None`.
+            fdp_path_file(str, optional): a JSON file to persist the detected
+                'fdp' paths in, so that they are reused across processes.
+                Defaults to `None`.
+            hooks(list of callable, optional): the callables to call with a
+                :class:`fdpclient.metrics.RequestEvent` after each metadata
+                request, e.g. a :class:`fdpclient.metrics.HistogramCollector`.
+                Defaults to `None`, i.e. no instrumentation.
+            retry(:class:`fdpclient.retry.RetryPolicy`, optional): the policy
+                to retry failed requests with, e.g. on 502 and 503 responses.
+                Defaults to `None`, i.e. no retries.
+            limiter(:class:`fdpclient.ratelimit.RateLimiter`, optional): the
+                limiter pacing the requests, e.g. a rate limit or an
+                :class:`fdpclient.ratelimit.AdaptiveConcurrency`. It may be
+                shared by several clients. Defaults to `None`, i.e. no limit.
+            compress(str, optional): the content coding to compress the
+                bodies of creates and updates with, e.g. 'gzip', for servers
+                accepting compressed bodies. See
+                :func:`fdpclient.compression.encodings`. Responses are
+                decoded whatever this argument. Defaults to `None`, i.e. no
+                compression.
+            compress_level(int, optional): the compression level, see
+                :func:`fdpclient.compression.compress`. Defaults to `None`.
+            format_policy(:class:`fdpclient.negotiation.FormatPolicy`, optional):
+                the policy choosing the format of reads without a format,
+                the cheapest to parse among the formats each server
+                supports. It may be shared by several clients.
+                Defaults to `None`, i.e.
+                :func:`fdpclient.parsers.preferred_format`.
+            transport(str, optional): the transport of the session the client
+                creates without a ``session``, 'http1' or 'http2', see
+                :func:`fdpclient.transport.create_transport`. Defaults to
+                `None`, i.e. 'http1'.
+
+        Examples:
+            >>> client = Client('http://fdp.fairdatapoint.nl`)
+            >>> fdp_metadata = client.read_fdp()
+            >>> catalog_metadata = client.read_catalog('catalog01')
+            >>> print(fdp_metadata, catalog_metadata)
+
+            >>> session = create_session(pool_maxsize=20, max_retries=3)
+            >>> with Client('http://fdp.fairdatapoint.nl', session) as client:
+            ...     client.read_catalog('catalog01')
+
+            >>> with Client('https://fdp.fairdatapoint.nl', transport='http2') as client:
+            ...     graphs = dict(client.read_many('catalog', ids, workers=32))
+        """
+        super().__init__(host, fdp_path=fdp_path, fdp_path_file=fdp_path_file,
+                         format_policy=format_policy)
+        self._owns_session = session is None
+        if session is None:
+            session = create_transport(transport or 'http1')
+        elif transport is not None:
+            raise ValueError('Give either a session or a transport')
+        self.session = session
+        self.cache = cache
+        self.graph_cache = graph_cache
+        self.serialization_cache = serialization_cache
+        self.hooks = list(hooks or [])
+        self.retry = retry
+        self.limiter = limiter
+        self.compress = compress
+        self.compress_level = compress_level
+
+    @property
+    def fdp_id(self):
+        """str: the internal path of fdp, i.e. 'fdp' or ''.
+
+        It is detected on first access if it was not given or detected before.
+        """
+        if self._fdp_id is None:
+            self._detect_fdp_url()
+        return self._fdp_id
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the session of the client if it was created by the client."""
+        if self._owns_session:
+            self.session.close()
+
+    # Read raw metadata
+    def read_raw(self, type, id=None, format='turtle', **kwargs):
+        """Read a metadata and return the response body unparsed.
+
+        The body is neither parsed nor cached, and rdflib is not imported,
+        see :func:`fdpclient.operations.read_raw`.
+
+        Args:
+            type(str): the type of metadata.
+                Available types: 'fdp', 'catalog', 'dataset' and 'distribution'.
+            id(str, optional): the identifier of the metadata.
+                Defaults to `None`, only valid for 'fdp'.
+            format (str, optional): the format of the metadata.
+                Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+                Defaults to 'turtle'.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Returns:
+            bytes: the response body of the metadata.
+
+        Examples:
+            >>> body = client.read_raw('catalog', 'catalog01', format='nt')
+        """
+        if type == 'fdp':
+            id = ''
+        return self._request('read_raw', type, id=id, format=format, **kwargs)
+
+    # Iterate over metadata triples
+    def iter_fdp(self, format='nt', predicates=None, **kwargs):
+        """Iterate over the triples of the fdp metadata.
+
+        The triples are parsed without building a :class:`rdflib.Graph`, and
+        N-Triples are streamed and parsed incrementally.
+
+        Args:
+            format (str, optional): the format of the metadata.
+                Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+                Defaults to 'nt'.
+            predicates(iterable, optional): only yield the triples of these
+                predicates. Defaults to `None`, i.e. all triples.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Returns:
+            generator: ``(subject, predicate, object)`` triples of the metadata.
+        """
+        return self._request('read', 'fdp', id='', format=format, result='triples',
+                             predicates=predicates, **kwargs)
+
+    def iter_catalog(self, id, format='nt', predicates=None, **kwargs):
+        """Iterate over the triples of a catalog metadata.
+
+        The triples are parsed without building a :class:`rdflib.Graph`, and
+        N-Triples are streamed and parsed incrementally.
+
+        Args:
+            id(str): the identifier of the metadata.
+            format (str, optional): the format of the metadata.
+                Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+                Defaults to 'nt'.
+            predicates(iterable, optional): only yield the triples of these
+                predicates. Defaults to `None`, i.e. all triples.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Returns:
+            generator: ``(subject, predicate, object)`` triples of the metadata.
+        """
+        return self._request('read', 'catalog', id=id, format=format, result='triples',
+                             predicates=predicates, **kwargs)
+
+    def iter_dataset(self, id, format='nt', predicates=None, **kwargs):
+        """Iterate over the triples of a dataset metadata.
+
+        The triples are parsed without building a :class:`rdflib.Graph`, and
+        N-Triples are streamed and parsed incrementally.
+
+        Args:
+            id(str): the identifier of the metadata.
+            format (str, optional): the format of the metadata.
+                Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+                Defaults to 'nt'.
+            predicates(iterable, optional): only yield the triples of these
+                predicates. Defaults to `None`, i.e. all triples.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Returns:
+            generator: ``(subject, predicate, object)`` triples of the metadata.
+        """
+        return self._request('read', 'dataset', id=id, format=format, result='triples',
+                             predicates=predicates, **kwargs)
+
+    def iter_distribution(self, id, format='nt', predicates=None, **kwargs):
+        """Iterate over the triples of a distribution metadata.
+
+        The triples are parsed without building a :class:`rdflib.Graph`, and
+        N-Triples are streamed and parsed incrementally.
+
+        Args:
+            id(str): the identifier of the metadata.
+            format (str, optional): the format of the metadata.
+                Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+                Defaults to 'nt'.
+            predicates(iterable, optional): only yield the triples of these
+                predicates. Defaults to `None`, i.e. all triples.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Returns:
+            generator: ``(subject, predicate, object)`` triples of the metadata.
+        """
+        return self._request('read', 'distribution', id=id, format=format, result='triples',
+                             predicates=predicates, **kwargs)
+
+    def iter_children(self, type, id=None, format='nt', unique=False, **kwargs):
+        """Iterate over the URLs of the child metadata of a metadata.
+
+        Only the triples linking the metadata to its children, e.g. with
+        ``ldp:contains`` or ``dcat:dataset``, are kept, and no
+        :class:`rdflib.Graph` is built. A paged response, e.g. of an LDP
+        container, is followed page by page through its
+        ``Link: rel="next"`` headers; otherwise the document is streamed.
+        With the default 'nt' format and ``unique`` off, the memory used does
+        not grow with the number of children.
+
+        Args:
+            type(str): the type of the metadata, 'fdp', 'catalog' or 'dataset'.
+            id(str, optional): the identifier of the metadata, not used for
+                'fdp'. Defaults to `None`.
+            format (str, optional): the format of the metadata.
+                Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+                Other formats than 'nt' are parsed a page at a time.
+                Defaults to 'nt'.
+            unique(bool, optional): whether to skip the children found
+                before, e.g. linked by both ``ldp:contains`` and
+                ``dcat:dataset``. The URLs of all the children are then kept
+                in memory. Defaults to `False`.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Raises:
+            ValueError: the type has no child metadata or the id is missing.
+
+        Returns:
+            generator: the URLs of the child metadata.
+
+        Examples:
+            >>> for url in client.iter_children('catalog', 'catalog01'):
+            ...     dataset_id = url.rsplit('/', 1)[-1]
+        """
+        from fdpclient.harvest import CHILD_PREDICATES, iter_child_links
+        if not CHILD_PREDICATES.get(type):
+            raise ValueError(f'Invalid container type: {type}')
+        if type == 'fdp':
+            id = ''
+        triples = self._request('read', type, id=id, format=format, result='triples',
+                                predicates=CHILD_PREDICATES[type], pages=True,
+                                **kwargs)
+        return iter_child_links(triples, unique=unique)
+
+    # Synchronize metadata
+    def sync_fdp(self, data, format='turtle', **kwargs):
+        """Update fdp metadata only if it differs from the server copy.
+
+        See :meth:`sync_catalog`.
+
+        Args:
+            data(str, bytes, file-like object or :class:`rdflib.Graph`):
+                the content of metadata.
+            format (str, optional): the format of the metadata.
+                Defaults to 'turtle'.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Returns:
+            :class:`fdpclient.diff.GraphDiff`: the added and removed triples.
+        """
+        return self._sync('fdp', '', data, format, **kwargs)
+
+    def sync_catalog(self, id, data, format='turtle', **kwargs):
+        """Update catalog metadata only if it differs from the server copy.
+
+        The current metadata is read from the server, bypassing the graph
+        cache of the client, and compared with ``data`` by
+        :func:`fdpclient.diff.diff_graphs`. An HTTP cache still revalidates
+        the read, so unchanged metadata costs a 304 response. The metadata is
+        sent only if the graphs are not isomorphic. The optional arguments of
+        reads only, e.g. ``cache``, and of updates only, e.g. ``compress``,
+        are only passed to their request.
+
+        Args:
+            id(str): the identifier of the metadata.
+            data(str, bytes, file-like object or :class:`rdflib.Graph`):
+                the content of metadata.
+            format (str, optional): the format of the metadata.
+                Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+                Defaults to 'turtle'.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Returns:
+            :class:`fdpclient.diff.GraphDiff`: the added and removed triples,
+            none if the update was skipped.
+
+        Raises:
+            TypeError: if ``result``, ``predicates`` or ``pages`` is given, as
+                the server copy must be read as a graph.
+
+        Examples:
+            >>> diff = client.sync_catalog('catalog01', graph)
+            >>> if diff.changed:
+            ...     print(f'+{diff.added} -{diff.removed}')
+        """
+        return self._sync('catalog', id, data, format, **kwargs)
+
+    def sync_dataset(self, id, data, format='turtle', **kwargs):
+        """Update dataset metadata only if it differs from the server copy.
+
+        See :meth:`sync_catalog`.
+
+        Args:
+            id(str): the identifier of the metadata.
+            data(str, bytes, file-like object or :class:`rdflib.Graph`):
+                the content of metadata.
+            format (str, optional): the format of the metadata.
+                Defaults to 'turtle'.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Returns:
+            :class:`fdpclient.diff.GraphDiff`: the added and removed triples.
+        """
+        return self._sync('dataset', id, data, format, **kwargs)
+
+    def sync_distribution(self, id, data, format='turtle', **kwargs):
+        """Update distribution metadata only if it differs from the server copy.
+
+        See :meth:`sync_catalog`.
+
+        Args:
+            id(str): the identifier of the metadata.
+            data(str, bytes, file-like object or :class:`rdflib.Graph`):
+                the content of metadata.
+            format (str, optional): the format of the metadata.
+                Defaults to 'turtle'.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Returns:
+            :class:`fdpclient.diff.GraphDiff`: the added and removed triples.
+        """
+        return self._sync('distribution', id, data, format, **kwargs)
+
+    def _sync(self, type, id, data, format, **kwargs):
+        """Read the metadata, diff it with data and update it if it changed"""
+        import rdflib
+        from fdpclient.diff import diff_graphs
+        invalid = sorted(set(kwargs).intersection(_RESULT_ARGS))
+        if invalid:
+            raise TypeError(f'Invalid arguments of a sync: {", ".join(invalid)}')
+        if hasattr(data, 'read'):
+            data = data.read()
+        new = data if isinstance(data, rdflib.Graph) else operations._parse(data, format)
+        # the server copy is not taken from the graph cache, as a stale cached
+        # copy equal to data would skip a needed update
+        read_kwargs = {k: v for k, v in kwargs.items() if k not in _WRITE_ARGS}
+        old = self._request('read', type, id=id, format=format, cached=False,
+                            **read_kwargs)
+        diff = diff_graphs(old, new)
+        if not diff.changed:
+            logger.debug(f'Skip update of {type} {id}: metadata unchanged')
+            return diff
+        write_kwargs = {k: v for k, v in kwargs.items() if k not in _READ_ARGS}
+        self._request('update', type, id=id, data=data, format=format, **write_kwargs)
+        return diff
+
+    # Batch operations
+    def read_many(self, type, ids, workers=4, ordered=False, format=None, **kwargs):
+        """Read many metadata of a type concurrently.
+
+        The metadata are read on a pool of ``workers`` threads, sharing the
+        pooled session of the client. To keep one connection per worker alive,
+        create the session with ``pool_maxsize`` of at least ``workers``.
+
+        A failed read does not stop the batch: its exception is yielded as the
+        result of the identifier.
+
+        Args:
+            type(str): the type of metadata.
+                Available types: 'catalog', 'dataset' and 'distribution'.
+            ids(iterable of str): the identifiers of the metadata.
+            workers(int, optional): the number of worker threads.
+                Defaults to 4.
+            ordered(bool, optional): whether to yield the results in the
+                order of ``ids``. Defaults to `False`, i.e. in completion
+                order.
+            format (str, optional): the format of the metadata.
+                Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+                Defaults to `None`, i.e.
+                :func:`fdpclient.parsers.preferred_format`, 'nt' with the
+                built-in fast N-Triples parser.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Yields:
+            tuple: ``(id, result)`` pairs, where result is the
+            :class:`rdflib.Graph` of the metadata or the exception raised when
+            reading it.
+
+        Examples:
+            >>> for id, r in client.read_many('dataset', ids, workers=8):
+            ...     if isinstance(r, Exception):
+            ...         print(f'Failed to read {id}: {r}')
+        """
+        if type not in ('catalog', 'dataset', 'distribution'):
+            raise ValueError(f'Invalid metadata type: {type}')
+
+        def read(id):
+            return self._request('read', type, id=id, format=format, **kwargs)
+
+        return imap(read, ids, workers=workers, ordered=ordered)
+
+    def create_many(self, type, items, format='turtle', workers=4, processes=None,
+                    max_in_flight=None, ordered=False, **kwargs):
+        """Create many metadata of a type concurrently.
+
+        Graphs are serialized on a process pool while serialized items are
+        uploaded on a thread pool, see :func:`fdpclient.bulk.create_many`.
+
+        Args:
+            type(str): the type of metadata.
+                Available types: 'catalog', 'dataset' and 'distribution'.
+            items(iterable): the metadata, each a :class:`rdflib.Graph`, str,
+                bytes, file-like object or :class:`os.PathLike` path of a file.
+            format (str, optional): the format of the metadata.
+                Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+                Defaults to 'turtle'.
+            workers(int, optional): the number of concurrent uploads.
+                Defaults to 4.
+            processes(int, optional): the number of serialization processes,
+                0 to serialize in the upload threads. Defaults to `None`, i.e.
+                the number of CPUs.
+            max_in_flight(int, optional): the maximum number of items in
+                progress. Defaults to `None`, i.e. ``2 * workers``.
+            ordered(bool, optional): whether to yield the results in the
+                order of the items. Defaults to `False`.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Yields:
+            :class:`fdpclient.bulk.BulkResult`: the result of each item.
+        """
+        from fdpclient.bulk import create_many
+        return create_many(self, type, items, format=format, workers=workers,
+                           processes=processes, max_in_flight=max_in_flight,
+                           ordered=ordered, **kwargs)
+
+    def update_many(self, type, items, format='turtle', workers=4, processes=None,
+                    max_in_flight=None, ordered=False, **kwargs):
+        """Update many metadata of a type concurrently.
+
+        See :meth:`create_many` and :func:`fdpclient.bulk.update_many`.
+
+        Args:
+            type(str): the type of metadata.
+                Available types: 'catalog', 'dataset' and 'distribution'.
+            items(iterable of tuple): ``(id, data)`` pairs of the identifier
+                and the metadata.
+            format (str, optional): the format of the metadata.
+                Defaults to 'turtle'.
+            workers(int, optional): the number of concurrent uploads.
+                Defaults to 4.
+            processes(int, optional): the number of serialization processes,
+                0 to serialize in the upload threads. Defaults to `None`, i.e.
+                the number of CPUs.
+            max_in_flight(int, optional): the maximum number of items in
+                progress. Defaults to `None`, i.e. ``2 * workers``.
+            ordered(bool, optional): whether to yield the results in the
+                order of the items. Defaults to `False`.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Yields:
+            :class:`fdpclient.bulk.BulkResult`: the result of each item.
+        """
+        from fdpclient.bulk import update_many
+        return update_many(self, type, items, format=format, workers=workers,
+                           processes=processes, max_in_flight=max_in_flight,
+                           ordered=ordered, **kwargs)
+
+    def harvest(self, types=None, max_depth=None, workers=4, format=None, **kwargs):
+        """Harvest all metadata of the server, starting from the fdp metadata.
+
+        See :func:`fdpclient.harvest.harvest`.
+
+        Args:
+            types(iterable of str, optional): the types of metadata to yield.
+                Defaults to `None`, i.e. all types.
+            max_depth(int, optional): the maximum number of links to follow
+                from the fdp metadata. Defaults to `None`, i.e. no limit.
+            workers(int, optional): the number of concurrent reads.
+                Defaults to 4.
+            format (str, optional): the format of the metadata.
+                Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+                Defaults to `None`, i.e.
+                :func:`fdpclient.parsers.preferred_format`, 'nt' with the
+                built-in fast N-Triples parser.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Yields:
+            tuple: ``(url, type, result)``, where result is the
+            :class:`rdflib.Graph` of the metadata or the exception raised when
+            reading it.
+        """
+        from fdpclient.harvest import harvest
+        return harvest(self, types=types, max_depth=max_depth, workers=workers,
+                       format=format, **kwargs)
+
+    def export(self, path, quads=True, types=None, max_depth=None, workers=4,
+               format=None, **kwargs):
+        """Harvest all metadata of the server into an N-Quads file.
+
+        See :func:`fdpclient.export.export`.
+
+        Args:
+            path(str): the path of the file, appended to if it exists.
+            quads(bool, optional): whether to write N-Quads, with one named
+                graph per metadata URL, or N-Triples. Defaults to `True`.
+            types(iterable of str, optional): the types of metadata to export.
+                Defaults to `None`, i.e. all types.
+            max_depth(int, optional): the maximum number of links to follow
+                from the fdp metadata. Defaults to `None`, i.e. no limit.
+            workers(int, optional): the number of concurrent reads.
+                Defaults to 4.
+            format (str, optional): the format to read the metadata in.
+                Defaults to `None`, i.e.
+                :func:`fdpclient.parsers.preferred_format`.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Returns:
+            dict: the number of 'graphs' and 'triples' written and of
+            'failed' reads.
+        """
+        from fdpclient.export import export
+        return export(self, path, quads=quads, types=types, max_depth=max_depth,
+                      workers=workers, format=format, **kwargs)
+
     def _detect_fdp_url(self):
         """Detect the internal path of fdp
 
@@ -256,15 +930,16 @@ class Client:
         Returns:
             str: the internal path of fdp, i.e. 'fdp' or ''.
         """
-        fmt = 'text/turtle'
-
-        r = requests.get(self.host + '/fdp', params={'Accept':fmt})
-        if r.status_code == 200 and r.headers['content-type'] == fmt:
-            return 'fdp'
+        path = self._known_fdp_path()
+        if path is not None:
+            self._fdp_id = path
+            return path
 
-        r = requests.get(self.host, params={'Accept':fmt})
-        if r.status_code == 200 and r.headers['content-type'] == fmt:
-            return ''
+        for url, path in self._fdp_candidates():
+            r = self.session.get(url, headers={'Accept': _FDP_FORMAT})
+            if self._is_fdp_response(r.status_code, r.headers):
+                self._remember_fdp_path(path)
+                return path
 
         raise RuntimeError('Failed to detect the fdp url. Check if the server '
                         + 'uses "<host>" or "<host>/fdp" as the fdp url.')
@@ -274,8 +949,8 @@ class Client:
 
         Args:
             operation(str): the request operation.
-                Available options: 'read', 'write', 'update' and 'delete'.
-                See :class:`fdpclient.operations`.
+                Available options: 'create', 'read', 'read_raw', 'update'
+                and 'delete'. See :class:`fdpclient.operations`.
             type(str): the type of metadata.
                 Available types: 'fdp', 'catalog', 'dataset' and 'distribution'.
             id(str): the identifier of the metadata.
@@ -294,28 +969,101 @@ class Client:
         Returns:
             `None` or :class:`rdflib.Graph`: RDF graph of the requested metadata.
         """
+        path = self.fdp_id if type == 'fdp' else type
+        url = self._prepare_url(operation, path, id=id, data=data)
+        return self._send(operation, type, url, data=data, format=format, **kwargs)
 
-        request_methods = ('create', 'read', 'update', 'delete')
-
-        if operation not in request_methods:
-            raise ValueError(f'Invalid request method: {operation}')
+    def _send(self, operation, type, url, data=None, format='turtle', cached=True,
+              **kwargs):
+        """Send a request to a metadata URL with the session of the client.
 
-        if operation in ('read', 'delete', 'update') and id is None:
-            raise ValueError(f'Metadata "id" must be given for request method {operation}')
+        Args:
+            operation(str): the request operation.
+                Available options: 'create', 'read', 'update' and 'delete'.
+            type(str): the type of metadata.
+                Available types: 'fdp', 'catalog', 'dataset' and 'distribution'.
+            url(str): the URL of the metadata.
+            data(str, bytes, file-like object or :class:`rdflib.Graph`):
+                the content of metadata to send in the request body.
+                Defaults to `None`.
+            format (str, optional): the format of the metadata.
+                Defaults to 'turtle'.
+            cached(bool, optional): whether a read may be answered from the
+                graph cache of the client. The HTTP cache always revalidates
+                and is used anyway. Defaults to `True`.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
 
-        if operation in ('create', 'update') and data is None:
-            raise ValueError(f'Metadata "data" must be given for request method {operation}')
+        Returns:
+            `None` or :class:`rdflib.Graph`: RDF graph of the requested metadata.
+        """
+        format = self._resolve_format(operation, url, format)
+        if not self.hooks:
+            return self._dispatch(operation, url, data, format, None, cached, kwargs)
+        event = RequestEvent(operation, type, url)
+        start = time.perf_counter()
+        try:
+            return self._dispatch(operation, url, data, format, event, cached, kwargs)
+        except Exception as error:
+            event.error = error
+            raise
+        finally:
+            event.elapsed = time.perf_counter() - start
+            emit(self.hooks, event)
 
-        if id is not None:
-            url = '/'.join([self.host, type, id])
-        else:
-            url = '/'.join([self.host, type])
-        url = url.rstrip('/')
+    def _dispatch(self, operation, url, data, format, event, cached, kwargs):
+        """Send a request through the caches of the client"""
+        use_graph_cache = (operation == 'read' and self.graph_cache is not None
+                           and kwargs.get('result', 'graph') == 'graph')
+        if use_graph_cache and cached:
+            g = self.graph_cache.get(url, format)
+            if g is not None:
+                if event is not None:
+                    event.cached = True
+                return g
 
         logger.debug(f'Request: {operation} metadata on {url}')
         request = getattr(operations, operation)
+        kwargs.setdefault('session', self.session)
+        if operation == 'read' and self.cache is not None:
+            kwargs.setdefault('cache', self.cache)
+        if operation == 'read' and self.format_policy is not None:
+            kwargs.setdefault('policy', self.format_policy)
+        if operation in ('create', 'update') and self.serialization_cache is not None:
+            kwargs.setdefault('serialization_cache', self.serialization_cache)
+        if operation in ('create', 'update') and self.compress is not None:
+            kwargs.setdefault('compress', self.compress)
+            kwargs.setdefault('compress_level', self.compress_level)
+        if self.retry is not None:
+            kwargs.setdefault('retry', self.retry)
+        if self.limiter is not None:
+            kwargs.setdefault('limiter', self.limiter)
+        if event is not None:
+            kwargs['event'] = event
         if operation == 'delete':
             r = request(url=url, data=data, **kwargs)
         else:
             r = request(url=url, data=data, format=format, **kwargs)
-        return r
\ No newline at end of file
+
+        if use_graph_cache:
+            from fdpclient.cache import copy_graph
+            self.graph_cache.put(url, format, copy_graph(r))
+        elif operation in ('update', 'delete') and self.graph_cache is not None:
+            self.graph_cache.invalidate(url)
+        return r
+
+
+def _load_fdp_paths(file):
+    """Load the persisted fdp paths, ignoring a missing or invalid file"""
+    try:
+        with open(file, encoding='utf-8') as f:
+            paths = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return paths if isinstance(paths, dict) else {}
+
+def _save_fdp_paths(file, paths):
+    """Persist the fdp paths, replacing the file"""
+    tmp = f'{file}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(paths, f)
+    os.replace(tmp, file)
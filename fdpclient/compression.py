@@ -0,0 +1,99 @@
+import gzip
+import logging
+import zlib
+from urllib3.util.request import ACCEPT_ENCODING
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+#: The content codings the responses can be decoded from, advertised in the
+#: ``Accept-Encoding`` header of reads. 'br' and 'zstd' need the optional
+#: ``brotli`` and ``zstandard`` packages.
+ACCEPT_ENCODING = ACCEPT_ENCODING.replace(',', ', ')
+
+def encodings():
+    """Return the content codings request bodies can be compressed with.
+
+    Returns:
+        list of str: the codings, 'gzip' and 'deflate', and 'br' and 'zstd'
+        if the optional ``brotli`` and ``zstandard`` packages are installed.
+    """
+    available = ['gzip', 'deflate']
+    if brotli is not None:
+        available.append('br')
+    if zstandard is not None:
+        available.append('zstd')
+    return available
+
+def compress(data, encoding, level=None):
+    """Compress a request body.
+
+    Args:
+        data(str, bytes or file-like object): the body. A str is encoded in
+            UTF-8 and a file-like object is read from its current position.
+        encoding(str): the content coding, one of :func:`encodings`.
+        level(int, optional): the compression level of the coding, 1 to 9
+            for 'gzip' and 'deflate', 0 to 11 for 'br' and 1 to 22 for
+            'zstd'. Defaults to `None`, i.e. 6 for 'gzip' and 'deflate', 11
+            for 'br' and 3 for 'zstd'.
+
+    Raises:
+        ValueError: the coding is unknown or its package is not installed.
+
+    Returns:
+        bytes: the compressed body.
+    """
+    if encoding not in encodings():
+        raise ValueError(f'Unsupported content encoding: {encoding}')
+    if hasattr(data, 'read'):
+        data = data.read()
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=6 if level is None else level)
+    if encoding == 'deflate':
+        return zlib.compress(data, 6 if level is None else level)
+    if encoding == 'br':
+        return brotli.compress(data) if level is None else brotli.compress(data, quality=level)
+    return zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+
+
+class CountingReader:
+    """Count the bytes read from a binary file-like object.
+
+    Args:
+        stream(file-like object): the stream, e.g. the decoded ``raw`` stream
+            of a response.
+
+    Attributes:
+        count(int): the number of bytes read.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.count += len(data)
+        return data
+
+    def readline(self, size=-1):
+        data = self.stream.readline(size)
+        self.count += len(data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
@@ -0,0 +1,60 @@
+import logging
+from rdflib import BNode
+from rdflib.compare import graph_diff, to_isomorphic
+from fdpclient.hashing import graph_hash
+
+logger = logging.getLogger(__name__)
+
+class GraphDiff:
+    """The difference between two versions of a metadata graph.
+
+    Attributes:
+        added(int): the number of triples only in the new graph.
+        removed(int): the number of triples only in the old graph.
+    """
+
+    def __init__(self, added=0, removed=0):
+        self.added = added
+        self.removed = removed
+
+    @property
+    def changed(self):
+        """bool: whether the graphs are not isomorphic."""
+        return bool(self.added or self.removed)
+
+    def __eq__(self, other):
+        if not isinstance(other, GraphDiff):
+            return NotImplemented
+        return (self.added, self.removed) == (other.added, other.removed)
+
+    def __repr__(self):
+        return f'GraphDiff(added={self.added}, removed={self.removed})'
+
+
+def diff_graphs(old, new):
+    """Compare two graphs and count the added and removed triples.
+
+    The graphs are compared by their :func:`fdpclient.hashing.graph_hash`
+    first, so isomorphic graphs are detected in linear time without pairing
+    their triples. Only graphs with different hashes are diffed: by set
+    difference if they have no blank nodes, otherwise on their canonical
+    forms.
+
+    Args:
+        old(:class:`rdflib.Graph`): the current graph.
+        new(:class:`rdflib.Graph`): the new graph.
+
+    Returns:
+        :class:`GraphDiff`: the difference from ``old`` to ``new``.
+    """
+    if graph_hash(old) == graph_hash(new):
+        return GraphDiff()
+    if _has_bnodes(old) or _has_bnodes(new):
+        _, removed, added = graph_diff(to_isomorphic(old), to_isomorphic(new))
+        return GraphDiff(len(added), len(removed))
+    old_triples = set(old)
+    new_triples = set(new)
+    return GraphDiff(len(new_triples - old_triples), len(old_triples - new_triples))
+
+def _has_bnodes(graph):
+    return any(isinstance(term, BNode) for triple in graph for term in triple)
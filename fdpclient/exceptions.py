@@ -0,0 +1,60 @@
+#: HTTP statuses of a transient server condition, worth a retry
+RETRYABLE_STATUSES = frozenset((408, 429, 502, 503, 504))
+
+
+class FDPError(RuntimeError):
+    """Base class of the errors of fdpclient requests."""
+
+
+class HTTPError(FDPError):
+    """A metadata request answered with an HTTP error status.
+
+    Attributes:
+        status(int): the HTTP status code.
+        reason(str): the HTTP reason phrase.
+        url(str): the URL of the metadata.
+        text(str): the response message.
+        elapsed(float): the response time in seconds of the last attempt.
+        attempts(int): the number of attempts, i.e. 1 plus the retries.
+        retry_after(float): the delay in seconds asked by the ``Retry-After``
+            header of the response, `None` if it has none.
+    """
+
+    def __init__(self, status, reason, url, text='', elapsed=None, attempts=1,
+                 retry_after=None):
+        super().__init__(f'HTTP error: {status} {reason} for {url}')
+        self.status = status
+        self.reason = reason
+        self.url = url
+        self.text = text
+        self.elapsed = elapsed
+        self.attempts = attempts
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self):
+        """bool: whether the status is one of a transient server condition,
+        i.e. one of :const:`RETRYABLE_STATUSES`."""
+        return self.status in RETRYABLE_STATUSES
+
+
+class TransportError(FDPError, ConnectionError):
+    """A metadata request failed without a response, e.g. the connection
+    was refused or timed out.
+
+    The exception of the HTTP library is the ``__cause__`` of the error. It is
+    also a :class:`ConnectionError`, as raised before by fdpclient.
+
+    Attributes:
+        url(str): the URL of the metadata.
+        error(Exception): the exception of the HTTP library.
+        elapsed(float): the time in seconds until the last attempt failed.
+        attempts(int): the number of attempts, i.e. 1 plus the retries.
+    """
+
+    def __init__(self, url, error, elapsed=None, attempts=1):
+        super().__init__(f'Transport error: {error!r} for {url}')
+        self.url = url
+        self.error = error
+        self.elapsed = elapsed
+        self.attempts = attempts
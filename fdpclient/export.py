@@ -0,0 +1,225 @@
+import logging
+import mmap
+import os
+import threading
+from rdflib import URIRef
+from fdpclient.harvest import CHILD_PREDICATES, _levels, _traverse, iter_child_links
+from fdpclient.ntriples import CACHE_SIZE, _LineParser, format_line, format_term
+
+logger = logging.getLogger(__name__)
+
+class QuadWriter:
+    """Append triples to an N-Quads or N-Triples file.
+
+    Each triple is written as one line as soon as it is given, so exporting
+    never holds more than the graph being written in memory. With
+    ``quads=True`` each triple is written in the named graph of its metadata
+    URL, otherwise the graphs are merged into one N-Triples file.
+
+    The file is opened in append mode, so several exports may be appended to
+    the same file. A writer is thread-safe.
+
+    Args:
+        path(str): the path of the file.
+        quads(bool, optional): whether to write N-Quads. Defaults to `True`.
+
+    Attributes:
+        count(int): the number of triples written by the writer.
+    """
+
+    def __init__(self, path, quads=True):
+        self.path = os.path.expanduser(path)
+        self.quads = quads
+        self.count = 0
+        self._file = open(self.path, 'ab')
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, triples, graph=None):
+        """Append triples.
+
+        Args:
+            triples(iterable): ``(subject, predicate, object)`` triples, e.g.
+                a :class:`rdflib.Graph` or the result of
+                :meth:`fdpclient.client.Client.iter_catalog`.
+            graph(str, optional): the name of the graph of the triples, e.g.
+                the metadata URL. Defaults to `None`, i.e. the default graph.
+
+        Returns:
+            int: the number of triples written.
+        """
+        context = None if graph is None or not self.quads else URIRef(graph)
+        count = 0
+        with self._lock:
+            for triple in triples:
+                self._file.write(format_line(triple, context).encode('utf-8'))
+                count += 1
+            self.count += count
+        return count
+
+    def flush(self):
+        """Flush the written lines to the file."""
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        """Close the file."""
+        self._file.close()
+
+
+class QuadReader:
+    """Read an N-Quads or N-Triples file by memory-mapping it.
+
+    The file is not loaded: the lines are read from the mapped pages and
+    parsed one at a time by :mod:`fdpclient.ntriples`, and only the lines
+    that may match a filter are parsed at all.
+
+    Args:
+        path(str): the path of the file.
+
+    Examples:
+        >>> with QuadReader('fdp.nq') as reader:
+        ...     for s, p, o, g in reader.quads(predicate=DCTERMS.title):
+        ...         print(g, o)
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self._file = open(self.path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Unmap and close the file."""
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __iter__(self):
+        return self.quads()
+
+    def quads(self, subject=None, predicate=None, object=None, graph=None):
+        """Iterate over the quads matching a pattern.
+
+        Args:
+            subject(optional): the subject to match. Defaults to `None`,
+                i.e. any subject.
+            predicate(optional): the predicate to match. Defaults to `None`.
+            object(optional): the object to match. Defaults to `None`.
+            graph(str, optional): the graph name to match. Defaults to `None`.
+
+        Yields:
+            tuple: ``(subject, predicate, object, graph)`` quads of rdflib
+            terms, where graph is `None` for the default graph.
+        """
+        if graph is not None:
+            graph = URIRef(graph)
+        pattern = (subject, predicate, object, graph)
+        # URIs are written as they are, so their N-Triples form prefilters
+        # the lines
+        needles = [format_term(term).encode('utf-8') for term in pattern
+                   if isinstance(term, URIRef)]
+        parser = _LineParser(max_terms=CACHE_SIZE)
+        for line in self._lines():
+            if all(needle in line for needle in needles):
+                for quad in parser.parse([line.decode('utf-8')], quads=True):
+                    if all(term is None or term == value
+                           for term, value in zip(pattern, quad)):
+                        yield quad
+
+    def triples(self, subject=None, predicate=None, object=None, graph=None):
+        """Iterate over the triples matching a pattern.
+
+        See :meth:`quads`.
+
+        Yields:
+            tuple: ``(subject, predicate, object)`` triples of rdflib terms.
+        """
+        for s, p, o, _ in self.quads(subject, predicate, object, graph):
+            yield s, p, o
+
+    def graphs(self):
+        """Iterate over the graph names, in the order they first appear.
+
+        Yields:
+            :class:`rdflib.URIRef`: the graph names.
+        """
+        seen = set()
+        for _, _, _, g in self.quads():
+            if g is not None and g not in seen:
+                seen.add(g)
+                yield g
+
+    def _lines(self):
+        if self._map is None:
+            return
+        self._map.seek(0)
+        yield from iter(self._map.readline, b'')
+
+
+def export(client, path, quads=True, types=None, max_depth=None, workers=4,
+           format=None, **kwargs):
+    """Harvest a FAIR Data Point into an N-Quads or N-Triples file.
+
+    The metadata are traversed as by :func:`fdpclient.harvest.harvest`, but
+    read as triples, without building a :class:`rdflib.Graph`, see
+    :func:`fdpclient.operations.read`. The triples of each metadata are
+    appended to the file once its read completes, in the named graph of its
+    URL, so the memory used does not grow with the size of the server and a
+    failed read writes nothing.
+
+    Args:
+        client(:class:`fdpclient.client.Client`): the client to read with.
+        path(str): the path of the file, appended to if it exists.
+        quads(bool, optional): whether to write N-Quads. Defaults to `True`.
+        types(iterable of str, optional): the types of metadata to export.
+            Defaults to `None`, i.e. all types.
+        max_depth(int, optional): the maximum number of links to follow from
+            the fdp metadata. Defaults to `None`, i.e. no limit.
+        workers(int, optional): the number of concurrent reads.
+            Defaults to 4.
+        format (str, optional): the format to read the metadata in.
+            Defaults to `None`, i.e. :func:`fdpclient.parsers.preferred_format`.
+        **kwargs: Optional arguments that :func:`requests.request` takes.
+
+    Raises:
+        ValueError: empty or invalid types, or invalid number of workers.
+
+    Returns:
+        dict: the number of 'graphs' and 'triples' written and of 'failed'
+        reads.
+    """
+    stats = {'graphs': 0, 'triples': 0, 'failed': 0}
+    types, last = _levels('fdp', types, max_depth, workers)
+    url = client._prepare_url('read', client.fdp_id, id='')
+
+    def read(url, type):
+        return list(client._send('read', type, url, format=format, result='triples',
+                                 **dict(kwargs)))
+
+    results = _traverse(read, url.rstrip('/'), 'fdp', types, last, workers, _child_links)
+    with QuadWriter(path, quads=quads) as writer:
+        for url, type, triples in results:
+            if isinstance(triples, Exception):
+                logger.warning(f'Failed to export {url}: {triples}')
+                stats['failed'] += 1
+                continue
+            stats['triples'] += writer.write(triples, graph=url)
+            stats['graphs'] += 1
+    return stats
+
+def _child_links(triples, type):
+    """Return the URLs of the child metadata linked from a list of triples"""
+    predicates = CHILD_PREDICATES[type]
+    return list(iter_child_links((t for t in triples if t[1] in predicates), unique=True))
@@ -0,0 +1,180 @@
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from rdflib import Namespace, URIRef
+from rdflib.namespace import DCAT
+
+logger = logging.getLogger(__name__)
+
+LDP = Namespace('http://www.w3.org/ns/ldp#')
+R3D = Namespace('http://www.re3data.org/schema/3-0#')
+FDP = Namespace('http://rdf.biosemantics.org/ontologies/fdp-o#')
+
+#: Metadata types in the order of the FAIR Data Point hierarchy
+METADATA_TYPES = ('fdp', 'catalog', 'dataset', 'distribution')
+
+#: Predicates linking a metadata to its child metadata, per metadata type
+CHILD_PREDICATES = {
+    'fdp': (LDP.contains, R3D.dataCatalog, FDP.metadataCatalog),
+    'catalog': (LDP.contains, DCAT.dataset),
+    'dataset': (LDP.contains, DCAT.distribution),
+    'distribution': (),
+    }
+
+def child_links(graph, type):
+    """Find the URLs of child metadata linked from a metadata graph.
+
+    Args:
+        graph(:class:`rdflib.Graph`): RDF graph of the metadata.
+        type(str): the type of the metadata.
+            Available types: 'fdp', 'catalog', 'dataset' and 'distribution'.
+
+    Returns:
+        list of str: the child URLs in the order they were found, without
+        duplicates.
+    """
+    links = {}
+    for predicate in CHILD_PREDICATES[type]:
+        for o in graph.objects(None, predicate):
+            if isinstance(o, URIRef):
+                links.setdefault(str(o).rstrip('/'), None)
+    return list(links)
+
+def iter_child_links(triples, unique=False):
+    """Find the URLs of child metadata in a stream of membership triples.
+
+    Args:
+        triples(iterable of tuple): the ``(subject, predicate, object)``
+            triples linking a metadata to its children, see
+            :const:`CHILD_PREDICATES`.
+        unique(bool, optional): whether to skip the URLs yielded before, e.g.
+            of children linked by several predicates. The yielded URLs are
+            then kept in memory. Defaults to `False`.
+
+    Yields:
+        str: the child URLs in the order they are found.
+    """
+    seen = set() if unique else None
+    for _, _, o in triples:
+        if not isinstance(o, URIRef):
+            continue
+        link = str(o).rstrip('/')
+        if seen is not None:
+            if link in seen:
+                continue
+            seen.add(link)
+        yield link
+
+def harvest(client, url=None, type='fdp', types=None, max_depth=None,
+            workers=4, format=None, **kwargs):
+    """Harvest the metadata of a FAIR Data Point recursively.
+
+    Starting from the fdp metadata (or the given metadata URL), the harvester
+    follows the links from fdp to catalogs, datasets and distributions
+    breadth-first, reading at most ``workers`` metadata at a time. Each URL
+    is read only once. The graphs are yielded as they arrive, so the
+    harvested metadata never have to fit in memory together.
+
+    A failed read does not stop the harvest: its exception is yielded in
+    place of the graph, and its children are not visited.
+
+    Args:
+        client(:class:`fdpclient.client.Client`): the client to read with.
+        url(str, optional): the metadata URL to start from.
+            Defaults to `None`, i.e. the fdp url of the client.
+        type(str, optional): the type of the metadata at ``url``.
+            Defaults to 'fdp'.
+        types(iterable of str, optional): the types of metadata to yield.
+            Metadata deeper than the deepest of these types are not read.
+            Defaults to `None`, i.e. all types.
+        max_depth(int, optional): the maximum number of links to follow from
+            the start metadata. Defaults to `None`, i.e. no limit.
+        workers(int, optional): the number of concurrent reads.
+            Defaults to 4.
+        format (str, optional): the format of the metadata.
+            Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+            Defaults to `None`, i.e. :func:`fdpclient.parsers.preferred_format`.
+        **kwargs: Optional arguments that :func:`requests.request` takes.
+
+    Raises:
+        ValueError: invalid type, empty or invalid types, or invalid number
+            of workers.
+
+    Yields:
+        tuple: ``(url, type, result)``, where result is the
+        :class:`rdflib.Graph` of the metadata or the exception raised when
+        reading it.
+
+    Examples:
+        >>> for url, type, g in harvest(client, types=['dataset']):
+        ...     print(url, len(g))
+    """
+    types, last = _levels(type, types, max_depth, workers)
+    if url is None:
+        url = client._prepare_url('read', client.fdp_id, id='')
+
+    def read(url, type):
+        return client._send('read', type, url, format=format, **dict(kwargs))
+
+    return _traverse(read, url.rstrip('/'), type, types, last, workers)
+
+def _levels(type, types, max_depth, workers):
+    """Validate the traversal arguments and return the types to yield and
+    the index of the deepest type to read"""
+    if type not in METADATA_TYPES:
+        raise ValueError(f'Invalid metadata type: {type}')
+    if types is not None:
+        types = set(types)
+        if not types:
+            raise ValueError('No metadata types to harvest')
+        invalid = types.difference(METADATA_TYPES)
+        if invalid:
+            raise ValueError(f'Invalid metadata types: {sorted(invalid)}')
+    if workers < 1:
+        raise ValueError(f'Invalid number of workers: {workers}')
+
+    start = METADATA_TYPES.index(type)
+    last = len(METADATA_TYPES) - 1
+    if types:
+        last = max(METADATA_TYPES.index(t) for t in types)
+    if max_depth is not None:
+        last = min(last, start + max_depth)
+    return types, last
+
+def _traverse(read, url, type, types, last, workers, links=child_links):
+    """Read the metadata breadth-first and yield the results, finding the
+    child URLs of a result with links"""
+    seen = {url}
+    queue = deque([(url, type)])
+    pending = {}
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        while queue or pending:
+            while queue and len(pending) < workers:
+                url, type = queue.popleft()
+                pending[executor.submit(read, url, type)] = (url, type)
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, type = pending.pop(future)
+                try:
+                    g = future.result()
+                except Exception as error:
+                    logger.debug(f'Failed to harvest {url}: {error}')
+                    yield url, type, error
+                    continue
+
+                level = METADATA_TYPES.index(type)
+                if level < last:
+                    child_type = METADATA_TYPES[level + 1]
+                    for link in links(g, type):
+                        if link not in seen:
+                            seen.add(link)
+                            queue.append((link, child_type))
+
+                if types is None or type in types:
+                    yield url, type, g
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
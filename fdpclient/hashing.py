@@ -0,0 +1,33 @@
+import hashlib
+import logging
+from rdflib import BNode
+from rdflib.compare import to_isomorphic
+
+logger = logging.getLogger(__name__)
+
+def graph_hash(graph):
+    """Compute a content hash of a graph that is stable under isomorphism.
+
+    Graphs that differ only in the order of their triples, or in the labels
+    of their blank nodes, have the same hash. A graph without blank nodes is
+    hashed as the sum of the SHA-256 hashes of its triples, which needs no
+    sorting; a graph with blank nodes is hashed with the canonical labelling
+    of :func:`rdflib.compare.to_isomorphic`.
+
+    Args:
+        graph(:class:`rdflib.Graph`): the graph to hash.
+
+    Returns:
+        str: the hexadecimal hash.
+    """
+    total = 0
+    for triple in graph:
+        if any(isinstance(term, BNode) for term in triple):
+            digest = to_isomorphic(graph).graph_digest()
+            return 'c' + format(digest, 'x')
+        total += int.from_bytes(_triple_digest(triple), 'big')
+    return 't' + format(total % (1 << 256), '064x')
+
+def _triple_digest(triple):
+    s, p, o = triple
+    return hashlib.sha256(f'{s.n3()} {p.n3()} {o.n3()}'.encode('utf-8')).digest()
@@ -0,0 +1,286 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+#: Upper bounds in seconds of the default histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class RequestEvent:
+    """The measurements of one metadata request, passed to the hooks of a
+    :class:`fdpclient.client.Client`.
+
+    The phases are timed in seconds:
+
+    ============  ====================================================
+    phase         time spent
+    ============  ====================================================
+    serialize     serializing a :class:`rdflib.Graph` request body
+    compress      compressing the request body
+    wait          sending the request until the response headers, i.e.
+                  connecting and the server time
+    download      reading the response body
+    parse         parsing the response body, including the download
+                  of streamed responses
+    ============  ====================================================
+
+    Attributes:
+        operation(str): the request operation, e.g. 'read'.
+        type(str): the type of metadata, e.g. 'catalog'.
+        url(str): the URL of the metadata.
+        status(int): the HTTP status code, `None` if no response was received
+            or the result came from a cache without a request.
+        format(str): the format of the response body of a read, `None` if
+            no body was received.
+        phases(dict): the time in seconds of each phase that took place.
+        bytes_sent(int): the size of the request body, before compression.
+        bytes_received(int): the size of the response body, decoded, `None`
+            if it was not read before the result was returned.
+        wire_bytes_sent(int): the size of the request body as sent, i.e.
+            compressed if it was.
+        wire_bytes_received(int): the size of the response body as received,
+            i.e. compressed if it was, `None` if it was not read.
+        elapsed(float): the total time in seconds.
+        cached(bool): whether the result was served from a cache.
+        retries(int): the number of retries of the request.
+        error(Exception): the exception raised by the request, if any.
+    """
+
+    def __init__(self, operation, type, url):
+        self.operation = operation
+        self.type = type
+        self.url = url
+        self.status = None
+        self.format = None
+        self.phases = {}
+        self.bytes_sent = None
+        self.bytes_received = None
+        self.wire_bytes_sent = None
+        self.wire_bytes_received = None
+        self.elapsed = None
+        self.cached = False
+        self.retries = 0
+        self.error = None
+
+    def __repr__(self):
+        return (f'RequestEvent({self.operation!r}, {self.type!r}, {self.url!r}, '
+                f'status={self.status}, elapsed={self.elapsed})')
+
+
+@contextmanager
+def timed(event, phase):
+    """Time a block as a phase of an event, if the event is not `None`.
+
+    Args:
+        event(:class:`RequestEvent`): the event to record the phase in.
+        phase(str): the name of the phase.
+    """
+    if event is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        event.phases[phase] = event.phases.get(phase, 0.0) + time.perf_counter() - start
+
+def emit(hooks, event):
+    """Call each hook with an event.
+
+    A hook raising an exception is logged and does not affect the request or
+    the other hooks.
+
+    Args:
+        hooks(iterable of callable): the hooks.
+        event(:class:`RequestEvent`): the event.
+    """
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception as error:
+            logger.warning(f'Request hook {hook!r} failed: {error}')
+
+
+class Histogram:
+    """A cumulative histogram of observed values.
+
+    Args:
+        buckets(sequence of float, optional): the sorted upper bounds of the
+            buckets. Defaults to :const:`DEFAULT_BUCKETS`.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Add a value to the histogram."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate a quantile as the upper bound of the bucket containing it.
+
+        Args:
+            q(float): the quantile, between 0 and 1.
+
+        Returns:
+            float: the estimate, `None` if there are no values, or
+            ``float('inf')`` if it is beyond the last bucket.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return float('inf')
+
+
+class HistogramCollector:
+    """An in-memory request hook aggregating the request events.
+
+    It keeps a :class:`Histogram` of the total time (phase 'total') and of
+    each phase, and counters of requests, of bytes and of bytes on the wire,
+    per operation and type of metadata.
+
+    Args:
+        buckets(sequence of float, optional): the bucket bounds of the
+            histograms. Defaults to :const:`DEFAULT_BUCKETS`.
+
+    Examples:
+        >>> collector = HistogramCollector()
+        >>> client = Client(host, hooks=[collector])
+        >>> client.read_catalog('catalog01')
+        >>> collector.histograms['read', 'catalog', 'parse'].quantile(0.5)
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.histograms = {}
+        self.requests = {}
+        self.bytes = {}
+        self.wire_bytes = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        if event.status is not None:
+            status = str(event.status)
+        elif event.error is not None:
+            status = 'error'
+        else:
+            status = 'cached'
+        with self._lock:
+            key = (event.operation, event.type, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if event.elapsed is not None:
+                self._observe(event, 'total', event.elapsed)
+            for phase, seconds in event.phases.items():
+                self._observe(event, phase, seconds)
+            for counters, direction, size in (
+                    (self.bytes, 'sent', event.bytes_sent),
+                    (self.bytes, 'received', event.bytes_received),
+                    (self.wire_bytes, 'sent', event.wire_bytes_sent),
+                    (self.wire_bytes, 'received', event.wire_bytes_received)):
+                if size:
+                    key = (event.operation, event.type, direction)
+                    counters[key] = counters.get(key, 0) + size
+
+    def _observe(self, event, phase, seconds):
+        key = (event.operation, event.type, phase)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def clear(self):
+        """Remove all the collected values."""
+        with self._lock:
+            self.histograms.clear()
+            self.requests.clear()
+            self.bytes.clear()
+            self.wire_bytes.clear()
+
+
+class PrometheusExporter:
+    """Export the values of a :class:`HistogramCollector` in the Prometheus
+    text exposition format.
+
+    Args:
+        collector(:class:`HistogramCollector`): the collector to export.
+        prefix(str, optional): the prefix of the metric names.
+            Defaults to 'fdpclient'.
+
+    Examples:
+        >>> exporter = PrometheusExporter(collector)
+        >>> with open('/var/lib/node_exporter/fdpclient.prom', 'w') as f:
+        ...     exporter.export(f)
+    """
+
+    def __init__(self, collector, prefix='fdpclient'):
+        self.collector = collector
+        self.prefix = prefix
+
+    def render(self):
+        """Render the metrics.
+
+        Returns:
+            str: the metrics in the Prometheus text format.
+        """
+        collector = self.collector
+        name = self.prefix
+        lines = []
+        with collector._lock:
+            lines.append(f'# TYPE {name}_requests_total counter')
+            for (operation, type, status), count in sorted(collector.requests.items()):
+                labels = _labels(operation=operation, type=type, status=status)
+                lines.append(f'{name}_requests_total{{{labels}}} {count}')
+
+            lines.append(f'# TYPE {name}_bytes_total counter')
+            for (operation, type, direction), size in sorted(collector.bytes.items()):
+                labels = _labels(operation=operation, type=type, direction=direction)
+                lines.append(f'{name}_bytes_total{{{labels}}} {size}')
+
+            lines.append(f'# TYPE {name}_wire_bytes_total counter')
+            for (operation, type, direction), size in sorted(collector.wire_bytes.items()):
+                labels = _labels(operation=operation, type=type, direction=direction)
+                lines.append(f'{name}_wire_bytes_total{{{labels}}} {size}')
+
+            lines.append(f'# TYPE {name}_request_seconds histogram')
+            for (operation, type, phase), h in sorted(collector.histograms.items()):
+                labels = _labels(operation=operation, type=type, phase=phase)
+                total = 0
+                for bound, count in zip(h.buckets + (float('inf'),), h.counts):
+                    total += count
+                    le = '+Inf' if bound == float('inf') else repr(float(bound))
+                    lines.append(f'{name}_request_seconds_bucket{{{labels},le="{le}"}} {total}')
+                lines.append(f'{name}_request_seconds_sum{{{labels}}} {h.sum!r}')
+                lines.append(f'{name}_request_seconds_count{{{labels}}} {h.count}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, sink):
+        """Write the rendered metrics to a sink.
+
+        Args:
+            sink(file-like object or callable): a text file to write the
+                metrics to, or a callable taking the metrics text.
+        """
+        text = self.render()
+        if callable(sink):
+            sink(text)
+        else:
+            sink.write(text)
+
+def _labels(**labels):
+    """Format Prometheus labels, escaping the values"""
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{key}="{escape(value)}"' for key, value in labels.items())
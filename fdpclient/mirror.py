@@ -0,0 +1,353 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import rdflib
+from fdpclient import DATA_FORMATS
+from fdpclient import negotiation
+from fdpclient import operations
+from fdpclient import parsers
+from fdpclient.harvest import METADATA_TYPES, _levels, _traverse
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS documents (
+    url TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    format TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched REAL NOT NULL
+)
+'''
+
+class MirrorRecord:
+    """The index record of a mirrored metadata document.
+
+    Attributes:
+        url(str): the URL of the metadata.
+        type(str): the type of the metadata.
+        format(str): the format of the stored document.
+        hash(str): the SHA-256 hash of the stored document.
+        etag(str): the ``ETag`` of the response, `None` if it had none.
+        last_modified(str): the ``Last-Modified`` header of the response,
+            `None` if it had none.
+        fetched(float): the time the document was last fetched or
+            revalidated, in seconds since the epoch.
+    """
+
+    def __init__(self, url, type, format, hash, etag=None, last_modified=None,
+                 fetched=None):
+        self.url = url
+        self.type = type
+        self.format = format
+        self.hash = hash
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched = fetched
+
+    def age(self):
+        """float: the time in seconds since the document was fetched."""
+        return time.time() - self.fetched
+
+    def __repr__(self):
+        return f'MirrorRecord({self.url!r}, {self.type!r}, hash={self.hash[:12]!r})'
+
+
+class Mirror:
+    """A local copy of the metadata of a FAIR Data Point.
+
+    The documents are stored in a content-addressed store under
+    ``directory/objects``, named by their SHA-256 hash, so unchanged
+    documents are never written twice. A SQLite index ``directory/index.db``
+    maps each URL to its type, hash, ``ETag``, ``Last-Modified`` and fetch
+    time.
+
+    :meth:`refresh` walks the server like :func:`fdpclient.harvest.harvest`,
+    but revalidates the mirrored documents with conditional requests, so
+    only new or changed documents are downloaded, and skips the documents
+    fetched less than ``max_age`` seconds ago altogether.
+
+    Args:
+        client(:class:`fdpclient.client.Client`): the client to fetch with.
+            Its session, retry policy and limiter are used.
+        directory(str): the directory of the mirror. It is created if it
+            does not exist.
+        format (str, optional): the format to request the metadata in.
+            Documents the server answers in another format are stored in
+            that format.
+            Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+            Defaults to 'turtle'.
+        normalize(bool, optional): whether to store the documents as
+            N-Triples instead of their native format. Defaults to `False`.
+
+    Examples:
+        >>> with Mirror(client, '~/fdp-mirror') as mirror:
+        ...     stats = mirror.refresh(max_age=3600)
+        ...     g = mirror.read('http://fdp.fairdatapoint.nl/catalog/catalog01')
+    """
+
+    def __init__(self, client, directory, format='turtle', normalize=False):
+        if format not in DATA_FORMATS:
+            raise ValueError(f'Invalid format: {format}')
+        self.client = client
+        self.directory = os.path.expanduser(directory)
+        self.format = format
+        self.normalize = normalize
+        os.makedirs(os.path.join(self.directory, 'objects'), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(self.directory, 'index.db'),
+                                   check_same_thread=False)
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the index."""
+        self._db.close()
+
+    def refresh(self, types=None, max_depth=None, workers=4, max_age=None, prune=True,
+                **kwargs):
+        """Update the mirror from the server.
+
+        The mirrored documents of the mirrored types that are no longer
+        linked from the server are removed from the index, and their files
+        deleted, unless a document failed, as the documents it links to
+        were not reached.
+
+        Args:
+            types(iterable of str, optional): the types of metadata to
+                mirror. The metadata of the other types above them are read
+                with the client for their links, but not mirrored.
+                Defaults to `None`, i.e. all types.
+            max_depth(int, optional): the maximum number of links to follow
+                from the fdp metadata. Defaults to `None`, i.e. no limit.
+            workers(int, optional): the number of concurrent requests.
+                Defaults to 4.
+            max_age(float, optional): the age in seconds below which a
+                mirrored document is not revalidated. Defaults to `None`,
+                i.e. revalidate all documents.
+            prune(bool, optional): whether to remove the documents no longer
+                linked from the server. Defaults to `True`.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Returns:
+            dict: the number of documents 'new', 'changed', 'unchanged'
+            (revalidated or downloaded with the same content), 'fresh' (not
+            revalidated), 'failed' and 'removed'.
+        """
+        types, last = _levels('fdp', types, max_depth, workers)
+        mirrored = [t for t in METADATA_TYPES[:last + 1] if types is None or t in types]
+        url = self.client._prepare_url('read', self.client.fdp_id, id='')
+        stats = {'new': 0, 'changed': 0, 'unchanged': 0, 'fresh': 0, 'failed': 0,
+                 'removed': 0}
+        lock = threading.Lock()
+        visited = set()
+
+        def read(url, type):
+            if type not in mirrored:
+                return self.client._send('read', type, url, format=self.format,
+                                         **dict(kwargs))
+            status, g = self._fetch(url, type, max_age, kwargs)
+            with lock:
+                stats[status] += 1
+            return g
+
+        for url, type, result in _traverse(read, url, 'fdp', None, last, workers):
+            visited.add(url)
+            if isinstance(result, Exception):
+                logger.warning(f'Failed to mirror {url}: {result}')
+                stats['failed'] += 1
+        if prune and not stats['failed']:
+            stats['removed'] = self._remove(mirrored, visited)
+        return stats
+
+    def read(self, url, max_age=None, type=None, **kwargs):
+        """Read a metadata from the mirror.
+
+        A document missing from the mirror, or older than ``max_age``, is
+        fetched (or revalidated) and mirrored first.
+
+        Args:
+            url(str): the URL of the metadata.
+            max_age(float, optional): the maximum age in seconds of the
+                mirrored document. Defaults to `None`, i.e. any age.
+            type(str, optional): the type of the metadata, recorded when it is
+                not mirrored yet. Defaults to `None`, i.e. guessed from the URL.
+            **kwargs: Optional arguments that :func:`requests.request` takes.
+
+        Returns:
+            :class:`rdflib.Graph`: RDF graph of the metadata.
+        """
+        url = url.rstrip('/')
+        record = self.record(url)
+        if record is not None and (max_age is None or record.age() <= max_age):
+            return self._graph(record)
+        if type is None:
+            type = record.type if record is not None else _guess_type(url)
+        return self._fetch(url, type, max_age, kwargs)[1]
+
+    def record(self, url):
+        """Return the index record of a URL.
+
+        Args:
+            url(str): the URL of the metadata.
+
+        Returns:
+            :class:`MirrorRecord` or `None`: the record, `None` if the URL is
+            not mirrored.
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT url, type, format, hash, etag, last_modified, fetched '
+                + 'FROM documents WHERE url = ?', (url.rstrip('/'),)).fetchone()
+        return None if row is None else MirrorRecord(*row)
+
+    def urls(self, type=None):
+        """Return the mirrored URLs.
+
+        Args:
+            type(str, optional): only return the URLs of this type of
+                metadata. Defaults to `None`, i.e. all types.
+
+        Returns:
+            list of str: the URLs, sorted.
+        """
+        with self._lock:
+            if type is None:
+                rows = self._db.execute('SELECT url FROM documents ORDER BY url')
+            else:
+                rows = self._db.execute(
+                    'SELECT url FROM documents WHERE type = ? ORDER BY url', (type,))
+            return [row[0] for row in rows]
+
+    def path(self, hash):
+        """Return the path of a stored document.
+
+        Args:
+            hash(str): the hash of the document.
+
+        Returns:
+            str: the path of the document in the object store.
+        """
+        return os.path.join(self.directory, 'objects', hash[:2], hash[2:])
+
+    def prune(self):
+        """Delete the stored documents no longer referenced by the index.
+
+        Returns:
+            int: the number of deleted documents.
+        """
+        with self._lock:
+            hashes = {row[0] for row in self._db.execute('SELECT hash FROM documents')}
+        removed = 0
+        objects = os.path.join(self.directory, 'objects')
+        for prefix in os.listdir(objects):
+            for name in os.listdir(os.path.join(objects, prefix)):
+                if prefix + name not in hashes and not name.endswith('.tmp'):
+                    os.remove(os.path.join(objects, prefix, name))
+                    removed += 1
+        return removed
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def _fetch(self, url, type, max_age, kwargs):
+        """Fetch or revalidate a document, return its status and graph"""
+        record = self.record(url)
+        if record is not None and max_age is not None and record.age() <= max_age:
+            return 'fresh', self._graph(record)
+
+        kwargs = dict(kwargs)
+        # the validators are of the representation negotiated for the same
+        # accept header, whatever the format the document is stored in
+        if record is not None:
+            kwargs['etag'] = record.etag
+            kwargs['last_modified'] = record.last_modified
+        kwargs.setdefault('retry', self.client.retry)
+        kwargs.setdefault('limiter', self.client.limiter)
+
+        r = operations.read_response(url, self.format, session=self.client.session,
+                                     **kwargs)
+        if r.status_code == 304:
+            r.close()
+            self._touch(url)
+            return 'unchanged', self._graph(record)
+
+        format = negotiation.format_of(r.headers.get('Content-Type')) or self.format
+        g = parsers.parse(r.text, format, rdflib.Graph())
+        body = r.content
+        if self.normalize:
+            format = 'nt'
+            body = g.serialize(format='nt', encoding='utf-8')
+        hash = self._store(body)
+        new = MirrorRecord(url, type, format, hash,
+                           etag=r.headers.get('ETag'),
+                           last_modified=r.headers.get('Last-Modified'),
+                           fetched=time.time())
+        self._index(new)
+        if record is None:
+            return 'new', g
+        return ('unchanged' if record.hash == hash else 'changed'), g
+
+    def _store(self, body):
+        """Write a document to the object store and return its hash"""
+        hash = hashlib.sha256(body).hexdigest()
+        path = self.path(hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(body)
+            os.replace(tmp, path)
+        return hash
+
+    def _index(self, record):
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (record.url, record.type, record.format, record.hash, record.etag,
+                 record.last_modified, record.fetched))
+            self._db.commit()
+
+    def _remove(self, types, visited):
+        """Remove the documents of types not visited, return their number"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT url FROM documents WHERE type IN (%s)' % ', '.join('?' * len(types)),
+                tuple(types)).fetchall()
+            removed = [row[0] for row in rows if row[0] not in visited]
+            self._db.executemany('DELETE FROM documents WHERE url = ?',
+                                 [(url,) for url in removed])
+            self._db.commit()
+        if removed:
+            logger.debug(f'Removed {len(removed)} documents no longer on the server')
+            self.prune()
+        return len(removed)
+
+    def _touch(self, url):
+        with self._lock:
+            self._db.execute('UPDATE documents SET fetched = ? WHERE url = ?',
+                             (time.time(), url))
+            self._db.commit()
+
+    def _graph(self, record):
+        with open(self.path(record.hash), 'rb') as f:
+            return parsers.parse(f.read(), record.format, rdflib.Graph())
+
+def _guess_type(url):
+    """Guess the metadata type from the path of its URL"""
+    for type in ('catalog', 'dataset', 'distribution'):
+        if f'/{type}/' in url:
+            return type
+    return 'fdp'
@@ -0,0 +1,229 @@
+import logging
+import threading
+from urllib.parse import urlsplit
+from fdpclient import DATA_FORMATS
+from fdpclient.parsers import parser_backends
+
+logger = logging.getLogger(__name__)
+
+#: The formats in order of parse cost with the rdflib parsers, fastest first
+PARSE_COST_ORDER = ('nt', 'turtle', 'n3', 'xml', 'json-ld')
+
+#: Media types of the formats besides those of :const:`DATA_FORMATS`
+MEDIA_TYPE_ALIASES = {
+    'text/plain': 'nt',
+    'application/x-turtle': 'turtle',
+    'text/rdf+n3': 'n3',
+    'application/xml': 'xml',
+    'text/xml': 'xml',
+    'application/json': 'json-ld',
+}
+
+def format_of(content_type):
+    """Return the format of a ``Content-Type`` header.
+
+    Args:
+        content_type(str): the header, e.g. 'text/turtle; charset=UTF-8'.
+
+    Returns:
+        str: the format, `None` if the header is missing or not a format of
+        :const:`fdpclient.config.DATA_FORMATS`.
+    """
+    if not content_type:
+        return None
+    media_type = content_type.split(';', 1)[0].strip().lower()
+    for format, value in DATA_FORMATS.items():
+        if value == media_type:
+            return format
+    return MEDIA_TYPE_ALIASES.get(media_type)
+
+def accept_header(formats):
+    """Build a q-weighted ``Accept`` header.
+
+    Args:
+        formats(sequence of str): the formats in order of preference.
+
+    Returns:
+        str: the header, e.g.
+        'application/n-triples, text/turtle;q=0.9, text/n3;q=0.8'.
+    """
+    values = []
+    for i, format in enumerate(formats):
+        q = max(10 - i, 1) / 10
+        media_type = DATA_FORMATS[format]
+        values.append(media_type if i == 0 else f'{media_type};q={q:g}')
+    return ', '.join(values)
+
+def ranked_formats(format):
+    """Return the formats with a requested format first, then by parse cost.
+
+    Args:
+        format(str): the requested format.
+
+    Returns:
+        list of str: the formats.
+    """
+    return [format] + [f for f in _cost_order() if f != format]
+
+def _cost_order():
+    """The formats with parser backends first, then by rdflib parse cost"""
+    fast = [f for f in PARSE_COST_ORDER if parser_backends(f)]
+    return fast + [f for f in PARSE_COST_ORDER if f not in fast]
+
+
+class FormatPolicy:
+    """Choose the read format of each server by measured parse cost.
+
+    The policy ranks the formats by their average parse time per byte,
+    measured on the responses read with it, the formats not measured yet
+    ranked by their expected cost (formats with a parser backend of
+    :mod:`fdpclient.parsers` first, then N-Triples, Turtle, N3, RDF/XML and
+    JSON-LD). It remembers per host which formats the server answered and
+    which it did not, i.e. answered in another format or in a body that
+    failed to parse, and requests each server the fastest format it
+    supports.
+
+    Args:
+        formats(iterable of str, optional): the formats to choose from.
+            Defaults to `None`, i.e. all formats of
+            :const:`fdpclient.config.DATA_FORMATS`.
+        smoothing(float, optional): the weight of a new measure in the
+            average parse cost of its format. Defaults to 0.2.
+        min_size(int, optional): the body size in bytes below which the
+            parse time is not measured, as fixed costs dominate it.
+            Defaults to 1024.
+
+    Examples:
+        >>> policy = FormatPolicy()
+        >>> client = Client('http://fdp.fairdatapoint.nl', format_policy=policy)
+        >>> for url, type, g in client.harvest():
+        ...     pass
+        >>> policy.rank()
+        ['nt', 'turtle', 'xml', 'n3', 'json-ld']
+    """
+
+    def __init__(self, formats=None, smoothing=0.2, min_size=1024):
+        formats = list(DATA_FORMATS) if formats is None else list(formats)
+        for format in formats:
+            if format not in DATA_FORMATS:
+                raise ValueError(f'Invalid format: {format}')
+        self.formats = formats
+        self.smoothing = smoothing
+        self.min_size = min_size
+        self._costs = {}
+        self._supported = {}
+        self._unsupported = {}
+        self._lock = threading.Lock()
+
+    def rank(self):
+        """Return the formats from the cheapest to parse.
+
+        Returns:
+            list of str: the formats.
+        """
+        with self._lock:
+            costs = dict(self._costs)
+        order = [f for f in _cost_order() if f in self.formats]
+        # the measured formats are ordered by cost in the places they have in
+        # the expected order, so that an unmeasured format keeps its place
+        measured = iter(sorted((f for f in order if f in costs), key=costs.get))
+        return [next(measured) if f in costs else f for f in order]
+
+    def cost(self, format):
+        """Return the average parse time per byte of a format.
+
+        Returns:
+            float: the time in seconds, `None` if it was not measured.
+        """
+        with self._lock:
+            return self._costs.get(format)
+
+    def formats_of(self, url):
+        """Return the formats to request from a server, in order.
+
+        Args:
+            url(str): a URL of the server.
+
+        Returns:
+            list of str: the formats by :meth:`rank`, without the formats the
+            server does not support unless it supports none.
+        """
+        host = _host(url)
+        with self._lock:
+            unsupported = set(self._unsupported.get(host, ()))
+        ranked = self.rank()
+        return [f for f in ranked if f not in unsupported] or ranked
+
+    def choose(self, url):
+        """Return the format to request from a server.
+
+        Args:
+            url(str): a URL of the server.
+
+        Returns:
+            str: the format.
+        """
+        return self.formats_of(url)[0]
+
+    def accept(self, url, format=None):
+        """Return the ``Accept`` header of a read.
+
+        Args:
+            url(str): the URL of the read.
+            format(str, optional): the requested format, put first.
+                Defaults to `None`, i.e. :meth:`choose`.
+
+        Returns:
+            str: the q-weighted header.
+        """
+        formats = self.formats_of(url)
+        if format is not None:
+            formats = [format] + [f for f in formats if f != format]
+        return accept_header(formats)
+
+    def record_response(self, url, requested, received):
+        """Record the format a server answered a request with.
+
+        Args:
+            url(str): the URL of the read.
+            requested(str): the format requested first.
+            received(str): the format of the response.
+        """
+        host = _host(url)
+        with self._lock:
+            self._supported.setdefault(host, set()).add(received)
+            self._unsupported.get(host, set()).discard(received)
+            if requested != received and requested not in self._supported[host]:
+                logger.debug(f'{host} answered {received} to a request of {requested}')
+                self._unsupported.setdefault(host, set()).add(requested)
+
+    def record_failure(self, url, format):
+        """Record a response of a server that failed to parse.
+
+        Args:
+            url(str): the URL of the read.
+            format(str): the format of the response.
+        """
+        host = _host(url)
+        with self._lock:
+            self._supported.get(host, set()).discard(format)
+            self._unsupported.setdefault(host, set()).add(format)
+
+    def record_parse(self, format, size, seconds):
+        """Record the parse time of a response.
+
+        Args:
+            format(str): the format of the response.
+            size(int): the size of the response body in bytes.
+            seconds(float): the parse time.
+        """
+        if not size or size < self.min_size:
+            return
+        cost = seconds / size
+        with self._lock:
+            old = self._costs.get(format)
+            self._costs[format] = cost if old is None else (
+                old + self.smoothing * (cost - old))
+
+def _host(url):
+    return urlsplit(url).netloc.lower()
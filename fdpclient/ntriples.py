@@ -0,0 +1,206 @@
+import logging
+import re
+from rdflib import BNode, Literal, URIRef
+from rdflib.plugins.parsers.ntriples import ParseError, unquote
+
+logger = logging.getLogger(__name__)
+
+#: The size of the blocks read from a stream
+BLOCK_SIZE = 16384
+
+#: The maximum number of IRIs and literals cached while parsing a stream, so
+#: that the memory of the parser does not grow with the document
+CACHE_SIZE = 4096
+
+_IRI = r'<([^<>"\s]*)>'
+_BNODE = r'_:([^\s<>"]*[^\s<>".])'
+_LITERAL = r'"((?:[^"\\]|\\.)*)"(?:@([a-zA-Z]+(?:-[a-zA-Z0-9]+)*)|\^\^<([^<>"\s]*)>)?'
+_TERMS = rf'[ \t]*(?:{_IRI}|{_BNODE})[ \t]*{_IRI}[ \t]*(?:{_IRI}|{_BNODE}|{_LITERAL})'
+_END = r'[ \t]*\.[ \t]*(?:#.*)?\r?$'
+_TRIPLE = re.compile(_TERMS + _END)
+_QUAD = re.compile(_TERMS + rf'(?:[ \t]*(?:{_IRI}|{_BNODE}))?' + _END)
+
+#: The characters escaped in the literals and in the IRIs of a line
+_LITERAL_ESCAPES = {'\\': '\\\\', '"': '\\"', '\n': '\\n', '\r': '\\r'}
+_LITERAL_CHARS = re.compile(r'[\\"\n\r]')
+_IRI_CHARS = re.compile(r'[\x00-\x20<>"{}|^`\\]')
+
+class _LineParser:
+    """Parse N-Triples lines with one regular expression per line.
+
+    The terms are built once per document and reused: FDP metadata repeat
+    the same predicates, classes and subjects on many lines. With
+    ``max_terms`` the IRI and literal caches are emptied when full; the
+    blank nodes are always kept, as a label must map to the same node.
+    """
+
+    def __init__(self, max_terms=None):
+        self.max_terms = max_terms
+        self.iris = {}
+        self.literals = {}
+        self.bnodes = {}
+
+    def _full(self, cache):
+        return self.max_terms is not None and len(cache) >= self.max_terms
+
+    def iri(self, value):
+        term = self.iris.get(value)
+        if term is None:
+            if self._full(self.iris):
+                self.iris.clear()
+            term = self.iris[value] = URIRef(unquote(value) if '\\' in value else value)
+        return term
+
+    def bnode(self, label):
+        term = self.bnodes.get(label)
+        if term is None:
+            term = self.bnodes[label] = BNode()
+        return term
+
+    def literal(self, value, lang, datatype):
+        key = (value, lang, datatype)
+        term = self.literals.get(key)
+        if term is None:
+            if self._full(self.literals):
+                self.literals.clear()
+            if '\\' in value:
+                value = unquote(value)
+            if datatype is not None:
+                term = Literal(value, datatype=self.iri(datatype))
+            else:
+                term = Literal(value, lang=lang)
+            self.literals[key] = term
+        return term
+
+    def parse(self, lines, predicates=None, quads=False):
+        """Yield the triples of lines, skipping blank and comment lines, and
+        the lines of other predicates than the IRI strings of predicates
+        before building their terms. With quads, the lines are N-Quads and
+        the quads are yielded, with `None` for the default graph"""
+        match = (_QUAD if quads else _TRIPLE).match
+        iri, bnode, literal = self.iri, self.bnode, self.literal
+        for line in lines:
+            m = match(line)
+            if m is None:
+                stripped = line.strip()
+                if not stripped or stripped.startswith('#'):
+                    continue
+                raise ParseError(f'Invalid line: {line}')
+            s, sb, p, o, ob, value, lang, datatype = m.groups()[:8]
+            if predicates is not None and (
+                    str(iri(p)) if '\\' in p else p) not in predicates:
+                continue
+            subject = iri(s) if s is not None else bnode(sb)
+            if o is not None:
+                obj = iri(o)
+            elif ob is not None:
+                obj = bnode(ob)
+            else:
+                obj = literal(value, lang, datatype)
+            if not quads:
+                yield subject, iri(p), obj
+                continue
+            g, gb = m.groups()[8:]
+            graph = iri(g) if g is not None else bnode(gb) if gb is not None else None
+            yield subject, iri(p), obj, graph
+
+
+def parse(data):
+    """Parse an N-Triples document.
+
+    This is the fast path of :mod:`fdpclient.parsers` for N-Triples: the
+    document is split into lines at once, each line is matched by a single
+    regular expression and the repeated terms are built once.
+
+    Args:
+        data(str or bytes): the N-Triples document.
+
+    Raises:
+        rdflib.plugins.parsers.ntriples.ParseError: a line is not a valid
+            N-Triples statement.
+
+    Returns:
+        list of tuple: the ``(subject, predicate, object)`` triples of rdflib
+        terms.
+    """
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    return list(_LineParser().parse(data.split('\n')))
+
+
+def iter_triples(stream, predicates=None):
+    """Parse an N-Triples byte stream incrementally.
+
+    The stream is read in small blocks and parsed line by line, so no more
+    than a block of the document and its triples is held in memory at a
+    time, and no :class:`rdflib.Graph` is built. At most :const:`CACHE_SIZE`
+    IRIs and literals are cached.
+
+    Args:
+        stream(file-like object): the binary N-Triples stream, e.g.
+            ``response.raw`` of a streamed response.
+        predicates(iterable, optional): only yield the triples of these
+            predicates, the terms of the other lines are not built.
+            Defaults to `None`, i.e. all triples.
+
+    Yields:
+        tuple: ``(subject, predicate, object)`` triples of rdflib terms.
+    """
+    parser = _LineParser(max_terms=CACHE_SIZE)
+    if predicates is not None:
+        predicates = {str(p) for p in predicates}
+    rest = b''
+    while True:
+        block = stream.read(BLOCK_SIZE)
+        if not block:
+            break
+        data = rest + block
+        end = data.rfind(b'\n') + 1
+        rest = data[end:]
+        yield from parser.parse(data[:end].decode('utf-8').split('\n'), predicates)
+    if rest:
+        yield from parser.parse([rest.decode('utf-8')], predicates)
+
+
+def format_term(term):
+    """Write an rdflib term in N-Triples.
+
+    The quotes, backslashes and line breaks of literals are escaped, and the
+    characters not allowed in the IRIs of N-Triples are written as ``\\u``
+    escapes.
+
+    Args:
+        term(:class:`rdflib.URIRef`, :class:`rdflib.BNode` or
+            :class:`rdflib.Literal`): the term.
+
+    Returns:
+        str: the N-Triples term.
+    """
+    if isinstance(term, Literal):
+        value = _LITERAL_CHARS.sub(lambda m: _LITERAL_ESCAPES[m.group()], str(term))
+        if term.language:
+            return f'"{value}"@{term.language}'
+        if term.datatype is not None:
+            return f'"{value}"^^{format_term(term.datatype)}'
+        return f'"{value}"'
+    if isinstance(term, BNode):
+        return f'_:{term}'
+    return '<' + _IRI_CHARS.sub(lambda m: f'\\u{ord(m.group()):04X}', str(term)) + '>'
+
+
+def format_line(triple, graph=None):
+    """Write a triple as an N-Triples line, or as an N-Quads line in a graph.
+
+    Args:
+        triple(tuple): the ``(subject, predicate, object)`` triple of rdflib
+            terms.
+        graph(:class:`rdflib.URIRef`, optional): the name of the graph of the
+            triple. Defaults to `None`, i.e. an N-Triples line.
+
+    Returns:
+        str: the line, ending with a line break.
+    """
+    terms = [format_term(term) for term in triple]
+    if graph is not None:
+        terms.append(format_term(graph))
+    return ' '.join(terms) + ' .\n'
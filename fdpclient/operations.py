@@ -1,11 +1,28 @@
 import logging
+import sys
+import time
+import weakref
+from urllib.parse import urljoin
 import requests
-import rdflib
 from fdpclient import DATA_FORMATS
+from fdpclient import compression
+from fdpclient import negotiation
+from fdpclient import parsers
+from fdpclient.exceptions import HTTPError, TransportError
+from fdpclient.metrics import timed
+from fdpclient.retry import parse_retry_after
+
+# rdflib is imported by the functions parsing or serializing graphs only, so
+# that the raw bytes and delete requests do not load it
 
 logger = logging.getLogger(__name__)
 
-def create(url, data, format='turtle', **kwargs):
+#: Request operations of the HTTP methods
+_OPERATIONS = {'post': 'create', 'get': 'read', 'put': 'update', 'delete': 'delete'}
+
+def create(url, data, format='turtle', session=None, serialization_cache=None,
+           compress=None, compress_level=None, event=None, retry=None, limiter=None,
+           **kwargs):
     """Send a create request.
 
     Args:
@@ -16,63 +33,310 @@ def create(url, data, format='turtle', **kwargs):
             This argument overwrites the request header ``content-type``.
             Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
             Defaults to 'turtle'.
+        session(:class:`requests.Session`, optional): the session used to send
+            the request, e.g. a pooled session from
+            :func:`fdpclient.session.create_session`.
+            Defaults to `None`, i.e. a new connection for the request.
+        serialization_cache(:class:`fdpclient.cache.SerializationCache`, optional):
+            the cache of serialized graphs. Defaults to `None`.
+        compress(str, optional): the content coding to compress the request
+            body with, see :func:`fdpclient.compression.encodings`. The
+            server must accept compressed bodies. Defaults to `None`, i.e.
+            no compression.
+        compress_level(int, optional): the compression level, see
+            :func:`fdpclient.compression.compress`. Defaults to `None`.
+        event(:class:`fdpclient.metrics.RequestEvent`, optional): the event
+            to record the phase timings, status and byte counts in.
+            Defaults to `None`.
+        retry(:class:`fdpclient.retry.RetryPolicy`, optional): the policy to
+            retry failed requests with. Defaults to `None`, i.e. no retries.
+        limiter(:class:`fdpclient.ratelimit.RateLimiter`, optional): the
+            limiter pacing the requests, or any object with the same
+            ``acquire`` and ``release`` methods. Defaults to `None`.
         **kwargs: Optional arguments that :func:`requests.request` takes.
     """
     logger.debug(f'Create metadata on {url} with the content: \n{data}')
-    if 'headers' in kwargs:
-        kwargs['headers'].update({'content-type': DATA_FORMATS[format]})
-    else:
-        kwargs.update({'headers': {'content-type': DATA_FORMATS[format]}})
+    _set_content_type(kwargs, format)
 
-    try:
-        data = _check_data(data, format)
-        r = requests.post(url, data, **kwargs)
-    except Exception as error:
-        print(f'Unexpected error when connecting to {url}\n')
-        raise error
-    else:
-        if r.status_code >= 300:
-            print(f'HTTP error: {r.status_code} {r.reason} for {url}',
-                  f'\nResponse message: {r.text}')
-            raise
+    with timed(event, 'serialize'):
+        data = _check_data(data, format, serialization_cache)
+    if compress is not None:
+        data = _compress(data, compress, compress_level, kwargs, event)
+    _send(session, 'post', url, lambda s: s < 300, event, retry, limiter,
+          data=data, **kwargs)
 
-def read(url, format='turtle', **kwargs):
+def read(url, format='turtle', session=None, cache=None, stream=False,
+         result='graph', predicates=None, store=None, policy=None, pages=False,
+         event=None, retry=None, limiter=None, **kwargs):
     """Send a read request.
 
     Args:
         url(str): URL for reading a metadata.
-        format (str, optional): the format of the metadata.
-            This argument overwrites the request header ``accept``.
+        format (str, optional): the preferred format of the metadata.
+            This argument overwrites the request header ``accept``, which
+            asks for this format first and for the other formats with lower
+            q-values, the cheapest to parse first. The response is parsed in
+            the format of its ``Content-Type``, or in this format if it has
+            none.
             Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
             Defaults to 'turtle'.
+        session(:class:`requests.Session`, optional): the session used to send
+            the request, e.g. a pooled session from
+            :func:`fdpclient.session.create_session`.
+            Defaults to `None`, i.e. a new connection for the request.
+        cache(:class:`fdpclient.cache.HTTPCache`, optional): the cache to
+            revalidate and store the response in. Defaults to `None`.
+        stream(bool, optional): whether to feed the response byte stream
+            directly to the parser instead of decoding the full body text
+            first. Streamed responses are revalidated with the cache, but not
+            stored in it. Compressed responses, see
+            :const:`fdpclient.compression.ACCEPT_ENCODING`, are decoded
+            whether they are streamed or not. Defaults to `False`.
+        result(str, optional): the type of the result, 'graph' or 'triples'.
+            With 'triples' the triples are parsed without building a graph and
+            its indexes, and the cache is not used. N-Triples are then streamed
+            and parsed incrementally, while the triples of the other formats
+            are all parsed into a list before the first one is yielded, so
+            ``stream=True`` is only valid with the 'nt' format.
+            Defaults to 'graph'.
+        predicates(iterable, optional): with ``result='triples'``, only yield
+            the triples of these predicates. Defaults to `None`, i.e. all
+            triples.
+        store(optional): the rdflib store of the graph, e.g.
+            :class:`fdpclient.store.CompactStore`. A store class, or any
+            callable returning a store, creates a new store for the graph;
+            a store instance is shared by all the graphs read into it.
+            Defaults to `None`, i.e. the rdflib default store.
+        policy(:class:`fdpclient.negotiation.FormatPolicy`, optional): the
+            policy ordering the ``accept`` header, and recording the format
+            of the response and its parse time. Defaults to `None`.
+        pages(bool, optional): with ``result='triples'``, whether to follow
+            the ``Link: rel="next"`` headers of a paged response, e.g. of an
+            LDP container, and yield the triples of all its pages. The next
+            page is requested once the triples of a page are consumed. The
+            event records the first page only. Defaults to `False`.
+        event(:class:`fdpclient.metrics.RequestEvent`, optional): the event
+            to record the phase timings, status and byte counts in.
+            Defaults to `None`.
+        retry(:class:`fdpclient.retry.RetryPolicy`, optional): the policy to
+            retry failed requests with. Defaults to `None`, i.e. no retries.
+        limiter(:class:`fdpclient.ratelimit.RateLimiter`, optional): the
+            limiter pacing the requests, or any object with the same
+            ``acquire`` and ``release`` methods. Defaults to `None`.
         **kwargs: Optional arguments that :func:`requests.request` takes.
 
     Returns:
-        :class:`rdflib.Graph`:  RDF graph of the requested metadata.
+        :class:`rdflib.Graph` or generator: RDF graph of the requested
+        metadata, or a generator of its ``(subject, predicate, object)``
+        triples.
     """
     logger.debug(f'Read metadata: {url}')
-    if 'headers' in kwargs:
-        kwargs['headers'].update({'content-type': DATA_FORMATS[format]})
+    if result not in ('graph', 'triples'):
+        raise ValueError(f'Invalid result type: {result}')
+    if pages and result != 'triples':
+        raise ValueError('Pages are only followed with result="triples"')
+    if result == 'triples' and stream and format != 'nt':
+        raise ValueError('Only N-Triples are streamed with result="triples"')
+    if policy is not None:
+        _set_accept(kwargs, policy.accept(url, format))
     else:
-        kwargs.update({'headers': {'content-type': DATA_FORMATS[format]}})
+        _set_accept(kwargs, negotiation.accept_header(negotiation.ranked_formats(format)))
+    _set_accept_encoding(kwargs)
 
-    try:
-        r = requests.get(url, **kwargs)
-    except Exception as error:
-        print(f'Unexpected error when connecting to {url}\n')
-        raise error
-    else:
-        if r.status_code != 200:
-            print(f'HTTP error: {r.status_code} {r.reason} for {url}',
-                  f'\nResponse message: {r.text}')
-            raise
+    if result == 'triples':
+        cache = None
+        stream = format == 'nt'
+        predicates = _predicate_set(predicates)
+
+    entry = None
+    if cache is not None:
+        entry = cache.get(url, format)
+        if entry is not None:
+            kwargs['headers'].update(entry.validators())
+
+    def ok(status):
+        return status == 200 or (status == 304 and entry is not None)
+
+    r = _send(session, 'get', url, ok, event, retry, limiter, stream=stream, **kwargs)
+    if r.status_code == 304:
+        r.close()
+        if event is not None:
+            event.cached = True
+        return cache.hit(entry)
 
-    g = rdflib.Graph()
-    g.parse(data=r.text, format=format)
+    received = negotiation.format_of(r.headers.get('Content-Type'))
+    if received is None:
+        received = format
+    elif policy is not None:
+        policy.record_response(url, format, received)
+    if event is not None:
+        event.format = received
+
+    if result == 'triples':
+        triples = _iter_triples(r, received, stream, predicates)
+        if pages:
+            return _iter_pages(triples, r, format, stream, predicates, session,
+                               retry, limiter, kwargs)
+        return triples
+    start = time.perf_counter()
+    try:
+        with timed(event, 'parse'):
+            if stream:
+                g, size = _parse_stream(r, received, store)
+            else:
+                g, size = _parse(r.text, received, store), len(r.content)
+    except Exception:
+        if policy is not None:
+            policy.record_failure(url, received)
+        raise
+    if policy is not None:
+        policy.record_parse(received, size, time.perf_counter() - start)
+    if stream:
+        if event is not None:
+            event.bytes_received = size
+            event.wire_bytes_received = r.raw.tell()
+        return g
+    if cache is not None:
+        cache.put(url, format, r.headers, r.text, g, body_format=received)
     return g
 
 
-def update(url, data, format='turtle', **kwargs):
+def read_raw(url, format='turtle', session=None, event=None, retry=None,
+             limiter=None, **kwargs):
+    """Send a read request and return the response body unparsed.
+
+    The body is neither parsed nor cached, and rdflib is not imported, e.g.
+    to copy metadata between servers or to a file.
+
+    Args:
+        url(str): URL for reading a metadata.
+        format (str, optional): the format of the metadata.
+            This argument overwrites the request header ``accept``, which
+            asks for this format only.
+            Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+            Defaults to 'turtle'.
+        session(:class:`requests.Session`, optional): the session used to send
+            the request, e.g. a pooled session from
+            :func:`fdpclient.session.create_session`.
+            Defaults to `None`, i.e. a new connection for the request.
+        event(:class:`fdpclient.metrics.RequestEvent`, optional): the event
+            to record the phase timings, status and byte counts in.
+            Defaults to `None`.
+        retry(:class:`fdpclient.retry.RetryPolicy`, optional): the policy to
+            retry failed requests with. Defaults to `None`, i.e. no retries.
+        limiter(:class:`fdpclient.ratelimit.RateLimiter`, optional): the
+            limiter pacing the requests, or any object with the same
+            ``acquire`` and ``release`` methods. Defaults to `None`.
+        **kwargs: Optional arguments that :func:`requests.request` takes.
+
+    Returns:
+        bytes: the response body, decoded from its content coding.
+    """
+    logger.debug(f'Read raw metadata: {url}')
+    _set_accept(kwargs, DATA_FORMATS[format])
+    _set_accept_encoding(kwargs)
+
+    r = _send(session, 'get', url, lambda s: s == 200, event, retry, limiter, **kwargs)
+    if event is not None:
+        event.format = negotiation.format_of(r.headers.get('Content-Type')) or format
+    return r.content
+
+
+def read_response(url, format='turtle', session=None, etag=None, last_modified=None,
+                  event=None, retry=None, limiter=None, **kwargs):
+    """Send a read request, conditional if validators are given, and return
+    the response.
+
+    The body is neither parsed nor cached, e.g. to keep the documents and
+    their validators in a store of the caller.
+
+    Args:
+        url(str): URL for reading a metadata.
+        format (str, optional): the preferred format of the metadata, asked
+            for as by :func:`read`. The format of the response is that of its
+            ``Content-Type``.
+            Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
+            Defaults to 'turtle'.
+        session(:class:`requests.Session`, optional): the session used to send
+            the request, e.g. a pooled session from
+            :func:`fdpclient.session.create_session`.
+            Defaults to `None`, i.e. a new connection for the request.
+        etag(str, optional): the ``ETag`` of a stored copy, sent as
+            ``If-None-Match``. Defaults to `None`.
+        last_modified(str, optional): the ``Last-Modified`` header of a stored
+            copy, sent as ``If-Modified-Since``. Defaults to `None`.
+        event(:class:`fdpclient.metrics.RequestEvent`, optional): the event
+            to record the phase timings, status and byte counts in.
+            Defaults to `None`.
+        retry(:class:`fdpclient.retry.RetryPolicy`, optional): the policy to
+            retry failed requests with. Defaults to `None`, i.e. no retries.
+        limiter(:class:`fdpclient.ratelimit.RateLimiter`, optional): the
+            limiter pacing the requests, or any object with the same
+            ``acquire`` and ``release`` methods. Defaults to `None`.
+        **kwargs: Optional arguments that :func:`requests.request` takes.
+
+    Returns:
+        :class:`requests.Response`: the response, with status 200, or 304 if
+        a validator is given and the stored copy is current.
+    """
+    logger.debug(f'Read metadata response: {url}')
+    _set_accept(kwargs, negotiation.accept_header(negotiation.ranked_formats(format)))
+    _set_accept_encoding(kwargs)
+    if etag is not None:
+        kwargs['headers']['If-None-Match'] = etag
+    if last_modified is not None:
+        kwargs['headers']['If-Modified-Since'] = last_modified
+    conditional = etag is not None or last_modified is not None
+
+    def ok(status):
+        return status == 200 or (status == 304 and conditional)
+
+    r = _send(session, 'get', url, ok, event, retry, limiter, **kwargs)
+    if event is not None:
+        event.format = negotiation.format_of(r.headers.get('Content-Type')) or format
+    return r
+
+
+def iter_ntriples(url, session=None, predicates=None, retry=None, limiter=None,
+                  **kwargs):
+    """Send a read request for N-Triples and parse the response incrementally.
+
+    The response is streamed and parsed line by line, so the triples are
+    yielded while the document is downloaded and no :class:`rdflib.Graph` is
+    built. The request is sent when the first triple is requested.
+
+    Args:
+        url(str): URL for reading a metadata.
+        session(:class:`requests.Session`, optional): the session used to send
+            the request, e.g. a pooled session from
+            :func:`fdpclient.session.create_session`.
+            Defaults to `None`, i.e. a new connection for the request.
+        predicates(iterable, optional): only yield the triples of these
+            predicates. Defaults to `None`, i.e. all triples.
+        retry(:class:`fdpclient.retry.RetryPolicy`, optional): the policy to
+            retry failed requests with. Defaults to `None`, i.e. no retries.
+        limiter(:class:`fdpclient.ratelimit.RateLimiter`, optional): the
+            limiter pacing the requests, or any object with the same
+            ``acquire`` and ``release`` methods. Defaults to `None`.
+        **kwargs: Optional arguments that :func:`requests.request` takes.
+
+    Yields:
+        tuple: ``(subject, predicate, object)`` triples of rdflib terms.
+    """
+    logger.debug(f'Read metadata triples: {url}')
+    predicates = _predicate_set(predicates)
+    _set_accept(kwargs, DATA_FORMATS['nt'])
+    _set_accept_encoding(kwargs)
+
+    r = _send(session, 'get', url, lambda s: s == 200, retry=retry, limiter=limiter,
+              stream=True, **kwargs)
+
+    yield from _iter_triples(r, 'nt', True, predicates)
+
+
+def update(url, data, format='turtle', session=None, serialization_cache=None,
+           compress=None, compress_level=None, event=None, retry=None, limiter=None,
+           **kwargs):
     """Send an update request.
 
     Args:
@@ -83,48 +347,289 @@ def update(url, data, format='turtle', **kwargs):
             This argument overwrites the request header ``content-type``.
             Available options are 'turtle', 'n3', 'nt', 'xml' and 'json-ld'.
             Defaults to 'turtle'.
+        session(:class:`requests.Session`, optional): the session used to send
+            the request, e.g. a pooled session from
+            :func:`fdpclient.session.create_session`.
+            Defaults to `None`, i.e. a new connection for the request.
+        serialization_cache(:class:`fdpclient.cache.SerializationCache`, optional):
+            the cache of serialized graphs. Defaults to `None`.
+        compress(str, optional): the content coding to compress the request
+            body with, see :func:`fdpclient.compression.encodings`. The
+            server must accept compressed bodies. Defaults to `None`, i.e.
+            no compression.
+        compress_level(int, optional): the compression level, see
+            :func:`fdpclient.compression.compress`. Defaults to `None`.
+        event(:class:`fdpclient.metrics.RequestEvent`, optional): the event
+            to record the phase timings, status and byte counts in.
+            Defaults to `None`.
+        retry(:class:`fdpclient.retry.RetryPolicy`, optional): the policy to
+            retry failed requests with. Defaults to `None`, i.e. no retries.
+        limiter(:class:`fdpclient.ratelimit.RateLimiter`, optional): the
+            limiter pacing the requests, or any object with the same
+            ``acquire`` and ``release`` methods. Defaults to `None`.
         **kwargs: Optional arguments that :func:`requests.request` takes.
     """
     logger.debug(f'Update metadata on {url} with the content: \n{data}')
-    if 'headers' in kwargs:
-        kwargs['headers'].update({'content-type': DATA_FORMATS[format]})
-    else:
-        kwargs.update({'headers': {'content-type': DATA_FORMATS[format]}})
+    _set_content_type(kwargs, format)
 
-    try:
-        data = _check_data(data, format)
-        r = requests.put(url, data, **kwargs)
-    except Exception as error:
-        print(f'Unexpected error when connecting to {url}\n')
-        raise error
-    else:
-        if r.status_code >= 300:
-            print(f'HTTP error: {r.status_code} {r.reason} for {url}',
-                  f'\nResponse message: {r.text}')
-            raise
+    with timed(event, 'serialize'):
+        data = _check_data(data, format, serialization_cache)
+    if compress is not None:
+        data = _compress(data, compress, compress_level, kwargs, event)
+    _send(session, 'put', url, lambda s: s < 300, event, retry, limiter,
+          data=data, **kwargs)
 
-def delete(url, **kwargs):
+def delete(url, session=None, event=None, retry=None, limiter=None, **kwargs):
     """Send a delete request.
 
     Args:
         url(str): URL for deleting a metadata.
+        session(:class:`requests.Session`, optional): the session used to send
+            the request, e.g. a pooled session from
+            :func:`fdpclient.session.create_session`.
+            Defaults to `None`, i.e. a new connection for the request.
+        event(:class:`fdpclient.metrics.RequestEvent`, optional): the event
+            to record the phase timings, status and byte counts in.
+            Defaults to `None`.
+        retry(:class:`fdpclient.retry.RetryPolicy`, optional): the policy to
+            retry failed requests with. Defaults to `None`, i.e. no retries.
+        limiter(:class:`fdpclient.ratelimit.RateLimiter`, optional): the
+            limiter pacing the requests, or any object with the same
+            ``acquire`` and ``release`` methods. Defaults to `None`.
         **kwargs: Optional arguments that :func:`requests.request` takes.
     """
     logger.debug(f'Delete metadata: {url}')
-    try:
-        r = requests.delete(url, **kwargs)
-    except Exception as error:
-        print(f'Unexpected error when connecting to {url}\n')
-        raise error
-    else:
-        if r.status_code >= 300:
-            print(f'HTTP error: {r.status_code} {r.reason} for {url}',
-                  f'\nResponse message: {r.text}')
-            raise
+    _send(session, 'delete', url, lambda s: s < 300, event, retry, limiter, **kwargs)
+
+def _set_content_type(kwargs, format):
+    """Set the content-type header of a copy of the request headers"""
+    headers = dict(kwargs.get('headers') or {})
+    headers['content-type'] = DATA_FORMATS[format]
+    kwargs['headers'] = headers
+
+def _graph(store=None):
+    """Create an empty RDF graph in a store, or in a new store of a class"""
+    import rdflib
+    from rdflib.store import Store
+    if store is None:
+        return rdflib.Graph()
+    if not isinstance(store, Store):
+        store = store()
+    return rdflib.Graph(store=store)
+
+def _set_accept(kwargs, accept):
+    """Set the accept header of a copy of the request headers"""
+    headers = {k: v for k, v in (kwargs.get('headers') or {}).items()
+               if k.lower() != 'accept'}
+    headers['Accept'] = accept
+    kwargs['headers'] = headers
+
+def _set_accept_encoding(kwargs):
+    """Advertise the content codings the response can be decoded from,
+    unless the request headers do"""
+    if not any(k.lower() == 'accept-encoding' for k in kwargs['headers']):
+        kwargs['headers']['Accept-Encoding'] = compression.ACCEPT_ENCODING
+
+def _compress(data, encoding, level, kwargs, event):
+    """Compress a request body and set its content-encoding header"""
+    if hasattr(data, 'read'):
+        data = data.read()
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if event is not None:
+        event.bytes_sent = len(data)
+    with timed(event, 'compress'):
+        body = compression.compress(data, encoding, level)
+    kwargs['headers']['Content-Encoding'] = encoding
+    return body
+
+def _parse(text, format, store=None):
+    """Parse the response text to a RDF graph"""
+    return parsers.parse(text, format, _graph(store))
+
+def _parse_stream(r, format, store=None):
+    """Parse the byte stream of a streamed response to a RDF graph, return
+    the graph and the decoded size of the body"""
+    with r:
+        r.raw.decode_content = True
+        stream = compression.CountingReader(r.raw)
+        g = _graph(store)
+        g.parse(source=stream, format=format)
+    return g, stream.count
+
+def _predicate_set(predicates):
+    """Convert the predicates to filter on to a set of URIRefs"""
+    if predicates is None:
+        return None
+    from rdflib import URIRef
+    return {URIRef(p) for p in predicates}
+
+def _iter_triples(r, format, stream, predicates):
+    """Parse a response to triples without building a RDF graph"""
+    import rdflib
+    from fdpclient import ntriples
+    from fdpclient.store import _TripleSink
+    with r:
+        if format == 'nt' and stream:
+            r.raw.decode_content = True
+            yield from ntriples.iter_triples(r.raw, predicates)
+            return
+
+        # rdflib pushes the triples of the other formats to the store, they
+        # are then collected before the first one is yielded
+        sink = _TripleSink(predicates)
+        if stream:
+            r.raw.decode_content = True
+            rdflib.Graph(store=sink).parse(source=r.raw, format=format)
+        else:
+            rdflib.Graph(store=sink).parse(data=r.text, format=format)
+    yield from sink.collected
+
+def _next_page(r):
+    """Return the absolute URL of the next page of a response, if any"""
+    link = r.links.get('next')
+    if link is None:
+        return None
+    return urljoin(r.url, link['url'])
+
+def _iter_pages(triples, r, format, stream, predicates, session, retry, limiter,
+                kwargs):
+    """Yield the triples of a paged response, then of its next pages"""
+    seen = {r.url}
+    while True:
+        url = _next_page(r)
+        yield from triples
+        if url is None or url in seen:
+            return
+        seen.add(url)
+        logger.debug(f'Read the next page: {url}')
+        r = _send(session, 'get', url, lambda s: s == 200, None, retry, limiter,
+                  stream=stream, **kwargs)
+        received = negotiation.format_of(r.headers.get('Content-Type')) or format
+        triples = _iter_triples(r, received, stream, predicates)
+
+def _http(session):
+    """Return the session to send requests with, or the requests module"""
+    return requests if session is None else session
+
+def _send(session, method, url, ok, event=None, retry=None, limiter=None, **kwargs):
+    """Send a request, pace it by the limiter and retry it by the policy if
+    any, and check the status.
+
+    Raises:
+        HTTPError: the response status is not ok.
+        TransportError: the request failed without a response.
+    """
+    operation = _OPERATIONS[method]
+    data = kwargs.get('data')
+    position = None
+    if hasattr(data, 'read'):
+        if hasattr(data, 'seekable') and data.seekable():
+            position = data.tell()
+        else:
+            retry = None
+    if retry is not None:
+        retry.record_request()
+
+    attempt = 0
+    while True:
+        token = None if limiter is None else limiter.acquire(url, operation)
+        start = time.perf_counter()
+        try:
+            r = _send_once(session, method, url, event, **kwargs)
+        except Exception as error:
+            if limiter is not None:
+                limiter.release(token)
+            delay = None if retry is None else retry.delay(operation, attempt, error=error)
+            if delay is None:
+                if not isinstance(error, _transport_errors()):
+                    raise
+                logger.error(f'Unexpected error when connecting to {url}: {error!r}')
+                raise TransportError(url, error, elapsed=time.perf_counter() - start,
+                                     attempts=attempt + 1) from error
+        else:
+            if limiter is not None:
+                if kwargs.get('stream') and ok(r.status_code):
+                    # the slot is held until the streamed body is read
+                    _release_on_close(r, limiter, token)
+                else:
+                    limiter.release(token, r.status_code, r.elapsed.total_seconds())
+            if ok(r.status_code):
+                return r
+            delay = None
+            if retry is not None:
+                delay = retry.delay(operation, attempt, r.status_code, r.headers)
+            if delay is None:
+                logger.error(f'HTTP error: {r.status_code} {r.reason} for {url}')
+                logger.debug(f'Response message: {r.text}')
+                raise HTTPError(r.status_code, r.reason, url, r.text,
+                                elapsed=r.elapsed.total_seconds(), attempts=attempt + 1,
+                                retry_after=parse_retry_after(r.headers.get('Retry-After')))
+            r.close()
+
+        attempt += 1
+        logger.debug(f'Retry {attempt} of {operation} {url} in {delay:.2f}s')
+        time.sleep(delay)
+        if event is not None:
+            event.retries = attempt
+        if position is not None:
+            data.seek(position)
+
+def _release_on_close(r, limiter, token):
+    """Release the limiter slot of a streamed response when it is closed, or
+    when it is collected unclosed"""
+    release = weakref.finalize(r, limiter.release, token, r.status_code,
+                               r.elapsed.total_seconds())
+    close = r.close
+
+    def close_and_release():
+        try:
+            close()
+        finally:
+            release()
+
+    r.close = close_and_release
+
+def _transport_errors():
+    """Return the errors of requests and of httpx raised without a response.
+
+    httpx is not imported here, see :attr:`fdpclient.retry.RetryPolicy.errors`.
+    """
+    errors = (requests.RequestException, OSError)
+    httpx = sys.modules.get('httpx')
+    if httpx is not None:
+        errors += (httpx.TransportError,)
+    return errors
+
+def _send_once(session, method, url, event, **kwargs):
+    """Send a request with a session and record it in the event if any"""
+    if event is None:
+        return getattr(_http(session), method)(url, **kwargs)
+    data = kwargs.get('data')
+    if isinstance(data, (str, bytes)):
+        event.wire_bytes_sent = len(data.encode('utf-8') if isinstance(data, str) else data)
+        if event.bytes_sent is None:
+            event.bytes_sent = event.wire_bytes_sent
+    start = time.perf_counter()
+    r = getattr(_http(session), method)(url, **kwargs)
+    total = time.perf_counter() - start
+    event.status = r.status_code
+    # requests measures the time until the response headers are parsed
+    event.phases['wait'] = r.elapsed.total_seconds()
+    if not kwargs.get('stream'):
+        event.phases['download'] = max(total - event.phases['wait'], 0.0)
+        event.bytes_received = len(r.content)
+        event.wire_bytes_received = r.raw.tell()
+    return r
 
-def _check_data(data, format):
+def _check_data(data, format, serialization_cache=None):
     """Check input data type and convert Graph data to bytes"""
+    if isinstance(data, (str, bytes)) or hasattr(data, 'read'):
+        return data
+    import rdflib
     if isinstance(data, rdflib.Graph):
+        if serialization_cache is not None:
+            return serialization_cache.serialize(data, format)
         return data.serialize(format=format)
     else:
         return data
\ No newline at end of file
@@ -0,0 +1,64 @@
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+def imap(func, items, workers=4, ordered=False, executor=None):
+    """Apply a function to items on a thread pool and yield the results.
+
+    At most ``2 * workers`` items are submitted at a time, so that long or
+    lazy iterables of items are consumed as the results are yielded. An
+    exception raised by the function is yielded as the result of its item
+    instead of stopping the iteration.
+
+    Args:
+        func(callable): the function to call with each item.
+        items(iterable): the items.
+        workers(int, optional): the number of worker threads. Defaults to 4.
+        ordered(bool, optional): whether to yield the results in the order
+            of the items. Defaults to `False`, i.e. in completion order.
+        executor(:class:`concurrent.futures.Executor`, optional): the
+            executor to submit calls to. Defaults to `None`, i.e. a new
+            thread pool of ``workers`` threads.
+
+    Yields:
+        tuple: ``(item, result)`` pairs, where result is the return value of
+        the function or the exception it raised.
+    """
+    if workers < 1:
+        raise ValueError(f'Invalid number of workers: {workers}')
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    items = iter(items)
+    pending = deque()
+    try:
+        for item in items:
+            pending.append((executor.submit(func, item), item))
+            if len(pending) >= 2 * workers:
+                yield _pop(pending, ordered)
+        while pending:
+            yield _pop(pending, ordered)
+    finally:
+        for future, _ in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=True)
+
+def _pop(pending, ordered):
+    """Remove the next finished future from pending and return its result"""
+    if ordered:
+        future, item = pending.popleft()
+    else:
+        done, _ = wait([f for f, _ in pending], return_when=FIRST_COMPLETED)
+        index = next(i for i, (f, _) in enumerate(pending) if f in done)
+        future, item = pending[index]
+        del pending[index]
+
+    try:
+        return item, future.result()
+    except Exception as error:
+        logger.debug(f'Failed to process {item}: {error}')
+        return item, error
@@ -0,0 +1,116 @@
+import logging
+import threading
+from fdpclient import DATA_FORMATS
+
+logger = logging.getLogger(__name__)
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+#: The formats preferred for reads when they have a parser backend, in order
+PREFERRED_FORMATS = ('nt',)
+
+def register_parser(format, parser, name=None):
+    """Register a parser backend for a format.
+
+    A backend is tried before the backends registered earlier and before
+    rdflib. It is called with the document, a ``str`` or ``bytes``, and
+    returns its ``(subject, predicate, object)`` triples of rdflib terms. It
+    raises :class:`ValueError` or
+    :class:`rdflib.plugins.parsers.ntriples.ParseError` to hand a document it
+    does not support over to the next backend.
+
+    Args:
+        format(str): the format, one of :const:`fdpclient.config.DATA_FORMATS`.
+        parser(callable): the backend.
+        name(str, optional): the name of the backend, replacing a backend
+            registered with the same name. Defaults to `None`, i.e. the name
+            of the callable.
+
+    Examples:
+        >>> register_parser('turtle', fast_turtle.parse, name='fast_turtle')
+    """
+    if format not in DATA_FORMATS:
+        raise ValueError(f'Invalid format: {format}')
+    name = name or getattr(parser, '__name__', repr(parser))
+    with _backends_lock:
+        backends = [b for b in _backends.get(format, []) if b[0] != name]
+        _backends[format] = [(name, parser)] + backends
+
+def unregister_parser(format, name):
+    """Remove a parser backend.
+
+    Args:
+        format(str): the format of the backend.
+        name(str): the name of the backend.
+
+    Returns:
+        bool: whether the backend was registered.
+    """
+    with _backends_lock:
+        backends = _backends.get(format, [])
+        kept = [b for b in backends if b[0] != name]
+        _backends[format] = kept
+        return len(kept) < len(backends)
+
+def parser_backends(format):
+    """Return the names of the parser backends of a format, in the order
+    they are tried, without 'rdflib' which is always tried last.
+
+    Args:
+        format(str): the format.
+
+    Returns:
+        list of str: the names of the backends.
+    """
+    with _backends_lock:
+        return [name for name, _ in _backends.get(format, [])]
+
+def preferred_format():
+    """Return the format to read metadata in by default.
+
+    Returns:
+        str: the first of :const:`PREFERRED_FORMATS` with a parser backend,
+        otherwise 'turtle'.
+    """
+    for format in PREFERRED_FORMATS:
+        if parser_backends(format):
+            return format
+    return 'turtle'
+
+def parse(data, format, graph):
+    """Parse a document into a graph with the fastest backend able to.
+
+    The backends of the format are tried in order, then rdflib. N-Triples
+    are parsed by the rdflib Turtle parser: Turtle is a superset of
+    N-Triples, and some servers answer a request for N-Triples with Turtle.
+
+    Args:
+        data(str or bytes): the document.
+        format(str): the format of the document.
+        graph(:class:`rdflib.Graph`): the graph to add the triples to.
+
+    Returns:
+        :class:`rdflib.Graph`: the graph.
+    """
+    from rdflib.plugins.parsers.ntriples import ParseError
+    with _backends_lock:
+        backends = list(_backends.get(format, []))
+    for name, parser in backends:
+        try:
+            triples = list(parser(data))
+        except (ValueError, ParseError) as e:
+            logger.debug(f'Parser {name} failed, trying the next one: {e}')
+            continue
+        graph.addN((s, p, o, graph) for s, p, o in triples)
+        return graph
+    graph.parse(data=data, format='turtle' if format == 'nt' else format)
+    return graph
+
+def _parse_ntriples(data):
+    """The N-Triples backend, importing rdflib on its first document"""
+    from fdpclient import ntriples
+    return ntriples.parse(data)
+
+
+register_parser('nt', _parse_ntriples, name='ntriples')
@@ -0,0 +1,259 @@
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+#: HTTP statuses telling that the server is overloaded
+OVERLOAD_STATUSES = (429, 503)
+
+class TokenBucket:
+    """A thread-safe token bucket.
+
+    Tokens are added at ``rate`` per second up to ``capacity``, and each
+    request takes one, so that requests are sent at ``rate`` per second on
+    average with bursts of at most ``capacity``.
+
+    Args:
+        rate(float): the tokens added per second.
+        capacity(float, optional): the maximum number of tokens, and the
+            initial number. Defaults to `None`, i.e. ``max(rate, 1)``.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError(f'Invalid rate: {rate}')
+        self.rate = rate
+        self.capacity = max(rate, 1) if capacity is None else capacity
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available, without waiting.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise the time in seconds
+            until they are available.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """Take tokens, waiting until they are available."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """Limit the request rate per host and per operation with token buckets.
+
+    Each host has its own buckets, so one limiter may be shared by the
+    clients and threads of a process. A request waits for a token of its
+    operation bucket if ``operations`` has a rate for it, otherwise of the
+    bucket of all its other operations, at the rate of its host in ``hosts``
+    or else at ``rate``.
+
+    Args:
+        rate(float, optional): the requests per second per host.
+            Defaults to `None`, i.e. no limit except per operation and for
+            the ``hosts``.
+        burst(float, optional): the maximum burst of requests.
+            Defaults to `None`, i.e. ``max(rate, 1)``.
+        operations(dict, optional): the requests per second per host of
+            operations with their own limit, e.g. ``{'create': 1}``.
+            Defaults to `None`.
+        hosts(dict, optional): the requests per second of hosts with their
+            own limit instead of ``rate``, by host name with the port if any,
+            e.g. ``{'fdp.example.org': 5}``. Defaults to `None`.
+
+    Examples:
+        >>> limiter = RateLimiter(rate=20, operations={'create': 2},
+        ...                       hosts={'fdp.example.org': 5})
+        >>> client = Client('http://fdp.fairdatapoint.nl', limiter=limiter)
+    """
+
+    def __init__(self, rate=None, burst=None, operations=None, hosts=None):
+        hosts = {host.lower(): value for host, value in (hosts or {}).items()}
+        for value in [rate, *hosts.values()]:
+            if value is not None and value <= 0:
+                raise ValueError(f'Invalid rate: {value}')
+        self.rate = rate
+        self.burst = burst
+        self.operations = dict(operations or {})
+        self.hosts = hosts
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url, operation):
+        """Return the bucket of a request, `None` if it is not limited.
+
+        Args:
+            url(str): the URL of the request.
+            operation(str): the request operation, e.g. 'read'.
+
+        Returns:
+            :class:`TokenBucket`: the bucket.
+        """
+        host = _host(url)
+        rate = self.operations.get(operation)
+        key = (host, operation if rate is not None else None)
+        if rate is None:
+            rate = self.hosts.get(host, self.rate)
+            if rate is None:
+                return None
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rate, self.burst)
+            return bucket
+
+    def acquire(self, url, operation):
+        """Wait until a request may be sent.
+
+        Args:
+            url(str): the URL of the request.
+            operation(str): the request operation, e.g. 'read'.
+        """
+        bucket = self.bucket(url, operation)
+        if bucket is not None:
+            bucket.acquire()
+
+    def release(self, token, status=None, elapsed=None):
+        """Record the end of a request, nothing to do for a rate limit."""
+
+
+class AdaptiveConcurrency:
+    """Limit the concurrent requests, adapting the limit to the server.
+
+    The limit is adjusted like the TCP congestion window (additive increase,
+    multiplicative decrease): it grows by ``1 / limit`` with each successful
+    response, i.e. by about 1 per round of requests, and is multiplied by
+    ``decrease`` when the server answers 429 or 503, or when a response takes
+    more than ``latency_tolerance`` times the fastest response seen. It is
+    decreased at most once per round: responses to requests sent before the
+    last decrease do not decrease it again.
+
+    The limit is shared by all hosts, use one instance per server. A
+    streamed response, e.g. of :meth:`fdpclient.client.Client.iter_catalog`,
+    holds its slot until it is closed, i.e. its body is read.
+
+    Args:
+        initial(int, optional): the initial limit. Defaults to 4.
+        min_limit(int, optional): the minimum limit. Defaults to 1.
+        max_limit(int, optional): the maximum limit. Defaults to 64.
+        decrease(float, optional): the factor of a decrease. Defaults to 0.5.
+        latency_tolerance(float, optional): the ratio of the response time
+            to the fastest response time considered as congestion.
+            Defaults to `None`, i.e. only 429 and 503 decrease the limit.
+
+    Examples:
+        >>> limiter = AdaptiveConcurrency(initial=4, max_limit=32)
+        >>> client = Client('http://fdp.fairdatapoint.nl', limiter=limiter)
+        >>> for url, type, g in client.harvest(workers=32):
+        ...     pass
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=64, decrease=0.5,
+                 latency_tolerance=None):
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError(f'Invalid limits: min_limit={min_limit}, '
+                             + f'initial={initial}, max_limit={max_limit}')
+        if not 0 < decrease < 1:
+            raise ValueError(f'Invalid decrease: {decrease}')
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.min_latency = None
+        self._limit = float(initial)
+        self._decreased = time.monotonic()
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self):
+        """int: the current maximum number of concurrent requests."""
+        return int(self._limit)
+
+    def acquire(self, url=None, operation=None):
+        """Wait for a free slot.
+
+        Returns:
+            float: the token of the request, to pass to :meth:`release`.
+        """
+        with self._condition:
+            while self.in_flight >= int(self._limit):
+                self._condition.wait()
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, token, status=None, elapsed=None):
+        """Free the slot of a request and adapt the limit to its outcome.
+
+        Args:
+            token(float): the token returned by :meth:`acquire`.
+            status(int, optional): the HTTP status, `None` if the request
+                failed without a response.
+            elapsed(float, optional): the response time in seconds.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if elapsed is not None and status not in OVERLOAD_STATUSES:
+                if self.min_latency is None or elapsed < self.min_latency:
+                    self.min_latency = elapsed
+            if self._congested(status, elapsed):
+                if token >= self._decreased:
+                    self._limit = max(self.min_limit, self._limit * self.decrease)
+                    self._decreased = time.monotonic()
+                    logger.debug(f'Concurrency limit decreased to {self.limit}')
+            elif status is not None:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            self._condition.notify_all()
+
+    def _congested(self, status, elapsed):
+        if status in OVERLOAD_STATUSES:
+            return True
+        return (self.latency_tolerance is not None and elapsed is not None
+                and self.min_latency is not None
+                and elapsed > self.latency_tolerance * self.min_latency)
+
+
+class LimiterChain:
+    """Apply several limiters to each request, e.g. a :class:`RateLimiter`
+    and an :class:`AdaptiveConcurrency`.
+
+    Args:
+        *limiters: the limiters, acquired in order.
+    """
+
+    def __init__(self, *limiters):
+        self.limiters = limiters
+
+    def acquire(self, url, operation):
+        """Wait until all the limiters allow the request.
+
+        Returns:
+            list: the tokens of the limiters.
+        """
+        return [limiter.acquire(url, operation) for limiter in self.limiters]
+
+    def release(self, token, status=None, elapsed=None):
+        """Release the request in all the limiters."""
+        for limiter, t in zip(self.limiters, token):
+            limiter.release(t, status, elapsed)
+
+def _host(url):
+    return urlsplit(url).netloc.lower()
@@ -0,0 +1,192 @@
+import logging
+import random
+import sys
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import requests
+
+from fdpclient.exceptions import RETRYABLE_STATUSES
+
+logger = logging.getLogger(__name__)
+
+#: Operations that can be repeated without changing the result
+IDEMPOTENT_OPERATIONS = ('read', 'update', 'delete')
+
+class RetryBudget:
+    """Limit the retries to a fraction of the requests.
+
+    Each request deposits ``ratio`` tokens and each retry withdraws one, with
+    at most ``burst`` tokens saved up. When the server fails for a long time,
+    the retries are limited to ``ratio`` times the requests instead of
+    multiplying the load on the server. A budget is thread-safe and may be
+    shared by several policies.
+
+    Args:
+        ratio(float, optional): the retries allowed per request.
+            Defaults to 0.2.
+        burst(int, optional): the maximum number of retries allowed at once,
+            and the initial number of tokens. Defaults to 10.
+    """
+
+    def __init__(self, ratio=0.2, burst=10):
+        if ratio < 0:
+            raise ValueError(f'Invalid retry budget ratio: {ratio}')
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = float(burst)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """Record a request."""
+        with self._lock:
+            self._tokens = min(self._tokens + self.ratio, self.burst)
+
+    def withdraw(self):
+        """Take a token for a retry.
+
+        Returns:
+            bool: whether the retry is allowed.
+        """
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+class RetryPolicy:
+    """When and how long to wait before repeating a failed request.
+
+    A request is retried after a connection error or timeout, or a response
+    with one of ``statuses``, if its operation is one of ``operations``. The
+    wait before retry ``n`` (from 0) is drawn uniformly from 0 to
+    ``backoff_factor * 2 ** n`` seconds ("full jitter"), capped at
+    ``max_backoff``. A ``Retry-After`` header of the response is waited for
+    instead if it asks for longer; if it asks for more than ``max_backoff``
+    the request is not retried, so that the caller can shed the load.
+
+    Creates are not idempotent, a retried create may create the metadata
+    twice, so they are retried only if 'create' is added to ``operations``.
+
+    Args:
+        max_retries(int, optional): the maximum number of retries of a
+            request. Defaults to 3.
+        backoff_factor(float, optional): the base wait in seconds.
+            Defaults to 0.5.
+        max_backoff(float, optional): the maximum wait in seconds.
+            Defaults to 30.
+        jitter(bool, optional): whether to randomize the waits.
+            Defaults to `True`.
+        statuses(iterable of int, optional): the HTTP statuses to retry.
+            Defaults to :const:`fdpclient.exceptions.RETRYABLE_STATUSES`,
+            i.e. 408, 429, 502, 503 and 504.
+        operations(iterable of str, optional): the operations to retry.
+            Defaults to :const:`IDEMPOTENT_OPERATIONS`.
+        budget(:class:`RetryBudget`, optional): the budget limiting the
+            retries. Defaults to `None`, i.e. no limit.
+
+    Examples:
+        >>> policy = RetryPolicy(max_retries=5, budget=RetryBudget(0.1))
+        >>> client = Client('http://fdp.fairdatapoint.nl', retry=policy)
+    """
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, max_backoff=30.0,
+                 jitter=True, statuses=RETRYABLE_STATUSES,
+                 operations=IDEMPOTENT_OPERATIONS, budget=None):
+        if max_retries < 0:
+            raise ValueError(f'Invalid max_retries: {max_retries}')
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.operations = frozenset(operations)
+        self.budget = budget
+
+    @property
+    def errors(self):
+        """tuple: the connection errors retried, of requests and of httpx.
+
+        httpx is not imported here, which would slow down the import of the
+        synchronous client: its errors cannot be raised before it is.
+        """
+        errors = (requests.ConnectionError, requests.Timeout)
+        httpx = sys.modules.get('httpx')
+        if httpx is not None:
+            errors += (httpx.TransportError,)
+        return errors
+
+    def backoff(self, attempt):
+        """The wait before a retry, without ``Retry-After``.
+
+        Args:
+            attempt(int): the number of retries done before.
+
+        Returns:
+            float: the wait in seconds.
+        """
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** attempt)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def delay(self, operation, attempt, status=None, headers=None, error=None):
+        """Decide whether to retry a failed request and how long to wait.
+
+        Args:
+            operation(str): the request operation, e.g. 'read'.
+            attempt(int): the number of retries done before.
+            status(int, optional): the HTTP status of the response.
+            headers(dict, optional): the headers of the response.
+            error(Exception, optional): the error raised instead of a
+                response.
+
+        Returns:
+            float: the wait in seconds before retrying, `None` not to retry.
+        """
+        if operation not in self.operations or attempt >= self.max_retries:
+            return None
+        if error is not None:
+            if not isinstance(error, self.errors):
+                return None
+        elif status not in self.statuses:
+            return None
+
+        delay = self.backoff(attempt)
+        retry_after = parse_retry_after((headers or {}).get('Retry-After'))
+        if retry_after is not None:
+            if retry_after > self.max_backoff:
+                logger.debug(f'Not retrying, Retry-After {retry_after}s exceeds the maximum')
+                return None
+            delay = max(delay, retry_after)
+        if self.budget is not None and not self.budget.withdraw():
+            logger.debug('Not retrying, the retry budget is exhausted')
+            return None
+        return delay
+
+    def record_request(self):
+        """Record a new request in the budget, if any."""
+        if self.budget is not None:
+            self.budget.deposit()
+
+def parse_retry_after(value):
+    """Parse the value of a ``Retry-After`` header.
+
+    Args:
+        value(str): the header value, in seconds or an HTTP date.
+
+    Returns:
+        float: the wait in seconds, `None` if the value is missing or invalid.
+    """
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(date.timestamp() - time.time(), 0.0)
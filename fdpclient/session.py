@@ -0,0 +1,55 @@
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+def create_session(pool_connections=10, pool_maxsize=10, pool_block=False,
+                   max_retries=0, backoff_factor=0, keep_alive=True):
+    """Create a pooled HTTP session for connecting to FAIR Data Point servers.
+
+    The session keeps connections alive between requests, so that consecutive
+    requests to the same host reuse the TCP (and TLS) connection instead of
+    doing a new handshake for every metadata call.
+
+    Args:
+        pool_connections(int, optional): the number of per-host connection
+            pools to cache. Defaults to 10.
+        pool_maxsize(int, optional): the maximum number of connections to
+            keep in each per-host pool. Defaults to 10.
+        pool_block(bool, optional): whether to block when a per-host pool has
+            no free connection, i.e. whether ``pool_maxsize`` is a hard limit
+            of concurrent connections per host. Defaults to `False`.
+        max_retries(int, optional): the number of retries of failed
+            connections and of 502, 503 and 504 responses for idempotent
+            requests. Defaults to 0.
+        backoff_factor(float, optional): the backoff factor between retries,
+            see :class:`urllib3.util.retry.Retry`. Defaults to 0.
+        keep_alive(bool, optional): whether to keep connections alive between
+            requests. Defaults to `True`.
+
+    Returns:
+        :class:`requests.Session`: the configured session.
+
+    Examples:
+        >>> session = create_session(pool_maxsize=20, max_retries=3)
+        >>> client = Client('http://fdp.fairdatapoint.nl', session=session)
+    """
+    retries = Retry(total=max_retries,
+                    backoff_factor=backoff_factor,
+                    status_forcelist=(502, 503, 504),
+                    raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          pool_block=pool_block,
+                          max_retries=retries)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    logger.debug(f'Created session with pool_connections={pool_connections}, '
+                 + f'pool_maxsize={pool_maxsize}, max_retries={max_retries}')
+    return session
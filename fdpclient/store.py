@@ -0,0 +1,328 @@
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice, repeat
+from operator import add, mul
+from rdflib import Graph
+from rdflib.store import Store
+
+#: The minimum number of pending triples merged into the indexes
+MIN_MERGE = 4096
+#: The number of matching triples copied at a time under the lock
+CHUNK = 1024
+
+class CompactStore(Store):
+    """A compact in-memory rdflib store for large read-only metadata graphs.
+
+    The terms are interned: each distinct IRI, literal or blank node is kept
+    once in a term table and the triples are stored as three arrays of
+    integer term IDs, sorted by subject, predicate and object (SPO). A second
+    permutation sorted by predicate, object and subject (POS) answers the
+    patterns with a bound predicate, the patterns with a bound subject are
+    answered by binary search on the arrays themselves, and the patterns
+    with only the object bound by a scan.
+
+    Added triples are buffered in arrays and merged into the sorted arrays
+    before the next query or when the buffer holds more than a quarter of the
+    triples: only the buffered triples are sorted, and the sorted arrays are
+    copied around them into new arrays. Removing triples rebuilds the arrays:
+    the store is meant for data written once and read many times, e.g.
+    harvested metadata.
+
+    The matching triples of a query are copied :const:`CHUNK` at a time under
+    the lock of the store, from the arrays at the start of the query, so a
+    query does not hold the lock or copy all its triples at once, and sees
+    none of the triples added meanwhile.
+
+    The store keeps no named graphs: it accepts the contexts of the parsers
+    that need them, e.g. JSON-LD, but merges their triples, and all graphs
+    using the same store share its triples. The quoted triples of N3
+    formulas are ignored.
+
+    Examples:
+        >>> g = rdflib.Graph(store=CompactStore())
+        >>> g.parse('catalog.ttl')
+        >>> g = client.read_catalog('catalog01', store=CompactStore)
+    """
+
+    context_aware = True
+    formula_aware = True
+    graph_aware = True
+    transaction_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        super().__init__(configuration)
+        self.identifier = identifier
+        self._ids = {}
+        self._terms = []
+        self._s = array('l')
+        self._p = array('l')
+        self._o = array('l')
+        self._pos = array('l')
+        self._radix = 1
+        self._pending = (array('l'), array('l'), array('l'))
+        self._namespaces = {}
+        self._prefixes = {}
+        self._lock = threading.RLock()
+
+    def _intern(self, term):
+        id = self._ids.get(term)
+        if id is None:
+            id = self._ids[term] = len(self._terms)
+            self._terms.append(term)
+        return id
+
+    def term_count(self):
+        """int: the number of distinct terms."""
+        return len(self._terms)
+
+    def add(self, triple, context=None, quoted=False):
+        """Add a triple to the store."""
+        if quoted:
+            return
+        Store.add(self, triple, context, quoted)
+        with self._lock:
+            for column, term in zip(self._pending, triple):
+                column.append(self._intern(term))
+            if len(self._pending[0]) >= max(MIN_MERGE, len(self._s) // 4):
+                self._merge()
+
+    def remove(self, triple, context=None):
+        """Remove the triples matching a pattern from the store."""
+        with self._lock:
+            self._merge()
+            removed = set(self._match(triple))
+            if removed:
+                kept = [i for i in range(len(self._s)) if i not in removed]
+                self._s = array('l', (self._s[i] for i in kept))
+                self._p = array('l', (self._p[i] for i in kept))
+                self._o = array('l', (self._o[i] for i in kept))
+                self._index()
+
+    def triples(self, triple, context=None):
+        """Yield the triples matching a pattern, with their contexts."""
+        contexts = () if context is None else (context,)
+        positions = None
+        while True:
+            with self._lock:
+                if positions is None:
+                    self._merge()
+                    terms, S, P, O = self._terms, self._s, self._p, self._o
+                    positions = self._match(triple)
+                rows = [(terms[S[i]], terms[P[i]], terms[O[i]])
+                        for i in islice(positions, CHUNK)]
+            if not rows:
+                return
+            for row in rows:
+                yield row, iter(contexts)
+
+    def __len__(self, context=None):
+        with self._lock:
+            self._merge()
+            return len(self._s)
+
+    def contexts(self, triple=None):
+        return iter(())
+
+    def add_graph(self, graph):
+        pass
+
+    def remove_graph(self, graph):
+        pass
+
+    def bind(self, prefix, namespace, override=True):
+        if not override and (prefix in self._namespaces or namespace in self._prefixes):
+            return
+        old = self._namespaces.pop(prefix, None)
+        if old is not None:
+            self._prefixes.pop(old, None)
+        self._prefixes.pop(namespace, None)
+        self._namespaces[prefix] = namespace
+        self._prefixes[namespace] = prefix
+
+    def namespace(self, prefix):
+        return self._namespaces.get(prefix)
+
+    def prefix(self, namespace):
+        return self._prefixes.get(namespace)
+
+    def namespaces(self):
+        yield from self._namespaces.items()
+
+    def _merge(self):
+        """Merge the pending triples into the sorted arrays"""
+        if not self._pending[0]:
+            return
+        # A triple is sorted as the integer s*r² + p*r + o, which is much
+        # faster to sort than a tuple
+        r = max(len(self._terms), 1)
+        rr = r * r
+        added = sorted({s * rr + p * r + o for s, p, o in zip(*self._pending)})
+        self._pending = (array('l'), array('l'), array('l'))
+        S, P, O, old_pos = self._s, self._p, self._o, self._pos
+        n = len(S)
+
+        # copy the runs of sorted triples between the added ones, keeping the
+        # new position of each old triple to update the POS permutation
+        new_s, new_p, new_o = array('l'), array('l'), array('l')
+        moved, fresh = array('l'), []
+        i = 0
+        positions = _positions(lambda a, b: _keys(S, P, O, r, range(a, b)), n, added)
+        for key, (stop, found) in zip(added, positions):
+            moved.extend(range(len(new_s), len(new_s) + stop - i))
+            new_s.extend(S[i:stop])
+            new_p.extend(P[i:stop])
+            new_o.extend(O[i:stop])
+            i = stop
+            if found:
+                continue
+            sp, o = divmod(key, r)
+            s, p = divmod(sp, r)
+            fresh.append((p * rr + o * r + s, len(new_s)))
+            new_s.append(s)
+            new_p.append(p)
+            new_o.append(o)
+        moved.extend(range(len(new_s), len(new_s) + n - i))
+        new_s.extend(S[i:])
+        new_p.extend(P[i:])
+        new_o.extend(O[i:])
+
+        # the old triples keep their POS order, the added ones are inserted
+        fresh.sort()
+        old = array('l', map(moved.__getitem__, old_pos))
+        pos = array('l')
+        i = 0
+        positions = _positions(lambda a, b: _keys(P, O, S, r, old_pos[a:b]), n,
+                               [key for key, _ in fresh])
+        for (_, j), (stop, _) in zip(fresh, positions):
+            pos.extend(old[i:stop])
+            pos.append(j)
+            i = stop
+        pos.extend(old[i:])
+        self._s, self._p, self._o, self._pos = new_s, new_p, new_o, pos
+        self._radix = r
+
+    def _index(self):
+        """Rebuild the POS permutation of the arrays"""
+        r = self._radix = max(len(self._terms), 1)
+        rr = r * r
+        S, P, O = self._s, self._p, self._o
+        self._pos = array('l', sorted(range(len(S)),
+                                      key=lambda i: P[i] * rr + O[i] * r + S[i]))
+
+    def _range(self, order, prefix, columns):
+        """Return the positions in an order of the keys starting with prefix"""
+        r = self._radix
+        a, b, c = columns
+
+        def key(i):
+            if order is not None:
+                i = order[i]
+            return (a[i] * r + b[i]) * r + c[i]
+
+        low = 0
+        for id in prefix:
+            low = low * r + id
+        span = r ** (3 - len(prefix))
+        return (_bisect(key, low * span, len(a)),
+                _bisect(key, (low + 1) * span, len(a)))
+
+    def _match(self, triple):
+        """Yield the positions of the triples matching a pattern"""
+        ids = []
+        for term in triple:
+            if term is None:
+                ids.append(None)
+                continue
+            id = self._ids.get(term)
+            if id is None:
+                return
+            ids.append(id)
+        s, p, o = ids
+        S, P, O = self._s, self._p, self._o
+
+        if s is not None:
+            prefix = (s,) if p is None else (s, p) if o is None else (s, p, o)
+            start, stop = self._range(None, prefix, (S, P, O))
+            for i in range(start, stop):
+                if o is None or O[i] == o:
+                    yield i
+        elif p is not None:
+            prefix = (p,) if o is None else (p, o)
+            start, stop = self._range(self._pos, prefix, (P, O, S))
+            yield from self._pos[start:stop]
+        elif o is not None:
+            for i, id in enumerate(O):
+                if id == o:
+                    yield i
+        else:
+            yield from range(len(S))
+
+def _bisect(key, value, n):
+    """Return the first position in range(n) whose key is not below value"""
+    low, high = 0, n
+    while low < high:
+        mid = (low + high) // 2
+        if key(mid) < value:
+            low = mid + 1
+        else:
+            high = mid
+    return low
+
+def _keys(a, b, c, r, positions):
+    """Return the sort keys (a*r + b)*r + c of the triples at positions"""
+    return list(map(add,
+                    map(mul, map(add, map(mul, map(a.__getitem__, positions), repeat(r)),
+                                 map(b.__getitem__, positions)), repeat(r)),
+                    map(c.__getitem__, positions)))
+
+def _positions(keys, n, added):
+    """Yield the position of each sorted added key in n sorted keys, and
+    whether it is one of them, computing the keys a block at a time"""
+    j = 0
+    for start in range(0, n, MIN_MERGE):
+        block = keys(start, min(start + MIN_MERGE, n))
+        stop = bisect_right(added, block[-1], j)
+        for key in islice(added, j, stop):
+            k = bisect_left(block, key)
+            yield start + k, block[k] == key
+        j = stop
+    for _ in range(j, len(added)):
+        yield n, False
+
+
+def compact_graph(graph=None):
+    """Create a :class:`rdflib.Graph` backed by a :class:`CompactStore`.
+
+    Args:
+        graph(:class:`rdflib.Graph`, optional): a graph to copy the triples
+            and namespace bindings of. Defaults to `None`.
+
+    Returns:
+        :class:`rdflib.Graph`: the graph.
+    """
+    g = Graph(store=CompactStore())
+    if graph is not None:
+        for prefix, namespace in graph.namespaces():
+            g.bind(prefix, namespace, override=True)
+        g += graph
+    return g
+
+
+class _TripleSink(Store):
+    """Store collecting the parsed triples, without indexing them"""
+    context_aware = True
+    formula_aware = True
+    graph_aware = True
+
+    def __init__(self, predicates=None):
+        super().__init__()
+        self.predicates = predicates
+        self.collected = []
+
+    def add(self, triple, context, quoted=False):
+        if not quoted and (self.predicates is None or triple[1] in self.predicates):
+            self.collected.append(triple)
+
+    def add_graph(self, graph):
+        pass
@@ -0,0 +1,332 @@
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from datetime import timedelta
+from fdpclient.session import create_session
+
+# httpx is imported by the HTTP/2 transport only, as it is slow to import
+
+logger = logging.getLogger(__name__)
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+def register_transport(name, factory):
+    """Register a transport, i.e. a factory of sessions to send requests with.
+
+    A session is any object with the ``get``, ``post``, ``put``, ``delete``
+    and ``close`` methods of :class:`requests.Session`, returning responses
+    with the attributes of :class:`requests.Response` that
+    :mod:`fdpclient.operations` uses: ``status_code``, ``reason``,
+    ``headers``, ``elapsed``, ``content``, ``text``, ``raw`` and ``close``.
+
+    Args:
+        name(str): the name of the transport, replacing a transport
+            registered with the same name.
+        factory(callable): the callable creating a session from keyword
+            arguments.
+    """
+    with _transports_lock:
+        _transports[name] = factory
+
+def transports():
+    """Return the names of the registered transports.
+
+    Returns:
+        list of str: the names, 'http1' and 'http2' by default.
+    """
+    with _transports_lock:
+        return sorted(_transports)
+
+def create_transport(name='http1', **kwargs):
+    """Create a session of a transport.
+
+    Args:
+        name(str, optional): the name of the transport, 'http1' for a pooled
+            :class:`requests.Session`, see
+            :func:`fdpclient.session.create_session`, or 'http2' for a
+            :class:`HTTP2Transport`. Defaults to 'http1'.
+        **kwargs: the arguments of the factory of the transport.
+
+    Raises:
+        ValueError: the transport is not registered.
+
+    Returns:
+        the session.
+
+    Examples:
+        >>> session = create_transport('http2', http1=False)
+        >>> client = Client('http://fdp.fairdatapoint.nl', session=session)
+    """
+    with _transports_lock:
+        factory = _transports.get(name)
+    if factory is None:
+        raise ValueError(f'Invalid transport: {name}')
+    logger.debug(f'Create a {name} transport')
+    return factory(**kwargs)
+
+
+class HTTP2Transport:
+    """Send requests over HTTP/2 with an :class:`httpx.AsyncClient`.
+
+    The requests to a host are multiplexed on a single connection, so many
+    concurrent reads, e.g. of :meth:`fdpclient.client.Client.read_many`, do
+    not need one connection each as with HTTP/1.1. The transport is used as
+    the ``session`` of the operations and of the client, and requires the
+    ``http2`` extra.
+
+    The HTTP client runs on an event loop in a daemon thread of the
+    transport, and the requests of any thread are sent on it: the HTTP/2
+    connection state is then only used from that thread, as the synchronous
+    httpx client does not support concurrent streams from several threads.
+    The connections are closed and the thread stopped by :meth:`close`, or
+    else when the transport is garbage collected or at interpreter exit.
+
+    Args:
+        http1(bool, optional): whether to use HTTP/1.1 with the servers not
+            negotiating HTTP/2 in the TLS handshake. Plain 'http' URLs are
+            then sent over HTTP/1.1, and with `False` over HTTP/2 with prior
+            knowledge. Defaults to `True`.
+        max_connections(int, optional): the maximum number of connections.
+            Defaults to `None`, i.e. no limit.
+        **kwargs: Optional arguments that :class:`httpx.AsyncClient` takes,
+            e.g. ``verify``, ``timeout`` or ``transport``.
+
+    Attributes:
+        client(:class:`httpx.AsyncClient`): the HTTP client.
+
+    Examples:
+        >>> with HTTP2Transport() as session:
+        ...     client = Client('https://fdp.fairdatapoint.nl', session=session)
+        ...     graphs = dict(client.read_many('catalog', ids, workers=32))
+    """
+
+    def __init__(self, http1=True, max_connections=None, **kwargs):
+        try:
+            import httpx
+        except ImportError: # pragma: no cover
+            raise ImportError('HTTP2Transport requires httpx, install '
+                              + 'fairdatapoint-client[http2]')
+        # the defaults of requests: follow redirects and no timeout
+        kwargs.setdefault('follow_redirects', True)
+        kwargs.setdefault('timeout', None)
+        limits = httpx.Limits(max_connections=max_connections,
+                              max_keepalive_connections=max_connections)
+        self.client = httpx.AsyncClient(http1=http1, http2=True, limits=limits, **kwargs)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True,
+                                        name='fdpclient-http2')
+        self._thread.start()
+        self._finalizer = weakref.finalize(self, _shutdown, self.client, self._loop,
+                                           self._thread)
+
+    def _call(self, coroutine):
+        """Run a coroutine on the event loop of the transport"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def request(self, method, url, data=None, stream=False, allow_redirects=None,
+                **kwargs):
+        """Send a request.
+
+        Args:
+            method(str): the HTTP method.
+            url(str): the URL.
+            data(str, bytes or file-like object, optional): the request body.
+                Defaults to `None`.
+            stream(bool, optional): whether to read the response body from
+                its ``raw`` stream instead of at once. Defaults to `False`.
+            allow_redirects(bool, optional): whether to follow redirects.
+                Defaults to `None`, i.e. the setting of the client.
+            **kwargs: Optional arguments that
+                :meth:`httpx.AsyncClient.build_request` takes, and ``auth``.
+
+        Returns:
+            :class:`HTTP2Response`: the response.
+        """
+        if hasattr(data, 'read'):
+            data = data.read()
+        send = {}
+        if 'auth' in kwargs:
+            send['auth'] = kwargs.pop('auth')
+        if allow_redirects is not None:
+            send['follow_redirects'] = allow_redirects
+        request = self.client.build_request(method.upper(), url, content=data, **kwargs)
+        response, elapsed = self._call(self._send(request, stream, send))
+        return HTTP2Response(response, elapsed, self._call)
+
+    async def _send(self, request, stream, send):
+        """Send a request and read its body unless streamed, in one call
+        from the thread of the request"""
+        start = time.perf_counter()
+        response = await self.client.send(request, stream=True, **send)
+        elapsed = time.perf_counter() - start
+        if not stream:
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+        return response, elapsed
+
+    def get(self, url, **kwargs):
+        return self.request('get', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('post', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('put', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('delete', url, **kwargs)
+
+    def close(self):
+        """Close the connections of the client and stop its event loop."""
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _shutdown(client, loop, thread):
+    """Close the connections of an HTTP client and stop its event loop
+    thread, without referencing the transport so it can be collected"""
+    if threading.current_thread() is thread:
+        # collected on the loop thread, which cannot wait for itself
+        loop.call_soon(loop.stop)
+        return
+    asyncio.run_coroutine_threadsafe(client.aclose(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+class HTTP2Response:
+    """A :class:`httpx.Response` with the attributes of a
+    :class:`requests.Response` used by :mod:`fdpclient.operations`.
+
+    Args:
+        response(:class:`httpx.Response`): the streamed response.
+        elapsed(float): the time until the response headers were received,
+            in seconds.
+        call(callable): the function running a coroutine on the event loop
+            of the response.
+
+    Attributes:
+        status_code(int): the response status.
+        reason(str): the reason phrase, empty over HTTP/2.
+        headers(:class:`httpx.Headers`): the case-insensitive headers.
+        elapsed(:class:`datetime.timedelta`): the time until the response
+            headers were received.
+        http_version(str): the protocol of the response, e.g. 'HTTP/2'.
+        raw: the decoded byte stream of the body, whose ``tell`` returns the
+            number of bytes received before decoding.
+    """
+
+    def __init__(self, response, elapsed, call):
+        self.response = response
+        self.url = str(response.url)
+        self.status_code = response.status_code
+        self.reason = response.reason_phrase
+        self.headers = response.headers
+        self.elapsed = timedelta(seconds=elapsed)
+        self.http_version = response.http_version
+        self.raw = _RawStream(response, call)
+        self._call = call
+
+    @property
+    def content(self):
+        """bytes: the body, decoded from its content coding."""
+        from httpx import ResponseNotRead
+        try:
+            return self.response.content
+        except ResponseNotRead:
+            return self._call(self.response.aread())
+
+    @property
+    def links(self):
+        """dict: the parsed ``Link`` header, keyed by relation."""
+        return self.response.links
+
+    @property
+    def text(self):
+        """str: the body text."""
+        self.content
+        return self.response.text
+
+    def close(self):
+        if not self.response.is_closed:
+            self._call(self.response.aclose())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _RawStream:
+    """The decoded body of a streamed httpx response as a file-like object"""
+
+    def __init__(self, response, call):
+        self._response = response
+        self._call = call
+        self._chunks = None
+        self._buffer = b''
+        # set by the operations on requests responses, always decoded here
+        self.decode_content = True
+
+    async def _anext(self):
+        if self._chunks is None:
+            self._chunks = self._response.aiter_bytes()
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    def _next(self):
+        chunk = self._call(self._anext())
+        if chunk is not None:
+            self._buffer += chunk
+        return chunk is not None
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            chunks = [self._buffer]
+            chunk = self._call(self._anext())
+            while chunk is not None:
+                chunks.append(chunk)
+                chunk = self._call(self._anext())
+            self._buffer = b''
+            return b''.join(chunks)
+        while len(self._buffer) < size and self._next():
+            pass
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readline(self, size=-1):
+        while b'\n' not in self._buffer and self._next():
+            pass
+        end = self._buffer.find(b'\n') + 1 or len(self._buffer)
+        if size is not None and size >= 0:
+            end = min(end, size)
+        data, self._buffer = self._buffer[:end], self._buffer[end:]
+        return data
+
+    def readable(self):
+        return True
+
+    def tell(self):
+        return self._response.num_bytes_downloaded
+
+    def close(self):
+        if not self._response.is_closed:
+            self._call(self._response.aclose())
+
+
+register_transport('http1', create_session)
+register_transport('http2', HTTP2Transport)
@@ -51,8 +51,11 @@ setup(
             'pytest-datadir-ng',
             'pytest-cov',
             'coveralls',
-            'requests-mock'
+            'requests-mock',
+            'httpx[http2]'
         ],
+        'async': ['httpx'],
+        'http2': ['httpx[http2]'],
         'docs': ['Sphinx', 'ipython']
     }
 )
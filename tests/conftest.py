@@ -0,0 +1,11 @@
+import pytest
+
+from fdpclient import client
+
+
+@pytest.fixture(autouse=True)
+def clear_fdp_paths():
+    """Forget the fdp paths detected by other tests"""
+    client._fdp_paths.clear()
+    yield
+    client._fdp_paths.clear()
@@ -0,0 +1,229 @@
+import asyncio
+import pytest
+import rdflib
+
+httpx = pytest.importorskip('httpx')
+
+from fdpclient import aio
+from fdpclient.aio import AsyncClient
+from fdpclient.exceptions import TransportError
+from fdpclient.negotiation import FormatPolicy
+
+base_url = 'http://example.org'
+catalogID = 'catalog01'
+catalog_url = base_url + '/catalog'
+data_url = catalog_url + '/' + catalogID
+
+# datadir fixture provided via pytest-datadir-ng
+@pytest.fixture()
+def data(datadir):
+    with open(datadir['catalog01.ttl']) as f:
+        return f.read()
+
+@pytest.fixture()
+def data_fdp(datadir):
+    with open(datadir['fdp.ttl']) as f:
+        return f.read()
+
+class MockServer:
+    """Record requests and answer them from a dictionary of routes"""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handler(self, request):
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        status, text, headers = self.routes.get(
+            (request.method, str(request.url)), (404, 'Not Found', {}))
+        return httpx.Response(status, text=text, headers=headers)
+
+    def client(self):
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestOperations:
+    """Test fdpclient.aio functions"""
+
+    def test_read(self, data):
+        """Test read function"""
+        server = MockServer({('GET', data_url): (200, data, {})})
+        async def main():
+            async with server.client() as client:
+                return await aio.read(data_url, client=client)
+        r = run(main())
+        assert isinstance(r, rdflib.Graph)
+        assert 'hasVersion "1.0"' in r.serialize(format='turtle')
+        assert server.requests[0].headers['accept'].startswith('text/turtle, ')
+
+    def test_create_update_delete(self, data):
+        """Test create, update and delete functions"""
+        server = MockServer({('POST', catalog_url): (201, '', {}),
+                             ('PUT', data_url): (200, '', {}),
+                             ('DELETE', data_url): (204, '', {})})
+        async def main():
+            async with server.client() as client:
+                assert await aio.create(catalog_url, data, client=client) is None
+                assert await aio.update(data_url, data, client=client) is None
+                assert await aio.delete(data_url, client=client) is None
+        run(main())
+        assert [r.method for r in server.requests] == ['POST', 'PUT', 'DELETE']
+        assert server.requests[0].content == data.encode()
+
+    def test_http_error(self, caplog):
+        """Test HTTP error"""
+        server = MockServer({})
+        async def main():
+            async with server.client() as client:
+                await aio.read(data_url, client=client)
+        with pytest.raises(RuntimeError):
+            run(main())
+        assert 'HTTP error: 404' in caplog.text
+
+    def test_transport_error(self):
+        """Test connection errors raise TransportError"""
+        def refuse(request):
+            raise httpx.ConnectError('refused', request=request)
+        async def main():
+            transport = httpx.MockTransport(refuse)
+            async with httpx.AsyncClient(transport=transport) as client:
+                await aio.read(data_url, client=client)
+        with pytest.raises(TransportError) as excinfo:
+            run(main())
+        assert isinstance(excinfo.value.__cause__, httpx.ConnectError)
+        assert excinfo.value.attempts == 1
+
+
+class TestAsyncClient:
+    """Test fdpclient.aio.AsyncClient methods"""
+
+    def test_read_catalog(self, data):
+        """Test read_catalog method"""
+        server = MockServer({('GET', data_url): (200, data, {})})
+        async def main():
+            async with AsyncClient(base_url, client=server.client()) as client:
+                return await client.read_catalog(catalogID)
+        r = run(main())
+        assert isinstance(r, rdflib.Graph)
+
+    def test_read_fdp(self, data_fdp):
+        """Test fdp url is detected lazily and only once"""
+        fdp_url = base_url + '/fdp'
+        server = MockServer({('GET', fdp_url): (200, data_fdp, {'content-type': 'text/turtle'})})
+        async def main():
+            async with AsyncClient(base_url, client=server.client()) as client:
+                assert client.fdp_id is None
+                await client.read_fdp()
+                await client.read_fdp()
+                return client.fdp_id
+        assert run(main()) == 'fdp'
+        assert len(server.requests) == 3
+
+    def test_crud(self, data):
+        """Test create, update and delete methods"""
+        server = MockServer({('POST', catalog_url): (201, '', {}),
+                             ('PUT', data_url): (200, '', {}),
+                             ('DELETE', data_url): (204, '', {})})
+        async def main():
+            async with AsyncClient(base_url, client=server.client()) as client:
+                await client.create_catalog(data)
+                await client.update_catalog(catalogID, data)
+                await client.delete_catalog(catalogID)
+        run(main())
+        assert [r.method for r in server.requests] == ['POST', 'PUT', 'DELETE']
+
+    def test_validation(self):
+        """Test the validation shared with fdpclient.client.Client"""
+        async def main():
+            async with AsyncClient(base_url, client=MockServer({}).client()) as client:
+                await client.update_catalog(catalogID, None)
+        with pytest.raises(ValueError):
+            run(main())
+
+    def test_gather_concurrency(self, data):
+        """Test gather runs requests with bounded parallelism"""
+        routes = {('GET', f'{catalog_url}/c{i}'): (200, data, {}) for i in range(10)}
+        server = MockServer(routes)
+        async def main():
+            async with AsyncClient(base_url, concurrency=3, client=server.client()) as client:
+                return await client.gather(
+                    *[client.read_catalog(f'c{i}') for i in range(10)],
+                    client.read_catalog('missing'),
+                    return_exceptions=True)
+        results = run(main())
+        assert all(isinstance(r, rdflib.Graph) for r in results[:10])
+        assert isinstance(results[10], RuntimeError)
+        assert server.max_in_flight == 3
+
+    def test_event_loops(self, data):
+        """Test the concurrency is bounded on each event loop the client is used on"""
+        routes = {('GET', f'{catalog_url}/c{i}'): (200, data, {}) for i in range(6)}
+        server = MockServer(routes)
+        client = AsyncClient(base_url, concurrency=2, client=server.client())
+        async def main():
+            return await client.gather(*[client.read_catalog(f'c{i}') for i in range(6)])
+        for _ in range(2):
+            assert len(run(main())) == 6
+        assert server.max_in_flight == 2
+
+    def test_format_policy(self, datadir):
+        """Test reads without a format are negotiated by the format policy"""
+        with open(datadir['catalog01.nt']) as f:
+            routes = {('GET', data_url): (200, f.read(),
+                                          {'Content-Type': 'application/n-triples'})}
+        server = MockServer(routes)
+        policy = FormatPolicy()
+        policy.record_response(data_url, 'nt', 'turtle')
+        async def main():
+            async with AsyncClient(base_url, client=server.client(),
+                                   format_policy=policy) as client:
+                return await client.read_catalog(catalogID)
+        assert len(run(main())) == 10
+        assert server.requests[0].headers['Accept'].startswith('text/turtle')
+        assert policy.choose(data_url) == 'nt'
+
+    def test_invalid_concurrency(self):
+        """Test invalid concurrency"""
+        with pytest.raises(ValueError):
+            AsyncClient(base_url, concurrency=0)
+
+
+class TestRetry:
+    """Test retries of fdpclient.aio functions"""
+
+    def test_read(self, data, monkeypatch):
+        """Test a read is retried until it succeeds"""
+        from fdpclient.retry import RetryPolicy
+        responses = [httpx.Response(503), httpx.Response(200, text=data)]
+        async def handler(request):
+            return responses.pop(0)
+        async def no_sleep(delay):
+            pass
+        monkeypatch.setattr(aio.asyncio, 'sleep', no_sleep)
+        async def main():
+            transport = httpx.MockTransport(handler)
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await aio.read(data_url, client=client, retry=RetryPolicy())
+        assert len(run(main())) > 0
+        assert responses == []
+
+    def test_http_error(self):
+        """Test the HTTPError of a failed request"""
+        from fdpclient.exceptions import HTTPError
+        server = MockServer({})
+        async def main():
+            async with server.client() as client:
+                await aio.read(data_url, client=client)
+        with pytest.raises(HTTPError) as excinfo:
+            run(main())
+        assert excinfo.value.status == 404
@@ -0,0 +1,128 @@
+import pathlib
+import time
+import pytest
+import rdflib
+
+from fdpclient import bulk
+from fdpclient.bulk import BulkResult, create_many, update_many
+from fdpclient.cache import SerializationCache
+from fdpclient.client import Client
+
+base_url = 'http://example.org'
+catalog_url = base_url + '/catalog'
+
+# datadir fixture provided via pytest-datadir-ng
+@pytest.fixture()
+def graph(datadir):
+    return rdflib.Graph().parse(datadir['catalog01.ttl'], format='turtle')
+
+@pytest.fixture()
+def client():
+    return Client(base_url, fdp_path='fdp')
+
+
+class TestBulk:
+    """Test fdpclient.bulk functions"""
+
+    @pytest.mark.parametrize('processes', [0, 1])
+    def test_create_many(self, client, graph, requests_mock, processes):
+        """Test graphs are serialized and uploaded"""
+        requests_mock.post(catalog_url)
+        results = list(client.create_many('catalog', [graph] * 5,
+                                          processes=processes, ordered=True))
+        assert [r.index for r in results] == list(range(5))
+        assert all(r.ok and r.elapsed is not None for r in results)
+        assert requests_mock.call_count == 5
+        body = requests_mock.last_request.body
+        body = body.decode() if isinstance(body, bytes) else body
+        assert 'First sample catalog' in body
+
+    def test_mixed_items(self, client, datadir, requests_mock):
+        """Test str, bytes, file-like and path items"""
+        requests_mock.post(catalog_url)
+        path = pathlib.Path(datadir['catalog01.ttl'])
+        text = path.read_text()
+        with open(path, 'rb') as f:
+            items = [text, text.encode(), f, path]
+            results = list(create_many(client, 'catalog', items, processes=0))
+        assert all(r.ok for r in results)
+        assert requests_mock.call_count == 4
+
+    def test_update_many_errors(self, client, graph, requests_mock):
+        """Test a failed item does not stop the batch"""
+        requests_mock.put(catalog_url + '/c0')
+        requests_mock.put(catalog_url + '/c1', status_code=500)
+        requests_mock.put(catalog_url + '/c2')
+        items = [(f'c{i}', graph) for i in range(3)]
+        results = {r.id: r for r in update_many(client, 'catalog', items, processes=0)}
+        assert results['c0'].ok and results['c2'].ok
+        assert isinstance(results['c1'].error, RuntimeError)
+        assert 'ok' in repr(results['c0'])
+
+    def test_backpressure(self, client, requests_mock):
+        """Test items are consumed as results are taken"""
+        requests_mock.post(catalog_url)
+        consumed = []
+        items = (consumed.append(i) or 'data' for i in range(100))
+        results = client.create_many('catalog', items, workers=2,
+                                     max_in_flight=3, processes=0)
+        next(results)
+        assert len(consumed) <= 4
+        assert len(list(results)) == 99
+
+    def test_no_graphs(self, client, monkeypatch, requests_mock):
+        """Test no serialization process is started without graphs"""
+        def fail(*args, **kwargs):
+            raise AssertionError('process pool created')
+        monkeypatch.setattr(bulk, 'ProcessPoolExecutor', fail)
+        requests_mock.post(catalog_url)
+        results = list(client.create_many('catalog', ['data'] * 3, processes=1))
+        assert all(r.ok for r in results)
+
+    def test_inline_formats(self, client, graph, monkeypatch, requests_mock):
+        """Test graphs in the cheap formats are serialized without processes"""
+        def fail(*args, **kwargs):
+            raise AssertionError('process pool created')
+        monkeypatch.setattr(bulk, 'ProcessPoolExecutor', fail)
+        requests_mock.post(catalog_url)
+        results = list(client.create_many('catalog', [graph] * 2, format='nt', processes=1))
+        assert all(r.ok for r in results)
+        sent = rdflib.Graph().parse(data=requests_mock.last_request.text, format='nt')
+        assert len(sent) == len(graph)
+
+    def test_serialization_cache(self, graph, monkeypatch, requests_mock):
+        """Test the serializations are cached and cached graphs not serialized"""
+        requests_mock.post(catalog_url)
+        cache = SerializationCache()
+        client = Client(base_url, fdp_path='fdp', serialization_cache=cache)
+        assert all(r.ok for r in client.create_many('catalog', [graph], processes=1))
+        assert len(cache) == 1
+        def fail(*args, **kwargs):
+            raise AssertionError('process pool created')
+        monkeypatch.setattr(bulk, 'ProcessPoolExecutor', fail)
+        results = list(client.create_many('catalog', [graph] * 3, processes=1))
+        assert all(r.ok for r in results)
+        assert cache.stats['hits'] == 3
+        assert requests_mock.call_count == 4
+
+    def test_close(self, client, requests_mock):
+        """Test the pending items are cancelled when the results are closed"""
+        def slow(request, context):
+            time.sleep(0.05)
+            return ''
+        requests_mock.post(catalog_url, text=slow)
+        results = client.create_many('catalog', ['data'] * 20, workers=1,
+                                     max_in_flight=10, processes=0)
+        next(results)
+        results.close()
+        assert requests_mock.call_count < 10
+
+    def test_invalid(self, client):
+        """Test invalid arguments"""
+        with pytest.raises(ValueError):
+            client.create_many('fdp', [])
+        with pytest.raises(ValueError):
+            client.update_many('catalog', [], workers=0)
+        with pytest.raises(ValueError):
+            client.update_many('catalog', [], max_in_flight=0)
+        assert BulkResult(0, error=KeyError()).ok is False
@@ -0,0 +1,252 @@
+import pytest
+import rdflib
+from rdflib.compare import isomorphic
+from rdflib.graph import ModificationException
+
+from fdpclient import operations
+from fdpclient.cache import (HTTPCache, GraphCache, SerializationCache, MemoryStorage,
+                             FileStorage, CacheEntry, copy_graph)
+from fdpclient.client import Client
+from fdpclient.store import CompactStore
+
+base_url = 'http://example.org'
+data_url = base_url + '/catalog/catalog01'
+
+# datadir fixture provided via pytest-datadir-ng
+@pytest.fixture()
+def data(datadir):
+    with open(datadir['catalog01.ttl']) as f:
+        return f.read()
+
+@pytest.fixture(params=['memory', 'file'])
+def cache(request, tmp_path):
+    if request.param == 'memory':
+        return HTTPCache()
+    return HTTPCache(FileStorage(str(tmp_path)))
+
+def not_modified_or(data, etag):
+    """Answer 304 when the request has the given ETag, else the data"""
+    def callback(request, context):
+        if request.headers.get('If-None-Match') == etag:
+            context.status_code = 304
+            return ''
+        context.headers['ETag'] = etag
+        return data
+    return callback
+
+
+class TestHTTPCache:
+    """Test fdpclient.cache.HTTPCache with read operations"""
+
+    def test_revalidate_etag(self, cache, data, requests_mock):
+        """Test a 304 response is served from the cache"""
+        requests_mock.get(data_url, text=not_modified_or(data, '"v1"'))
+        g1 = operations.read(data_url, cache=cache)
+        g2 = operations.read(data_url, cache=cache)
+        assert requests_mock.call_count == 2
+        assert requests_mock.last_request.headers['If-None-Match'] == '"v1"'
+        assert isomorphic(g1, g2)
+        assert cache.stats == {'hits': 1, 'misses': 1, 'revalidations': 1, 'stores': 1}
+
+    def test_revalidate_last_modified(self, cache, data, requests_mock):
+        """Test the If-Modified-Since header"""
+        date = 'Wed, 21 Oct 2015 07:28:00 GMT'
+        requests_mock.get(data_url, text=data, headers={'Last-Modified': date})
+        operations.read(data_url, cache=cache)
+        operations.read(data_url, cache=cache)
+        assert requests_mock.last_request.headers['If-Modified-Since'] == date
+        assert cache.stats['hits'] == 0
+        assert cache.stats['stores'] == 2
+
+    def test_no_validators(self, cache, data, requests_mock):
+        """Test responses without validators are not cached"""
+        requests_mock.get(data_url, text=data)
+        operations.read(data_url, cache=cache)
+        operations.read(data_url, cache=cache)
+        assert 'If-None-Match' not in requests_mock.last_request.headers
+        assert cache.stats['misses'] == 2
+        assert cache.stats['stores'] == 0
+
+    def test_cached_graph_is_copied(self, data, requests_mock):
+        """Test modifying a returned graph does not modify the cache"""
+        cache = HTTPCache()
+        requests_mock.get(data_url, text=not_modified_or(data, '"v1"'))
+        g1 = operations.read(data_url, cache=cache)
+        size = len(g1)
+        g1.remove((None, None, None))
+        g2 = operations.read(data_url, cache=cache)
+        assert len(g2) == size
+
+    def test_client(self, data, requests_mock):
+        """Test Client reads with a cache"""
+        requests_mock.get(base_url + '/fdp', headers={'content-type': 'text/turtle'})
+        requests_mock.get(data_url, text=not_modified_or(data, '"v1"'))
+        cache = HTTPCache(MemoryStorage(maxsize=2))
+        client = Client(base_url, cache=cache)
+        client.read_catalog('catalog01')
+        r = client.read_catalog('catalog01')
+        assert isinstance(r, rdflib.Graph)
+        assert cache.stats['hits'] == 1
+
+
+class TestStorage:
+    """Test fdpclient.cache storages"""
+
+    def test_memory_lru(self):
+        """Test the least recently used entry is dropped"""
+        storage = MemoryStorage(maxsize=2)
+        for key in ('a', 'b'):
+            storage.set(key, CacheEntry(key, 'turtle', ''))
+        storage.get('a')
+        storage.set('c', CacheEntry('c', 'turtle', ''))
+        assert len(storage) == 2
+        assert storage.get('b') is None
+        assert storage.get('a') is not None
+        with pytest.raises(ValueError):
+            MemoryStorage(maxsize=0)
+
+    def test_file(self, tmp_path):
+        """Test entries survive a new storage on the same directory"""
+        FileStorage(str(tmp_path)).set('k', CacheEntry('u', 'nt', 'body', etag='"e"'))
+        storage = FileStorage(str(tmp_path))
+        entry = storage.get('k')
+        assert (entry.url, entry.body, entry.etag) == ('u', 'body', '"e"')
+        assert entry.validators() == {'If-None-Match': '"e"'}
+        storage.delete('k')
+        assert storage.get('k') is None
+
+
+class TestGraphCache:
+    """Test fdpclient.cache.GraphCache"""
+
+    @pytest.fixture()
+    def graph(self, data):
+        return rdflib.Graph().parse(data=data, format='turtle')
+
+    def test_get_put(self, graph):
+        """Test a cached graph is returned as a copy"""
+        cache = GraphCache()
+        assert cache.get(data_url, 'turtle') is None
+        cache.put(data_url, 'turtle', graph)
+        g = cache.get(data_url, 'turtle')
+        assert isomorphic(g, graph) and g is not graph
+        g.remove((None, None, None))
+        assert len(cache.get(data_url, 'turtle')) == len(graph)
+        assert cache.get(data_url, 'nt') is None
+        assert cache.stats == {'hits': 2, 'misses': 2, 'evictions': 0}
+
+    def test_readonly(self, graph):
+        """Test read-only views cannot be modified"""
+        cache = GraphCache(readonly=True)
+        cache.put(data_url, 'turtle', graph)
+        g = cache.get(data_url, 'turtle')
+        assert len(g) == len(graph)
+        with pytest.raises(ModificationException):
+            g.remove((None, None, None))
+        with pytest.raises(ModificationException):
+            g += graph
+        assert isinstance(g, rdflib.Graph)
+        assert g.serialize(format='turtle') == graph.serialize(format='turtle')
+
+    def test_store(self, graph):
+        """Test copies keep the store type of the cached graph"""
+        cached = rdflib.Graph(store=CompactStore())
+        cached += graph
+        cache = GraphCache()
+        cache.put(data_url, 'turtle', copy_graph(cached))
+        g = cache.get(data_url, 'turtle')
+        assert isinstance(g.store, CompactStore) and g.store is not cached.store
+        assert isomorphic(g, graph)
+
+    def test_bounds(self, graph):
+        """Test eviction by number of graphs and of triples"""
+        cache = GraphCache(maxsize=2)
+        for i in range(3):
+            cache.put(f'{data_url}{i}', 'turtle', graph)
+        assert len(cache) == 2
+        assert cache.get(f'{data_url}0', 'turtle') is None
+
+        cache = GraphCache(max_triples=2 * len(graph))
+        for i in range(3):
+            cache.put(f'{data_url}{i}', 'turtle', graph)
+        assert len(cache) == 2
+        assert cache.stats['evictions'] == 1
+
+    def test_ttl(self, graph, monkeypatch):
+        """Test expired graphs are not returned"""
+        now = [100.0]
+        monkeypatch.setattr('fdpclient.cache.time.monotonic', lambda: now[0])
+        cache = GraphCache(ttl=10)
+        cache.put(data_url, 'turtle', graph)
+        now[0] += 5
+        assert cache.get(data_url, 'turtle') is not None
+        now[0] += 10
+        assert cache.get(data_url, 'turtle') is None
+        assert len(cache) == 0
+
+    def test_invalidate(self, graph):
+        """Test explicit invalidation"""
+        cache = GraphCache()
+        cache.put(data_url, 'turtle', graph)
+        cache.put(data_url, 'nt', graph)
+        cache.put(base_url, 'nt', graph)
+        cache.invalidate(data_url)
+        assert len(cache) == 1
+        cache.invalidate()
+        assert len(cache) == 0
+
+    def test_client(self, data, requests_mock):
+        """Test Client reads from the cache and invalidates it on changes"""
+        requests_mock.get(base_url + '/fdp', headers={'content-type': 'text/turtle'})
+        requests_mock.get(data_url, text=data)
+        requests_mock.put(data_url)
+        requests_mock.delete(data_url)
+        client = Client(base_url, graph_cache=GraphCache())
+        g = client.read_catalog('catalog01')
+        g.remove((None, None, None))
+        assert len(client.read_catalog('catalog01')) > 0
+        assert requests_mock.call_count == 1
+
+        client.update_catalog('catalog01', data)
+        client.read_catalog('catalog01')
+        assert requests_mock.call_count == 3
+        client.delete_catalog('catalog01')
+        client.read_catalog('catalog01')
+        assert requests_mock.call_count == 5
+
+
+class TestSerializationCache:
+    """Test fdpclient.cache.SerializationCache"""
+
+    def test_serialize(self, data):
+        """Test equal graphs share the cached serialization"""
+        cache = SerializationCache()
+        g1 = rdflib.Graph().parse(data=data, format='turtle')
+        g2 = rdflib.Graph().parse(data=data, format='turtle')
+        s1 = cache.serialize(g1, 'turtle')
+        assert isinstance(s1, bytes)
+        assert cache.serialize(g2, 'turtle') is s1
+        assert cache.serialize(g2, 'nt') is not s1
+        assert cache.stats == {'hits': 1, 'misses': 2}
+        assert len(cache) == 2
+
+    def test_max_bytes(self, data):
+        """Test the size bound"""
+        g = rdflib.Graph().parse(data=data, format='turtle')
+        size = len(g.serialize(format='nt').encode())
+        cache = SerializationCache(max_bytes=size)
+        cache.serialize(g, 'nt')
+        assert len(cache) == 1
+        cache.serialize(g, 'turtle')
+        assert len(cache) == 1
+
+    def test_operations(self, data, requests_mock):
+        """Test create and update with a serialization cache"""
+        requests_mock.post(base_url + '/catalog')
+        requests_mock.put(data_url)
+        cache = SerializationCache()
+        g = rdflib.Graph().parse(data=data, format='turtle')
+        operations.create(base_url + '/catalog', g, serialization_cache=cache)
+        operations.update(data_url, g, serialization_cache=cache)
+        assert cache.stats == {'hits': 1, 'misses': 1}
+        assert requests_mock.request_history[0].body == requests_mock.request_history[1].body
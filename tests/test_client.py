@@ -1,8 +1,12 @@
+import re
 import pytest
 import rdflib
 import requests
 
+from fdpclient import client as client_module
+from fdpclient.cache import GraphCache, HTTPCache
 from fdpclient.client import Client
+from fdpclient.session import create_session
 
 base_url = 'http://example.org'
 catalogID = 'catalog01'
@@ -73,15 +77,302 @@ class TestDefault:
         r = client.create_fdp(data=data_fdp)
         assert r is None
 
+    def test_read_default_format(self, client, datadir, requests_mock):
+        """Test reads request N-Triples by default"""
+        with open(datadir['catalog01.nt']) as f:
+            requests_mock.get(data_url, text=f.read())
+        r = client.read_catalog(catalogID)
+        assert len(r) == 10
+        assert requests_mock.last_request.headers['Accept'].startswith('application/n-triples,')
+
     def test_read_fdp(self, client, data_fdp, requests_mock):
         """Test read_fdp method"""
-        requests_mock.get(fdp_url, text=data_fdp)
+        requests_mock.get(fdp_url, text=data_fdp, headers={'content-type': 'text/turtle'})
         r = client.read_fdp()
         assert isinstance(r, rdflib.Graph)
         assert  'hasVersion "1.0"' in r.serialize(format='turtle')
 
+    def test_read_raw(self, client, data, requests_mock):
+        """Test read_raw method returns the unparsed body"""
+        requests_mock.get(data_url, text=data)
+        r = client.read_raw('catalog', catalogID)
+        assert r == data.encode('utf-8')
+        assert requests_mock.last_request.headers['Accept'] == 'text/turtle'
+
+    def test_read_raw_fdp(self, client, data_fdp, requests_mock):
+        """Test read_raw method on the fdp"""
+        requests_mock.get(fdp_url, text=data_fdp, headers={'content-type': 'text/turtle'})
+        assert client.read_raw('fdp') == data_fdp.encode('utf-8')
+
     def test_update_fdp(self, client, data_fdp_update, requests_mock):
         """Test update_fdp method"""
         requests_mock.put(fdp_url, text=data_fdp_update)
         r = client.update_fdp(data=data_fdp_update)
-        assert r is None
\ No newline at end of file
+        assert r is None
+
+class TestSession:
+    """Test the pooled session of fdpclient.client.Client"""
+
+    def test_default_session(self, client):
+        """Test the client owns a pooled session by default"""
+        assert isinstance(client.session, requests.Session)
+        assert client._owns_session
+
+    def test_given_session(self, requests_mock, data):
+        """Test the client sends requests with a given session"""
+        requests_mock.get(base_url + '/fdp', status_code=200, headers={'content-type': 'text/turtle'})
+        requests_mock.get(data_url, text=data)
+        session = create_session(pool_maxsize=2)
+        with Client(base_url, session=session) as client:
+            assert client.session is session
+            client.read_catalog(catalogID)
+        assert requests_mock.last_request.url == data_url
+
+    def test_close(self, client):
+        """Test closing the client closes its own session"""
+        closed = []
+        client.session.close = lambda: closed.append(True)
+        with client:
+            pass
+        assert closed == [True]
+
+
+class TestReadMany:
+    """Test fdpclient.client.Client.read_many method"""
+
+    def test_ordered(self, client, data, requests_mock):
+        """Test results are yielded in input order, failures as exceptions"""
+        ids = [f'catalog{i:02d}' for i in range(20)]
+        for id in ids:
+            requests_mock.get(catalog_url + '/' + id, text=data)
+        requests_mock.get(catalog_url + '/missing', status_code=404)
+        ids.insert(5, 'missing')
+
+        results = list(client.read_many('catalog', ids, workers=4, ordered=True))
+        assert [id for id, _ in results] == ids
+        assert isinstance(results[5][1], RuntimeError)
+        assert all(isinstance(r, rdflib.Graph) for id, r in results if id != 'missing')
+
+    def test_completion_order(self, client, data, requests_mock):
+        """Test all results are yielded in completion order"""
+        ids = (f'catalog{i:02d}' for i in range(10))
+        requests_mock.get(re.compile(catalog_url + '/.*'), text=data)
+        results = dict(client.read_many('catalog', ids, workers=3))
+        assert len(results) == 10
+        assert all(isinstance(r, rdflib.Graph) for r in results.values())
+
+    def test_invalid(self, client):
+        """Test invalid type and workers"""
+        with pytest.raises(ValueError):
+            client.read_many('fdp', ['a'])
+        with pytest.raises(ValueError):
+            list(client.read_many('catalog', ['a'], workers=0))
+
+
+class TestDetectFdpUrl:
+    """Test the lazy detection of the fdp url"""
+
+    def test_lazy(self, requests_mock, data):
+        """Test no request is sent until fdp-level use"""
+        requests_mock.get(fdp_url, status_code=200, headers={'content-type': 'text/turtle'})
+        requests_mock.get(data_url, text=data)
+        client = Client(base_url)
+        assert requests_mock.call_count == 0
+        client.read_catalog(catalogID)
+        assert requests_mock.call_count == 1
+        assert client.fdp_id == 'fdp'
+        assert requests_mock.call_count == 2
+
+    def test_host_url(self, requests_mock):
+        """Test detecting the host url as the fdp url"""
+        requests_mock.get(fdp_url, status_code=404)
+        requests_mock.get(base_url, status_code=200, headers={'content-type': 'text/turtle'})
+        assert Client(base_url).fdp_id == ''
+
+    def test_failed(self, requests_mock):
+        """Test detection failure"""
+        requests_mock.get(fdp_url, status_code=404)
+        requests_mock.get(base_url, status_code=404)
+        with pytest.raises(RuntimeError):
+            Client(base_url).fdp_id
+
+    def test_memoized(self, requests_mock):
+        """Test the detected path is shared by clients of the same host"""
+        requests_mock.get(fdp_url, status_code=200, headers={'content-type': 'text/turtle'})
+        assert Client(base_url).fdp_id == 'fdp'
+        assert Client(base_url + '/').fdp_id == 'fdp'
+        assert requests_mock.call_count == 1
+
+    def test_fdp_path(self, requests_mock, data_fdp):
+        """Test an explicit fdp path skips the detection"""
+        requests_mock.get(base_url, text=data_fdp)
+        client = Client(base_url, fdp_path='')
+        client.read_fdp()
+        assert requests_mock.call_count == 1
+
+    def test_fdp_path_file(self, requests_mock, tmp_path):
+        """Test the detected path is persisted"""
+        file = str(tmp_path / 'fdp_paths.json')
+        requests_mock.get(fdp_url, status_code=200, headers={'content-type': 'text/turtle'})
+        assert Client(base_url, fdp_path_file=file).fdp_id == 'fdp'
+        client_module._fdp_paths.clear()
+        assert Client(base_url, fdp_path_file=file).fdp_id == 'fdp'
+        assert requests_mock.call_count == 1
+
+
+class TestIterTriples:
+    """Test fdpclient.client.Client iter_* methods"""
+
+    def test_iter_catalog(self, client, datadir, requests_mock):
+        """Test iter_catalog method"""
+        with open(datadir['catalog01.nt']) as f:
+            requests_mock.get(data_url, text=f.read())
+        triples = list(client.iter_catalog(catalogID))
+        assert len(triples) == 10
+        assert requests_mock.last_request.headers['Accept'].startswith('application/n-triples,')
+
+    def test_iter_fdp(self, client, data_fdp, requests_mock):
+        """Test iter_fdp method with a predicate filter"""
+        requests_mock.get(fdp_url, text=data_fdp, headers={'content-type': 'text/turtle'})
+        predicate = rdflib.URIRef('http://www.re3data.org/schema/3-0#dataCatalog')
+        triples = list(client.iter_fdp(format='turtle', predicates=[predicate]))
+        assert len(triples) == 2
+        assert {p for _, p, _ in triples} == {predicate}
+
+
+def _children(url, start, stop, predicate='http://www.w3.org/ns/ldp#contains'):
+    """N-Triples linking a container to its children"""
+    return ''.join(f'<{url}> <{predicate}> <{base_url}/dataset/d{i}> .\n'
+                   for i in range(start, stop))
+
+class TestIterChildren:
+    """Test fdpclient.client.Client.iter_children method"""
+
+    def test_streamed(self, client, requests_mock):
+        """Test the children of a catalog without paging"""
+        text = (_children(data_url, 0, 3)
+                + f'<{data_url}> <http://purl.org/dc/terms/title> "Catalog" .\n'
+                + _children(data_url, 3, 5, 'http://www.w3.org/ns/dcat#dataset'))
+        requests_mock.get(data_url, text=text,
+                          headers={'Content-Type': 'application/n-triples'})
+        children = list(client.iter_children('catalog', catalogID))
+        assert children == [f'{base_url}/dataset/d{i}' for i in range(5)]
+
+    def test_pages(self, client, requests_mock):
+        """Test the next pages are followed, relative or absolute"""
+        headers = {'Content-Type': 'application/n-triples'}
+        requests_mock.get(data_url, text=_children(data_url, 0, 2), headers=dict(
+            headers, Link='<?page=2>; rel="next", <http://www.w3.org/ns/ldp#Page>; rel="type"'))
+        requests_mock.get(data_url + '?page=2', text=_children(data_url, 2, 4), headers=dict(
+            headers, Link=f'<{data_url}?page=3>; rel="next"'))
+        requests_mock.get(data_url + '?page=3', text=_children(data_url, 4, 5), headers=headers)
+        children = client.iter_children('catalog', catalogID)
+        assert next(children) == f'{base_url}/dataset/d0'
+        assert requests_mock.call_count == 1
+        assert list(children) == [f'{base_url}/dataset/d{i}' for i in range(1, 5)]
+        assert requests_mock.call_count == 3
+        assert requests_mock.last_request.headers['Accept'].startswith('application/n-triples')
+
+    def test_page_cycle(self, client, requests_mock):
+        """Test a page linking back to a read page ends the iteration"""
+        requests_mock.get(data_url, text=_children(data_url, 0, 1),
+                          headers={'Link': f'<{data_url}>; rel="next"'})
+        assert len(list(client.iter_children('catalog', catalogID))) == 1
+        assert requests_mock.call_count == 1
+
+    def test_unique(self, client, requests_mock):
+        """Test children linked by both ldp:contains and dcat:dataset are
+        yielded once only if unique"""
+        text = (_children(data_url, 0, 2)
+                + _children(data_url, 0, 3, 'http://www.w3.org/ns/dcat#dataset'))
+        requests_mock.get(data_url, text=text)
+        children = list(client.iter_children('catalog', catalogID, unique=True))
+        assert children == [f'{base_url}/dataset/d{i}' for i in range(3)]
+        assert len(list(client.iter_children('catalog', catalogID))) == 5
+
+    def test_fdp(self, client, data_fdp, requests_mock):
+        """Test the catalogs of the fdp in turtle"""
+        requests_mock.get(fdp_url, text=data_fdp, headers={'content-type': 'text/turtle'})
+        children = list(client.iter_children('fdp', format='turtle', unique=True))
+        assert len(children) == 2
+
+    def test_invalid(self, client):
+        """Test types without children and a missing id"""
+        with pytest.raises(ValueError):
+            client.iter_children('distribution', 'distribution01')
+        with pytest.raises(ValueError):
+            client.iter_children('catalog')
+
+class TestSync:
+    """Test fdpclient.client.Client sync methods"""
+
+    def test_unchanged(self, client, data, requests_mock):
+        """Test the update is skipped for an isomorphic graph"""
+        requests_mock.get(data_url, text=data)
+        put = requests_mock.put(data_url)
+        g = rdflib.Graph().parse(data=data, format='turtle')
+        diff = client.sync_catalog(catalogID, g.serialize(format='turtle'))
+        assert not diff.changed
+        assert (diff.added, diff.removed) == (0, 0)
+        assert not put.called
+
+    def test_changed(self, client, data, data_update, requests_mock):
+        """Test the update is sent with the diff counts"""
+        requests_mock.get(data_url, text=data)
+        put = requests_mock.put(data_url)
+        old = rdflib.Graph().parse(data=data, format='turtle')
+        new = rdflib.Graph().parse(data=data_update, format='turtle')
+        diff = client.sync_catalog(catalogID, data_update)
+        assert diff.changed
+        assert diff.added == len(set(new) - set(old))
+        assert diff.removed == len(set(old) - set(new))
+        assert put.call_count == 1
+        assert put.last_request.text == data_update
+
+    def test_sync_fdp(self, client, data_fdp, requests_mock):
+        """Test sync_fdp method"""
+        requests_mock.get(fdp_url, text=data_fdp, headers={'content-type': 'text/turtle'})
+        put = requests_mock.put(fdp_url)
+        g = rdflib.Graph().parse(data=data_fdp, format='turtle')
+        assert not client.sync_fdp(g).changed
+        assert not put.called
+
+    def test_stale_graph_cache(self, data, data_update, requests_mock):
+        """Test a stale cached graph equal to data does not skip the update"""
+        client = Client(base_url, fdp_path='fdp', graph_cache=GraphCache())
+        requests_mock.get(data_url, text=data_update)
+        client.read_catalog(catalogID, format='turtle')
+        requests_mock.get(data_url, text=data)
+        put = requests_mock.put(data_url)
+        assert client.sync_catalog(catalogID, data_update).changed
+        assert put.call_count == 1
+        assert client.graph_cache.get(data_url, 'turtle') is None
+
+    def test_split_arguments(self, client, data, data_update, requests_mock):
+        """Test the read and update only arguments are passed to their request"""
+        requests_mock.get(data_url, text=data)
+        put = requests_mock.put(data_url)
+        cache = HTTPCache()
+        client.sync_catalog(catalogID, data_update, cache=cache, compress='gzip')
+        assert cache.stats['misses'] == 1
+        assert requests_mock.request_history[0].method == 'GET'
+        assert 'Content-Encoding' not in requests_mock.request_history[0].headers
+        assert put.last_request.headers['Content-Encoding'] == 'gzip'
+
+    def test_revalidated(self, data, requests_mock):
+        """Test the HTTP cache of the client revalidates the server copy"""
+        client = Client(base_url, fdp_path='fdp', cache=HTTPCache(),
+                        graph_cache=GraphCache())
+        requests_mock.get(data_url, text=data, headers={'ETag': '"v1"'})
+        put = requests_mock.put(data_url)
+        assert not client.sync_catalog(catalogID, data).changed
+        requests_mock.get(data_url, status_code=304, headers={'ETag': '"v1"'})
+        assert not client.sync_catalog(catalogID, data).changed
+        assert requests_mock.last_request.headers['If-None-Match'] == '"v1"'
+        assert client.cache.stats['revalidations'] == 1
+        assert not put.called
+
+    def test_result_arguments(self, client, data):
+        """Test the arguments changing the result of the read are rejected"""
+        with pytest.raises(TypeError):
+            client.sync_catalog(catalogID, data, result='triples')
@@ -0,0 +1,118 @@
+import gzip
+import io
+import zlib
+import pytest
+import rdflib
+
+from fdpclient import operations
+from fdpclient.client import Client
+from fdpclient.compression import (ACCEPT_ENCODING, CountingReader, compress,
+                                   encodings)
+from fdpclient.metrics import HistogramCollector, PrometheusExporter
+
+base_url = 'http://example.org'
+data_url = base_url + '/catalog/catalog01'
+
+@pytest.fixture()
+def data(datadir):
+    with open(datadir['catalog01.ttl']) as f:
+        return f.read()
+
+@pytest.fixture()
+def events():
+    return []
+
+@pytest.fixture()
+def client(requests_mock, events):
+    return Client(base_url, fdp_path='fdp', hooks=[events.append])
+
+
+class TestCompress:
+    """Test fdpclient.compression.compress function"""
+
+    def test_gzip(self, data):
+        """Test gzip with the default and a given level"""
+        assert gzip.decompress(compress(data, 'gzip')) == data.encode('utf-8')
+        assert gzip.decompress(compress(data.encode('utf-8'), 'gzip', level=1)) == data.encode('utf-8')
+
+    def test_deflate_file(self, data):
+        """Test deflate of a file-like object"""
+        body = compress(io.BytesIO(data.encode('utf-8')), 'deflate')
+        assert zlib.decompress(body) == data.encode('utf-8')
+
+    def test_unsupported(self, data):
+        """Test an unknown coding"""
+        assert 'gzip' in encodings()
+        with pytest.raises(ValueError):
+            compress(data, 'lzma')
+
+    def test_counting_reader(self):
+        """Test the bytes read are counted"""
+        reader = CountingReader(io.BytesIO(b'line 1\nline 2\n'))
+        reader.readline()
+        reader.read()
+        assert reader.count == 14
+        assert reader.tell() == 14
+
+
+class TestRead:
+    """Test compressed responses"""
+
+    def test_accept_encoding(self, data, requests_mock):
+        """Test reads advertise the codings unless the headers do"""
+        requests_mock.get(data_url, text=data)
+        operations.read(data_url)
+        assert requests_mock.last_request.headers['Accept-Encoding'] == ACCEPT_ENCODING
+        operations.read(data_url, headers={'accept-encoding': 'identity'})
+        assert requests_mock.last_request.headers['Accept-Encoding'] == 'identity'
+
+    @pytest.mark.parametrize('stream', [False, True])
+    def test_decode(self, client, events, data, requests_mock, stream):
+        """Test gzip responses are decoded, and their wire and decoded sizes
+        recorded"""
+        body = gzip.compress(data.encode('utf-8'))
+        requests_mock.get(data_url, content=body, headers={'Content-Encoding': 'gzip'})
+        g = client.read_catalog('catalog01', format='turtle', stream=stream)
+        assert len(g) == 10
+        event, = events
+        assert event.wire_bytes_received == len(body)
+        assert event.bytes_received == len(data.encode('utf-8'))
+
+
+class TestUpload:
+    """Test compressed request bodies"""
+
+    def test_create(self, client, events, data, requests_mock):
+        """Test a create body is compressed with the coding of the client"""
+        requests_mock.post(base_url + '/catalog')
+        client.compress = 'gzip'
+        client.create_catalog(rdflib.Graph().parse(data=data, format='turtle'))
+        request = requests_mock.last_request
+        assert request.headers['Content-Encoding'] == 'gzip'
+        body = gzip.decompress(request.body)
+        assert len(rdflib.Graph().parse(data=body, format='turtle')) == 10
+        event, = events
+        assert event.wire_bytes_sent == len(request.body)
+        assert event.bytes_sent == len(body)
+        assert 'compress' in event.phases
+
+    def test_update_file(self, data, requests_mock):
+        """Test a file body is compressed with a given level"""
+        requests_mock.put(data_url)
+        operations.update(data_url, io.BytesIO(data.encode('utf-8')),
+                          compress='deflate', compress_level=9)
+        request = requests_mock.last_request
+        assert request.headers['Content-Encoding'] == 'deflate'
+        assert zlib.decompress(request.body) == data.encode('utf-8')
+
+    def test_metrics(self, data, requests_mock):
+        """Test the wire bytes are exported"""
+        requests_mock.put(data_url)
+        collector = HistogramCollector()
+        client = Client(base_url, fdp_path='fdp', hooks=[collector], compress='gzip')
+        client.update_catalog('catalog01', data)
+        sent = collector.bytes['update', 'catalog', 'sent']
+        wire = collector.wire_bytes['update', 'catalog', 'sent']
+        assert wire < sent
+        text = PrometheusExporter(collector).render()
+        assert f'fdpclient_wire_bytes_total{{operation="update",type="catalog",direction="sent"}} {wire}' in text
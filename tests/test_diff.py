@@ -0,0 +1,41 @@
+import rdflib
+from rdflib import BNode, Literal
+
+from fdpclient.diff import GraphDiff, diff_graphs
+
+EX = rdflib.Namespace('http://example.org/')
+
+
+def make_graph(triples):
+    g = rdflib.Graph()
+    for triple in triples:
+        g.add(triple)
+    return g
+
+
+class TestDiffGraphs:
+    """Test fdpclient.diff.diff_graphs function"""
+
+    def test_isomorphic(self):
+        """Test equal graphs have no diff"""
+        triples = [(EX.a, EX.p, Literal(i)) for i in range(10)]
+        diff = diff_graphs(make_graph(triples), make_graph(triples[::-1]))
+        assert diff == GraphDiff()
+        assert not diff.changed
+
+    def test_changed(self):
+        """Test added and removed triples are counted"""
+        old = make_graph([(EX.a, EX.p, Literal(i)) for i in range(10)])
+        new = make_graph([(EX.a, EX.p, Literal(i)) for i in range(5, 12)])
+        diff = diff_graphs(old, new)
+        assert diff.changed
+        assert (diff.added, diff.removed) == (2, 5)
+
+    def test_blank_nodes(self):
+        """Test blank nodes are compared by structure, not by label"""
+        def graph(b, value):
+            return make_graph([(EX.a, EX.p, b), (b, EX.q, Literal(value))])
+        assert not diff_graphs(graph(BNode(), 'x'), graph(BNode(), 'x')).changed
+        diff = diff_graphs(graph(BNode(), 'x'), graph(BNode(), 'y'))
+        assert diff.changed
+        assert diff.removed >= 1 and diff.added >= 1
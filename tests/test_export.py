@@ -0,0 +1,129 @@
+import pytest
+import rdflib
+from rdflib import BNode, Literal, URIRef
+from rdflib.compare import isomorphic
+from rdflib.namespace import DCAT, DCTERMS, RDF
+
+from fdpclient.client import Client
+from fdpclient.export import QuadReader, QuadWriter
+
+base_url = 'http://fdp.fairdatapoint.nl'
+EX = rdflib.Namespace('http://example.org/')
+
+CATALOG02 = """@prefix dcat: <http://www.w3.org/ns/dcat#> .
+@prefix dcterms: <http://purl.org/dc/terms/> .
+<http://fdp.fairdatapoint.nl/catalog/catalog02> a dcat:Catalog ;
+    dcterms:title "Catalog 2" .
+"""
+
+@pytest.fixture()
+def graph():
+    g = rdflib.Graph()
+    b = BNode()
+    g.add((EX.s, EX.p, Literal('multi\nline "quoted" é', lang='en')))
+    g.add((EX.s, EX.q, b))
+    g.add((b, EX.p, Literal(3)))
+    return g
+
+@pytest.fixture()
+def client(requests_mock, datadir):
+    with open(datadir['fdp.ttl']) as f:
+        requests_mock.get(base_url + '/fdp', text=f.read(),
+                          headers={'content-type': 'text/turtle'})
+    with open(datadir['catalog01.ttl']) as f:
+        requests_mock.get(base_url + '/catalog/catalog01', text=f.read(),
+                          headers={'content-type': 'text/turtle'})
+    requests_mock.get(base_url + '/catalog/catalog02', text=CATALOG02,
+                      headers={'content-type': 'text/turtle'})
+    return Client(base_url)
+
+
+class TestQuadWriterReader:
+    """Test fdpclient.export.QuadWriter and QuadReader"""
+
+    def test_roundtrip(self, graph, tmp_path):
+        """Test written quads are read back"""
+        path = tmp_path / 'out.nq'
+        with QuadWriter(path) as writer:
+            assert writer.write(graph, graph=EX.g1) == 3
+            writer.write(graph)
+            assert writer.count == 6
+        with QuadReader(path) as reader:
+            quads = list(reader)
+            assert len(quads) == 6
+            assert list(reader.graphs()) == [EX.g1]
+            g = rdflib.Graph()
+            for s, p, o in reader.triples(graph=EX.g1):
+                g.add((s, p, o))
+        assert isomorphic(g, graph)
+        assert {q[3] for q in quads} == {EX.g1, None}
+
+    def test_append(self, graph, tmp_path):
+        """Test the file is appended to"""
+        path = tmp_path / 'out.nt'
+        for _ in range(2):
+            with QuadWriter(path, quads=False) as writer:
+                writer.write(graph, graph=EX.g1)
+        with QuadReader(path) as reader:
+            assert len(list(reader)) == 6
+            assert list(reader.graphs()) == []
+
+    def test_filter(self, graph, tmp_path):
+        """Test the quad patterns"""
+        path = tmp_path / 'out.nq'
+        with QuadWriter(path) as writer:
+            writer.write(graph, graph=EX.g1)
+            writer.write(graph, graph=EX.g2)
+        with QuadReader(path) as reader:
+            assert len(list(reader.quads(predicate=EX.p))) == 4
+            assert len(list(reader.quads(predicate=EX.p, graph=str(EX.g2)))) == 2
+            assert len(list(reader.quads(object=Literal(3)))) == 2
+            assert list(reader.quads(subject=EX.missing)) == []
+
+    def test_empty(self, tmp_path):
+        """Test reading an empty file"""
+        path = tmp_path / 'empty.nq'
+        path.write_bytes(b'')
+        with QuadReader(path) as reader:
+            assert list(reader) == []
+
+
+class TestExport:
+    """Test fdpclient.export.export function"""
+
+    def test_export(self, client, tmp_path):
+        """Test a harvest is exported with one named graph per URL"""
+        path = tmp_path / 'fdp.nq'
+        stats = client.export(path, max_depth=1, workers=2)
+        assert stats['graphs'] == 3
+        assert stats['failed'] == 0
+        with QuadReader(path) as reader:
+            assert sorted(reader.graphs()) == [URIRef(base_url + '/catalog/catalog01'),
+                                               URIRef(base_url + '/catalog/catalog02'),
+                                               URIRef(base_url + '/fdp')]
+            assert len(list(reader)) == stats['triples']
+            titles = list(reader.triples(predicate=DCTERMS.title,
+                                         graph=base_url + '/catalog/catalog02'))
+            assert titles == [(URIRef(base_url + '/catalog/catalog02'), DCTERMS.title,
+                               Literal('Catalog 2'))]
+            catalogs = {s for s, _, _ in reader.triples(predicate=RDF.type, object=DCAT.Catalog)}
+            assert URIRef(base_url + '/catalog/catalog02') in catalogs
+
+    def test_streamed(self, client, requests_mock, tmp_path):
+        """Test N-Triples are exported as triples, without building graphs"""
+        line = f'<{base_url}/catalog/catalog02> <{DCTERMS.title}> "Catalog 2" .\n'
+        requests_mock.get(base_url + '/catalog/catalog02', text=line,
+                          headers={'content-type': 'application/n-triples'})
+        path = tmp_path / 'fdp.nq'
+        stats = client.export(path, max_depth=1, format='nt')
+        assert stats['graphs'] == 3
+        with QuadReader(path) as reader:
+            assert len(list(reader.triples(graph=base_url + '/catalog/catalog02'))) == 1
+        assert requests_mock.last_request.headers['Accept'].startswith('application/n-triples')
+
+    def test_failed(self, client, requests_mock, tmp_path):
+        """Test failed reads are counted and skipped"""
+        requests_mock.get(base_url + '/catalog/catalog02', status_code=500)
+        stats = client.export(tmp_path / 'fdp.nt', quads=False, max_depth=1)
+        assert stats['failed'] == 1
+        assert stats['graphs'] == 2
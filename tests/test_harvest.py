@@ -0,0 +1,113 @@
+import pytest
+import rdflib
+
+from fdpclient.client import Client
+from fdpclient.harvest import harvest, child_links, iter_child_links
+
+base_url = 'http://fdp.fairdatapoint.nl'
+
+DATASET = """@prefix dcat: <http://www.w3.org/ns/dcat#> .
+@prefix dcterms: <http://purl.org/dc/terms/> .
+<http://fdp.fairdatapoint.nl/dataset/breedb> a dcat:Dataset ;
+    dcterms:title "BreeDB" ;
+    dcat:distribution <http://fdp.fairdatapoint.nl/distribution/breedb-sparql>,
+        <http://fdp.fairdatapoint.nl/distribution/breedb-csv> .
+"""
+
+DISTRIBUTION = """@prefix dcat: <http://www.w3.org/ns/dcat#> .
+<{}> a dcat:Distribution .
+"""
+
+CATALOG02 = """@prefix dcat: <http://www.w3.org/ns/dcat#> .
+<http://fdp.fairdatapoint.nl/catalog/catalog02> a dcat:Catalog ;
+    dcat:dataset <http://fdp.fairdatapoint.nl/dataset/breedb> .
+"""
+
+@pytest.fixture()
+def client(requests_mock, datadir):
+    with open(datadir['fdp.ttl']) as f:
+        requests_mock.get(base_url + '/fdp', text=f.read(),
+                          headers={'content-type': 'text/turtle'})
+    with open(datadir['catalog01.ttl']) as f:
+        requests_mock.get(base_url + '/catalog/catalog01', text=f.read())
+    requests_mock.get(base_url + '/catalog/catalog02', text=CATALOG02)
+    requests_mock.get(base_url + '/dataset/breedb', text=DATASET)
+    for id in ('breedb-sparql', 'breedb-csv'):
+        url = f'{base_url}/distribution/{id}'
+        requests_mock.get(url, text=DISTRIBUTION.format(url))
+    return Client(base_url)
+
+
+class TestHarvest:
+    """Test fdpclient.harvest functions"""
+
+    def test_harvest_all(self, client, requests_mock):
+        """Test all metadata are harvested once, breadth-first"""
+        results = list(client.harvest(workers=1))
+        types = [t for _, t, _ in results]
+        assert types == ['fdp', 'catalog', 'catalog', 'dataset',
+                         'distribution', 'distribution']
+        assert all(isinstance(g, rdflib.Graph) for _, _, g in results)
+        urls = [u for u, _, _ in results]
+        assert len(urls) == len(set(urls))
+        # breedb is linked from both catalogs but read once
+        reads = [r.url for r in requests_mock.request_history]
+        assert reads.count(base_url + '/dataset/breedb') == 1
+
+    def test_concurrent(self, client):
+        """Test harvesting with concurrent reads"""
+        results = list(client.harvest(workers=4))
+        assert sorted(t for _, t, _ in results) == [
+            'catalog', 'catalog', 'dataset', 'distribution', 'distribution', 'fdp']
+
+    def test_types(self, client, requests_mock):
+        """Test only the given types are yielded and deeper ones not read"""
+        results = list(client.harvest(types=['catalog']))
+        assert sorted(u for u, _, _ in results) == [
+            base_url + '/catalog/catalog01', base_url + '/catalog/catalog02']
+        reads = [r.url for r in requests_mock.request_history]
+        assert base_url + '/dataset/breedb' not in reads
+
+    def test_max_depth(self, client):
+        """Test the depth limit"""
+        results = list(client.harvest(max_depth=2))
+        assert {t for _, t, _ in results} == {'fdp', 'catalog', 'dataset'}
+
+    def test_start_url(self, client):
+        """Test harvesting from a catalog"""
+        results = list(harvest(client, base_url + '/catalog/catalog01', type='catalog'))
+        assert [t for _, t, _ in results] == ['catalog', 'dataset',
+                                              'distribution', 'distribution']
+
+    def test_failed_read(self, client, requests_mock):
+        """Test a failed read is yielded and does not stop the harvest"""
+        requests_mock.get(base_url + '/catalog/catalog02', status_code=500)
+        results = {u: g for u, _, g in client.harvest()}
+        assert isinstance(results[base_url + '/catalog/catalog02'], RuntimeError)
+        assert isinstance(results[base_url + '/dataset/breedb'], rdflib.Graph)
+
+    def test_invalid(self, client):
+        """Test invalid arguments"""
+        with pytest.raises(ValueError):
+            list(client.harvest(types=['unknown']))
+        with pytest.raises(ValueError):
+            list(client.harvest(types=[]))
+        with pytest.raises(ValueError):
+            list(client.harvest(workers=0))
+
+    def test_child_links(self):
+        """Test child links of a dataset"""
+        g = rdflib.Graph().parse(data=DATASET, format='turtle')
+        assert sorted(child_links(g, 'dataset')) == [
+            base_url + '/distribution/breedb-csv',
+            base_url + '/distribution/breedb-sparql']
+        assert child_links(g, 'distribution') == []
+
+    def test_iter_child_links(self):
+        """Test child links of membership triples, literals skipped"""
+        s, p = rdflib.URIRef(base_url + '/catalog/c'), rdflib.URIRef('http://example.org/p')
+        triples = [(s, p, rdflib.URIRef(base_url + '/dataset/a/')),
+                   (s, p, rdflib.Literal('a')),
+                   (s, p, rdflib.URIRef(base_url + '/dataset/a'))]
+        assert list(iter_child_links(triples)) == [base_url + '/dataset/a'] * 2
+        assert list(iter_child_links(triples, unique=True)) == [base_url + '/dataset/a']
@@ -0,0 +1,38 @@
+import rdflib
+from rdflib import BNode, Literal, URIRef
+
+from fdpclient.hashing import graph_hash
+
+EX = rdflib.Namespace('http://example.org/')
+
+
+def make_graph(triples):
+    g = rdflib.Graph()
+    for triple in triples:
+        g.add(triple)
+    return g
+
+
+class TestGraphHash:
+    """Test fdpclient.hashing.graph_hash function"""
+
+    def test_order_independent(self):
+        """Test graphs with the same triples have the same hash"""
+        triples = [(EX.a, EX.p, Literal(i)) for i in range(20)]
+        assert graph_hash(make_graph(triples)) == graph_hash(make_graph(triples[::-1]))
+
+    def test_different(self):
+        """Test graphs with different triples have different hashes"""
+        g1 = make_graph([(EX.a, EX.p, Literal('1'))])
+        g2 = make_graph([(EX.a, EX.p, Literal(1))])
+        g3 = make_graph([(EX.a, EX.p, Literal('1', lang='en'))])
+        assert len({graph_hash(g) for g in (g1, g2, g3, rdflib.Graph())}) == 4
+
+    def test_blank_nodes(self):
+        """Test blank node labels do not change the hash"""
+        def graph(b):
+            return make_graph([(EX.a, EX.p, b), (b, EX.q, Literal('x'))])
+        assert graph_hash(graph(BNode('x1'))) == graph_hash(graph(BNode('y2')))
+        assert graph_hash(graph(BNode())) != graph_hash(
+            make_graph([(EX.a, EX.p, URIRef('http://example.org/b')),
+                        (URIRef('http://example.org/b'), EX.q, Literal('x'))]))
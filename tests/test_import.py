@@ -0,0 +1,71 @@
+import subprocess
+import sys
+import pytest
+
+#: The import time budget of fdpclient in seconds, a fraction of the time of
+#: rdflib and requests
+IMPORT_BUDGET = 0.1
+
+HEAVY_MODULES = ('rdflib', 'requests', 'httpx')
+
+def run(code, *options):
+    """Run code in a new interpreter and return its stdout and stderr"""
+    p = subprocess.run([sys.executable, *options, '-c', code],
+                       capture_output=True, text=True, check=True)
+    return p.stdout, p.stderr
+
+def loaded(code):
+    """Return the heavy modules loaded by code in a new interpreter"""
+    out, _ = run(code + f'\nprint(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])')
+    return out.split()
+
+
+class TestImport:
+    """Test the import of fdpclient defers its dependencies"""
+
+    def test_import(self):
+        """Test the package import loads neither rdflib nor requests"""
+        assert loaded('import sys, fdpclient') == []
+
+    def test_import_time(self):
+        """Test the package import time is within the budget"""
+        _, err = run('import fdpclient', '-X', 'importtime')
+        times = {line.split('|')[2].strip(): int(line.split('|')[1])
+                 for line in err.splitlines() if line.startswith('import time:')
+                 and not line.split('|')[1].strip().isalpha()}
+        assert times['fdpclient'] / 1e6 < IMPORT_BUDGET
+
+    def test_operations(self):
+        """Test the operations are imported on first use"""
+        assert loaded('import sys, fdpclient\nfdpclient.delete') == ['requests']
+        assert loaded('import sys\nfrom fdpclient import read\nread') == ['requests']
+
+    def test_unknown_attribute(self):
+        """Test an unknown attribute raises AttributeError"""
+        import fdpclient
+        with pytest.raises(AttributeError):
+            fdpclient.read_everything
+        assert 'read_raw' in dir(fdpclient)
+
+    def test_read_raw(self):
+        """Test a raw read does not load rdflib"""
+        code = '\n'.join([
+            'import sys, fdpclient, requests_mock',
+            'with requests_mock.Mocker() as m:',
+            "    m.get('http://example.org/fdp', text='<a> <b> <c> .')",
+            "    assert fdpclient.read_raw('http://example.org/fdp', format='nt')",
+        ])
+        assert loaded(code) == ['requests']
+
+    def test_client(self):
+        """Test a client deleting and reading raw metadata does not load rdflib"""
+        code = '\n'.join([
+            'import sys, fdpclient.client, requests_mock',
+            'with requests_mock.Mocker() as m:',
+            "    m.delete('http://example.org/catalog/c1', status_code=204)",
+            "    m.get('http://example.org/catalog/c1', text='<a> <b> <c> .')",
+            "    client = fdpclient.client.Client('http://example.org', fdp_path='fdp')",
+            "    client.delete_catalog('c1')",
+            "    assert client.read_raw('catalog', 'c1', format='nt')",
+        ])
+        assert loaded(code) == ['requests']
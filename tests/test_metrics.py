@@ -0,0 +1,151 @@
+import io
+import pytest
+import rdflib
+
+from fdpclient.cache import GraphCache
+from fdpclient.client import Client
+from fdpclient.metrics import (Histogram, HistogramCollector, PrometheusExporter,
+                               RequestEvent)
+
+base_url = 'http://example.org'
+catalog_url = base_url + '/catalog'
+data_url = catalog_url + '/catalog01'
+
+@pytest.fixture()
+def data(datadir):
+    with open(datadir['catalog01.ttl']) as f:
+        return f.read()
+
+@pytest.fixture()
+def events():
+    return []
+
+@pytest.fixture()
+def client(requests_mock, events):
+    return Client(base_url, fdp_path='fdp', hooks=[events.append])
+
+
+class TestHistogram:
+    """Test fdpclient.metrics.Histogram"""
+
+    def test_observe(self):
+        """Test values are counted in their buckets"""
+        h = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            h.observe(value)
+        assert h.counts == [2, 1, 1]
+        assert h.count == 4
+        assert h.sum == pytest.approx(2.65)
+
+    def test_quantile(self):
+        """Test quantile estimates"""
+        h = Histogram(buckets=(0.1, 1.0))
+        assert h.quantile(0.5) is None
+        for value in (0.05, 0.05, 0.5, 2.0):
+            h.observe(value)
+        assert h.quantile(0.5) == 0.1
+        assert h.quantile(0.75) == 1.0
+        assert h.quantile(1) == float('inf')
+
+
+class TestHooks:
+    """Test fdpclient.client.Client hooks"""
+
+    def test_read(self, client, events, data, requests_mock):
+        """Test the event of a read"""
+        requests_mock.get(data_url, text=data)
+        client.read_catalog('catalog01')
+        event, = events
+        assert (event.operation, event.type, event.url) == ('read', 'catalog', data_url)
+        assert event.status == 200
+        assert event.bytes_received == len(data.encode('utf-8'))
+        assert set(event.phases) == {'wait', 'download', 'parse'}
+        assert event.elapsed >= event.phases['parse']
+        assert event.error is None and not event.cached
+
+    def test_create_graph(self, client, events, data, requests_mock):
+        """Test the event of a create with a graph"""
+        requests_mock.post(catalog_url)
+        g = rdflib.Graph().parse(data=data, format='turtle')
+        client.create_catalog(g)
+        event, = events
+        assert event.operation == 'create'
+        assert 'serialize' in event.phases
+        assert event.bytes_sent == len(requests_mock.last_request.body)
+
+    def test_error(self, client, events, requests_mock):
+        """Test the event of a failed request"""
+        requests_mock.delete(data_url, status_code=404)
+        with pytest.raises(RuntimeError):
+            client.delete_catalog('catalog01')
+        event, = events
+        assert event.status == 404
+        assert isinstance(event.error, RuntimeError)
+
+    def test_graph_cache(self, requests_mock, events, data):
+        """Test reads served from the graph cache are marked as cached"""
+        requests_mock.get(data_url, text=data)
+        client = Client(base_url, fdp_path='fdp', graph_cache=GraphCache(),
+                        hooks=[events.append])
+        client.read_catalog('catalog01')
+        client.read_catalog('catalog01')
+        assert [e.cached for e in events] == [False, True]
+        assert events[1].status is None and events[1].phases == {}
+
+    def test_failing_hook(self, requests_mock, data):
+        """Test a failing hook does not break the request"""
+        requests_mock.get(data_url, text=data)
+        def hook(event):
+            raise ValueError('broken')
+        client = Client(base_url, fdp_path='fdp', hooks=[hook])
+        assert isinstance(client.read_catalog('catalog01'), rdflib.Graph)
+
+
+class TestCollector:
+    """Test fdpclient.metrics.HistogramCollector and PrometheusExporter"""
+
+    def make_event(self, status=200, elapsed=0.2):
+        event = RequestEvent('read', 'catalog', data_url)
+        event.status = status
+        event.elapsed = elapsed
+        event.phases = {'wait': 0.1, 'parse': 0.05}
+        event.bytes_received = 100
+        return event
+
+    def test_collect(self):
+        """Test events are aggregated per operation, type and phase"""
+        collector = HistogramCollector()
+        collector(self.make_event())
+        collector(self.make_event(status=404, elapsed=0.3))
+        assert collector.requests == {('read', 'catalog', '200'): 1,
+                                      ('read', 'catalog', '404'): 1}
+        assert collector.histograms['read', 'catalog', 'total'].count == 2
+        assert collector.histograms['read', 'catalog', 'wait'].sum == pytest.approx(0.2)
+        assert collector.bytes == {('read', 'catalog', 'received'): 200}
+        collector.clear()
+        assert collector.requests == {}
+
+    def test_export(self):
+        """Test the Prometheus text format written to a local sink"""
+        collector = HistogramCollector(buckets=(0.1, 1.0))
+        collector(self.make_event())
+        sink = io.StringIO()
+        PrometheusExporter(collector).export(sink)
+        lines = sink.getvalue().splitlines()
+        assert 'fdpclient_requests_total{operation="read",type="catalog",status="200"} 1' in lines
+        assert 'fdpclient_bytes_total{operation="read",type="catalog",direction="received"} 100' in lines
+        labels = 'operation="read",type="catalog",phase="total"'
+        assert f'fdpclient_request_seconds_bucket{{{labels},le="0.1"}} 0' in lines
+        assert f'fdpclient_request_seconds_bucket{{{labels},le="1.0"}} 1' in lines
+        assert f'fdpclient_request_seconds_bucket{{{labels},le="+Inf"}} 1' in lines
+        assert f'fdpclient_request_seconds_count{{{labels}}} 1' in lines
+
+    def test_export_callable(self, requests_mock, data):
+        """Test exporting the metrics of a client to a callable sink"""
+        requests_mock.get(data_url, text=data)
+        collector = HistogramCollector()
+        Client(base_url, fdp_path='fdp', hooks=[collector]).read_catalog('catalog01')
+        texts = []
+        PrometheusExporter(collector, prefix='fdp').export(texts.append)
+        assert 'fdp_requests_total{operation="read",type="catalog",status="200"} 1' in texts[0]
+        assert 'phase="parse"' in texts[0]
@@ -0,0 +1,172 @@
+import os
+import pytest
+import rdflib
+
+from fdpclient.client import Client
+from fdpclient.mirror import Mirror
+
+base_url = 'http://fdp.fairdatapoint.nl'
+
+DATASET = """@prefix dcat: <http://www.w3.org/ns/dcat#> .
+<http://fdp.fairdatapoint.nl/dataset/breedb> a dcat:Dataset ;
+    dcat:distribution <http://fdp.fairdatapoint.nl/distribution/breedb-csv> .
+"""
+
+DISTRIBUTION = """@prefix dcat: <http://www.w3.org/ns/dcat#> .
+<http://fdp.fairdatapoint.nl/distribution/breedb-csv> a dcat:Distribution .
+"""
+
+CATALOG02 = """@prefix dcat: <http://www.w3.org/ns/dcat#> .
+<http://fdp.fairdatapoint.nl/catalog/catalog02> a dcat:Catalog ;
+    dcat:dataset <http://fdp.fairdatapoint.nl/dataset/breedb> .
+"""
+
+class MockFDP:
+    """Serve documents with ETags and answer 304 to matching revalidations"""
+
+    def __init__(self, requests_mock, documents):
+        self.documents = documents
+        self.requests_mock = requests_mock
+        for url in documents:
+            requests_mock.get(url, text=self.callback)
+
+    def callback(self, request, context):
+        body = self.documents[request.url.rstrip('/')]
+        etag = f'"{hash(body)}"'
+        context.headers['ETag'] = etag
+        context.headers['content-type'] = 'text/turtle'
+        if request.headers.get('If-None-Match') == etag:
+            context.status_code = 304
+            return ''
+        return body
+
+    def urls(self):
+        return [r.url.rstrip('/') for r in self.requests_mock.request_history]
+
+@pytest.fixture()
+def server(requests_mock, datadir):
+    documents = {}
+    with open(datadir['fdp.ttl']) as f:
+        documents[base_url + '/fdp'] = f.read()
+    with open(datadir['catalog01.ttl']) as f:
+        documents[base_url + '/catalog/catalog01'] = f.read()
+    documents[base_url + '/catalog/catalog02'] = CATALOG02
+    documents[base_url + '/dataset/breedb'] = DATASET
+    documents[base_url + '/distribution/breedb-csv'] = DISTRIBUTION
+    return MockFDP(requests_mock, documents)
+
+@pytest.fixture()
+def mirror(server, tmp_path):
+    with Mirror(Client(base_url, fdp_path='fdp'), tmp_path / 'mirror') as mirror:
+        yield mirror
+
+
+class TestMirror:
+    """Test fdpclient.mirror.Mirror"""
+
+    def test_refresh(self, mirror, server):
+        """Test the first refresh mirrors all documents"""
+        stats = mirror.refresh(workers=2)
+        assert stats == {'new': 5, 'changed': 0, 'unchanged': 0, 'fresh': 0, 'failed': 0,
+                         'removed': 0}
+        assert mirror.urls() == sorted(server.documents)
+        assert mirror.urls('catalog') == [base_url + '/catalog/catalog01',
+                                          base_url + '/catalog/catalog02']
+        record = mirror.record(base_url + '/catalog/catalog02')
+        assert record.type == 'catalog'
+        assert record.etag is not None
+        with open(mirror.path(record.hash), encoding='utf-8') as f:
+            assert f.read() == CATALOG02
+
+    def test_types(self, mirror, server):
+        """Test only the given types are mirrored, through the other levels"""
+        stats = mirror.refresh(types=['dataset'])
+        assert stats['new'] == 1
+        assert mirror.urls() == [base_url + '/dataset/breedb']
+        assert base_url + '/distribution/breedb-csv' not in server.urls()
+
+    def test_incremental(self, mirror, server):
+        """Test refreshes revalidate and only download changed documents"""
+        mirror.refresh()
+        server.documents[base_url + '/dataset/breedb'] = DATASET + '# changed\n'
+        server.documents[base_url + '/catalog/catalog02'] += \
+            '<http://fdp.fairdatapoint.nl/catalog/catalog02> <http://purl.org/dc/terms/title> "2" .\n'
+        stats = mirror.refresh()
+        assert stats == {'new': 0, 'changed': 2, 'unchanged': 3, 'fresh': 0, 'failed': 0,
+                         'removed': 0}
+        g = mirror.read(base_url + '/catalog/catalog02')
+        assert len(g) == 3
+
+    def test_validators_other_format(self, server, tmp_path):
+        """Test validators are sent for documents stored in another format"""
+        with Mirror(Client(base_url, fdp_path='fdp'), tmp_path, format='nt') as mirror:
+            mirror.refresh()
+            assert mirror.record(base_url + '/fdp').format == 'turtle'
+            stats = mirror.refresh()
+        assert stats['unchanged'] == 5
+        revalidations = server.requests_mock.request_history[5:]
+        assert all('If-None-Match' in r.headers for r in revalidations)
+
+    def test_removed(self, mirror, server):
+        """Test the documents no longer linked from the server are removed"""
+        mirror.refresh()
+        url = base_url + '/distribution/breedb-csv'
+        path = mirror.path(mirror.record(url).hash)
+        server.documents[base_url + '/dataset/breedb'] = \
+            DATASET.replace('dcat:distribution', 'dcat:landingPage')
+        stats = mirror.refresh()
+        assert stats['removed'] == 1
+        assert mirror.record(url) is None
+        assert not os.path.exists(path)
+
+    def test_removed_failed(self, mirror, server, requests_mock):
+        """Test no document is removed when a document failed"""
+        mirror.refresh()
+        requests_mock.get(base_url + '/catalog/catalog02', status_code=500)
+        stats = mirror.refresh(prune=True)
+        assert stats['removed'] == 0
+        assert len(mirror) == 5
+        assert mirror.refresh(prune=False)['removed'] == 0
+
+    def test_max_age(self, mirror, server):
+        """Test fresh documents are not revalidated"""
+        mirror.refresh()
+        count = len(server.urls())
+        stats = mirror.refresh(max_age=3600)
+        assert stats['fresh'] == 5
+        assert len(server.urls()) == count
+
+    def test_read(self, mirror, server):
+        """Test reads are served from the mirror"""
+        url = base_url + '/catalog/catalog02'
+        g = mirror.read(url)
+        assert isinstance(g, rdflib.Graph)
+        assert mirror.record(url).type == 'catalog'
+        count = len(server.urls())
+        assert len(mirror.read(url)) == len(g)
+        assert len(server.urls()) == count
+        mirror.read(url, max_age=0)
+        assert len(server.urls()) == count + 1
+
+    def test_failed(self, mirror, server, requests_mock):
+        """Test a failed document does not stop the refresh"""
+        requests_mock.get(base_url + '/catalog/catalog02', status_code=500)
+        stats = mirror.refresh()
+        assert stats['failed'] == 1
+        assert base_url + '/catalog/catalog02' not in mirror.urls()
+        assert len(mirror) == 4
+
+    def test_normalize_prune(self, server, tmp_path):
+        """Test documents stored as N-Triples and pruning of old versions"""
+        url = base_url + '/distribution/breedb-csv'
+        with Mirror(Client(base_url, fdp_path='fdp'), tmp_path, normalize=True) as mirror:
+            mirror.read(url)
+            old = mirror.record(url)
+            assert old.format == 'nt'
+            rdflib.Graph().parse(mirror.path(old.hash), format='nt')
+            server.documents[url] = CATALOG02
+            mirror.read(url, max_age=0)
+            assert mirror.record(url).hash != old.hash
+            assert mirror.prune() == 1
+            assert not os.path.exists(mirror.path(old.hash))
+            assert len(mirror) == 1
@@ -0,0 +1,126 @@
+import pytest
+
+from fdpclient import operations
+from fdpclient.cache import HTTPCache
+from fdpclient.client import Client
+from fdpclient.negotiation import FormatPolicy, accept_header, format_of, ranked_formats
+
+base_url = 'http://example.org'
+data_url = base_url + '/catalog/catalog01'
+
+@pytest.fixture()
+def data(datadir):
+    with open(datadir['catalog01.ttl']) as f:
+        return f.read()
+
+@pytest.fixture()
+def data_jsonld(datadir):
+    with open(datadir['catalog01.jsonld']) as f:
+        return f.read()
+
+
+class TestHeaders:
+    """Test the negotiation headers"""
+
+    def test_format_of(self):
+        """Test the formats of content types"""
+        assert format_of('text/turtle; charset=UTF-8') == 'turtle'
+        assert format_of('Application/N-Triples') == 'nt'
+        assert format_of('application/xml') == 'xml'
+        assert format_of('text/html') is None
+        assert format_of(None) is None
+
+    def test_accept_header(self):
+        """Test q-values decrease with the preference"""
+        assert accept_header(['nt', 'turtle', 'xml']) == \
+            'application/n-triples, text/turtle;q=0.9, application/rdf+xml;q=0.8'
+
+    def test_ranked_formats(self):
+        """Test the requested format comes first, then the cheapest"""
+        assert ranked_formats('xml') == ['xml', 'nt', 'turtle', 'n3', 'json-ld']
+
+
+class TestFormatPolicy:
+    """Test fdpclient.negotiation.FormatPolicy"""
+
+    def test_rank(self):
+        """Test measured costs reorder the measured formats only"""
+        policy = FormatPolicy(min_size=10)
+        assert policy.rank() == ['nt', 'turtle', 'n3', 'xml', 'json-ld']
+        policy.record_parse('turtle', 1000, 0.5)
+        policy.record_parse('json-ld', 1000, 0.1)
+        policy.record_parse('xml', 5, 10)
+        assert policy.rank() == ['nt', 'json-ld', 'n3', 'xml', 'turtle']
+        assert policy.cost('xml') is None
+
+    def test_smoothing(self):
+        """Test the cost is a moving average"""
+        policy = FormatPolicy(smoothing=0.5, min_size=1)
+        policy.record_parse('nt', 100, 1.0)
+        policy.record_parse('nt', 100, 3.0)
+        assert policy.cost('nt') == pytest.approx(0.02)
+
+    def test_hosts(self):
+        """Test unsupported formats are remembered per host"""
+        policy = FormatPolicy(formats=['nt', 'turtle', 'xml'])
+        policy.record_response(data_url, 'nt', 'turtle')
+        assert policy.choose(data_url) == 'turtle'
+        assert policy.choose('http://other.org/fdp') == 'nt'
+        policy.record_failure(data_url, 'turtle')
+        assert policy.formats_of(data_url) == ['xml']
+        assert policy.accept(data_url, 'turtle') == 'text/turtle, application/rdf+xml;q=0.9'
+        policy.record_failure(data_url, 'xml')
+        assert policy.formats_of(data_url) == ['nt', 'turtle', 'xml']
+
+    def test_supported(self):
+        """Test a format a host answered is not unsupported by a later answer"""
+        policy = FormatPolicy()
+        policy.record_response(data_url, 'nt', 'nt')
+        policy.record_response(data_url, 'nt', 'turtle')
+        assert policy.choose(data_url) == 'nt'
+
+    def test_invalid_format(self):
+        """Test an unknown format"""
+        with pytest.raises(ValueError):
+            FormatPolicy(formats=['csv'])
+
+
+class TestRead:
+    """Test reads parsed by the response content type"""
+
+    def test_content_type(self, data_jsonld, requests_mock):
+        """Test a JSON-LD answer to a Turtle request"""
+        requests_mock.get(data_url, text=data_jsonld,
+                          headers={'Content-Type': 'application/ld+json'})
+        g = operations.read(data_url, format='turtle')
+        assert len(g) == 10
+
+    def test_cache(self, data_jsonld, requests_mock):
+        """Test a cached body is kept with its own format"""
+        cache = HTTPCache()
+        requests_mock.get(data_url, text=data_jsonld,
+                          headers={'Content-Type': 'application/ld+json', 'ETag': '"1"'})
+        operations.read(data_url, cache=cache)
+        entry = cache.get(data_url, 'turtle')
+        assert entry.format == 'json-ld'
+        entry.graph = None
+        assert len(entry.get_graph()) == 10
+
+    def test_policy(self, data, requests_mock):
+        """Test a client policy learns the formats of a server"""
+        requests_mock.get(data_url, text=data, headers={'Content-Type': 'text/turtle'})
+        policy = FormatPolicy(min_size=0)
+        client = Client(base_url, fdp_path='fdp', format_policy=policy)
+        client.read_catalog('catalog01')
+        assert requests_mock.last_request.headers['Accept'].startswith('application/n-triples,')
+        assert policy.cost('turtle') is not None
+        client.read_catalog('catalog01')
+        assert requests_mock.last_request.headers['Accept'].startswith('text/turtle,')
+
+    def test_policy_failure(self, requests_mock):
+        """Test a body failing to parse is recorded"""
+        requests_mock.get(data_url, text='not turtle', headers={'Content-Type': 'text/turtle'})
+        policy = FormatPolicy()
+        with pytest.raises(Exception):
+            operations.read(data_url, policy=policy)
+        assert 'turtle' not in policy.formats_of(data_url)
@@ -0,0 +1,114 @@
+import io
+import pytest
+import rdflib
+from rdflib import BNode, Literal, URIRef
+from rdflib.compare import isomorphic
+from rdflib.plugins.parsers.ntriples import ParseError
+
+from fdpclient.ntriples import _LineParser, format_line, iter_triples, parse
+
+DATA = b"""# a comment
+<http://example.org/a> <http://example.org/p> "caf\\u00E9"@fr .
+
+<http://example.org/a> <http://example.org/q> <http://example.org/b> ."""
+
+
+class TestIterTriples:
+    """Test fdpclient.ntriples.iter_triples function"""
+
+    def test_triples(self):
+        """Test comments, blank lines, escapes and a missing final newline"""
+        triples = list(iter_triples(io.BytesIO(DATA)))
+        assert triples == [
+            (URIRef('http://example.org/a'), URIRef('http://example.org/p'),
+             Literal('café', lang='fr')),
+            (URIRef('http://example.org/a'), URIRef('http://example.org/q'),
+             URIRef('http://example.org/b'))]
+
+    def test_lazy(self):
+        """Test triples are yielded before the stream is read to the end"""
+        stream = io.BytesIO(DATA + b'\n' + b'garbage\n' * 10000)
+        triples = iter_triples(stream)
+        assert next(triples)[1] == URIRef('http://example.org/p')
+        assert stream.tell() < len(stream.getvalue())
+
+    def test_predicates(self, monkeypatch):
+        """Test the terms of the lines of other predicates are not built"""
+        iris = []
+        monkeypatch.setattr('fdpclient.ntriples.URIRef',
+                            lambda value: iris.append(value) or URIRef(value))
+        data = DATA + b'\n<http://example.org/c> <http://example.org/p> <http://example.org/d> .\n'
+        triples = list(iter_triples(io.BytesIO(data), predicates=[URIRef('http://example.org/q')]))
+        assert triples == [(URIRef('http://example.org/a'), URIRef('http://example.org/q'),
+                            URIRef('http://example.org/b'))]
+        assert 'http://example.org/c' not in iris
+
+    def test_invalid(self):
+        """Test an invalid line"""
+        with pytest.raises(ParseError):
+            list(iter_triples(io.BytesIO(b'<http://example.org/a> oops .\n')))
+
+    def test_cache_size(self, monkeypatch):
+        """Test the term caches are bounded and blank nodes kept"""
+        monkeypatch.setattr('fdpclient.ntriples.CACHE_SIZE', 4)
+        lines = [f'_:b <http://example.org/p> <http://example.org/o{i}> .\n'
+                 for i in range(20)]
+        triples = list(iter_triples(io.BytesIO(''.join(lines).encode('utf-8'))))
+        assert len(triples) == 20
+        assert len({s for s, _, _ in triples}) == 1
+        assert triples[-1][2] == URIRef('http://example.org/o19')
+
+
+class TestParse:
+    """Test fdpclient.ntriples.parse function"""
+
+    def test_same_as_rdflib(self, datadir):
+        """Test the triples are those of the rdflib parser"""
+        with open(datadir['catalog01.nt'], 'rb') as f:
+            data = f.read()
+        g = rdflib.Graph()
+        g.addN((s, p, o, g) for s, p, o in parse(data))
+        assert isomorphic(g, rdflib.Graph().parse(data=data, format='nt'))
+
+    def test_terms(self):
+        """Test blank nodes, datatypes, language tags, escapes and comments"""
+        triples = parse('_:b1 <http://example.org/p> "1"^^<http://www.w3.org/2001/XMLSchema#integer> .\n'
+                        + '_:b1 <http://example.org/q> _:b2 . # comment\r\n'
+                        + '<http://example.org/\\u00E9> <http://example.org/p> "a \\"b\\"\\n"@en-GB .\n')
+        (b1, _, one), (b1_, _, b2), (s, _, text) = triples
+        assert b1 is b1_ and isinstance(b2, BNode) and b1 != b2
+        assert one == Literal(1)
+        assert s == URIRef('http://example.org/é')
+        assert text == Literal('a "b"\n', lang='en-GB')
+
+    def test_invalid(self):
+        """Test a Turtle document is rejected"""
+        with pytest.raises(ParseError):
+            parse('@prefix ex: <http://example.org/> .\nex:a ex:p ex:b .\n')
+
+
+class TestFormatLine:
+    """Test fdpclient.ntriples.format_line function"""
+
+    def test_roundtrip(self):
+        """Test escaped terms are parsed back"""
+        triples = [(URIRef('http://example.org/a b'), URIRef('http://example.org/p'),
+                    Literal('a "b"\n\\ é', lang='en')),
+                   (BNode(), URIRef('http://example.org/p'), Literal(1))]
+        lines = [format_line(t) for t in triples]
+        assert lines[0].startswith('<http://example.org/a\\u0020b> ')
+        assert lines[1].endswith('"1"^^<http://www.w3.org/2001/XMLSchema#integer> .\n')
+        parsed = parse(''.join(lines))
+        assert parsed[0] == triples[0]
+        assert parsed[1][1:] == triples[1][1:]
+
+    def test_quads(self):
+        """Test lines in a named graph and in the default graph"""
+        triple = (URIRef('http://example.org/s'), URIRef('http://example.org/p'),
+                  Literal('o'))
+        graph = URIRef('http://example.org/g')
+        lines = [format_line(triple, graph), format_line(triple)]
+        assert lines[0] == '<http://example.org/s> <http://example.org/p> "o" <http://example.org/g> .\n'
+        assert list(_LineParser().parse(lines, quads=True)) == [triple + (graph,), triple + (None,)]
+        with pytest.raises(ParseError):
+            parse(lines[0])
@@ -1,8 +1,11 @@
 import pytest
 import rdflib
+from rdflib.compare import isomorphic
 import requests
 
 from fdpclient import operations
+from fdpclient.exceptions import TransportError
+from fdpclient.session import create_session
 
 base_url = 'http://example.org/catalog'
 data_url = base_url + '/catalog01'
@@ -71,12 +74,14 @@ class TestDefault:
 
     def test_read_format(self, data, requests_mock):
         """Test read function parameter `format` overwriting `accept`"""
-        requests_mock.get(data_url, text=data,
-            request_headers={'content-type': 'text/turtle'})
+        requests_mock.get(data_url, text=data)
         r = operations.read(data_url, format='turtle',
-            headers={'content-type': 'application/ld+json'})
+            headers={'accept': 'application/ld+json'})
         assert isinstance(r, rdflib.Graph)
         assert  'hasVersion "1.0"' in r.serialize(format='turtle')
+        accept = requests_mock.last_request.headers['Accept']
+        assert accept.startswith('text/turtle, application/n-triples;q=0.9')
+        assert 'application/ld+json;q=' in accept
 
     def test_update_format(self, data_update, requests_mock):
         """Test update function parameter `format` overwriting `content-type`"""
@@ -86,6 +91,29 @@ class TestDefault:
         assert r is None
 
 
+class TestSession:
+    """Test session parameter of fdpclient.operations functions"""
+
+    def test_read(self, data, requests_mock):
+        """Test read function with a pooled session"""
+        requests_mock.get(data_url, text=data)
+        with create_session() as session:
+            r = operations.read(data_url, session=session)
+        assert isinstance(r, rdflib.Graph)
+        assert requests_mock.call_count == 1
+
+    def test_create_update_delete(self, data, data_update, requests_mock):
+        """Test create, update and delete functions with a pooled session"""
+        requests_mock.post(base_url)
+        requests_mock.put(data_url)
+        requests_mock.delete(data_url)
+        with create_session() as session:
+            assert operations.create(base_url, data=data, session=session) is None
+            assert operations.update(data_url, data=data_update, session=session) is None
+            assert operations.delete(data_url, session=session) is None
+        assert requests_mock.call_count == 3
+
+
 class TestGraphData:
     """Test graph data as input of fdpclient.operations functions"""
 
@@ -105,59 +133,191 @@ class TestException:
     """Test exceptions and errors for fdpclient.operations functions"""
 
     # test unexpected errors
-    def test_create_unexpected_error(self, data, requests_mock, capsys):
+    def test_create_unexpected_error(self, data, requests_mock, caplog):
         """Test create function unexpected error"""
         requests_mock.post(base_url, exc=ConnectionError)
         with pytest.raises(ConnectionError):
             r = operations.create(base_url, data=data)
-        assert 'Unexpected error when connecting to' in capsys.readouterr().out
+        assert 'Unexpected error when connecting to' in caplog.text
 
-    def test_read_unexpected_error(self, data, requests_mock, capsys):
+    def test_read_unexpected_error(self, data, requests_mock, caplog):
         """Test read function unexpected error"""
         requests_mock.get(data_url, exc=ConnectionError)
         with pytest.raises(ConnectionError):
             r = operations.read(data_url)
-        assert 'Unexpected error when connecting to' in capsys.readouterr().out
+        assert 'Unexpected error when connecting to' in caplog.text
 
-    def test_update_unexpected_error(self, data_update, requests_mock, capsys):
+    def test_update_unexpected_error(self, data_update, requests_mock, caplog):
         """Test update function unexpected error"""
         requests_mock.put(data_url, exc=ConnectionError)
         with pytest.raises(ConnectionError):
             r = operations.update(data_url, data=data_update)
-        assert 'Unexpected error when connecting to' in capsys.readouterr().out
+        assert 'Unexpected error when connecting to' in caplog.text
 
-    def test_delete_unexpected_error(self, requests_mock, capsys):
+    def test_delete_unexpected_error(self, requests_mock, caplog):
         """Test read function unexpected error"""
         requests_mock.delete(data_url, exc=ConnectionError)
         with pytest.raises(ConnectionError):
             r = operations.delete(data_url)
-        assert 'Unexpected error when connecting to' in capsys.readouterr().out
+        assert 'Unexpected error when connecting to' in caplog.text
+
+    def test_transport_error(self, requests_mock):
+        """Test the transport error carries the error and attempts"""
+        requests_mock.get(data_url, exc=requests.ConnectTimeout)
+        with pytest.raises(TransportError) as excinfo:
+            operations.read(data_url)
+        error = excinfo.value
+        assert isinstance(error.__cause__, requests.ConnectTimeout)
+        assert error.error is error.__cause__
+        assert (error.url, error.attempts) == (data_url, 1)
+        assert error.elapsed >= 0
+        assert isinstance(error, RuntimeError)
+        assert isinstance(error, ConnectionError)
 
     # test HTTP errors
-    def test_create_http_error(self, data, requests_mock, capsys):
+    def test_create_http_error(self, data, requests_mock, caplog):
         """Test create function HTTP error"""
         requests_mock.post(base_url, status_code=300)
         with pytest.raises(RuntimeError):
             r = operations.create(base_url, data=data)
-        assert 'HTTP error: 300' in capsys.readouterr().out
+        assert 'HTTP error: 300' in caplog.text
 
-    def test_read_http_error(self, data, requests_mock, capsys):
+    def test_read_http_error(self, data, requests_mock, caplog):
         """Test read function HTTP error"""
         requests_mock.get(data_url, status_code=300)
         with pytest.raises(RuntimeError):
             r = operations.read(data_url)
-        assert 'HTTP error: 300' in capsys.readouterr().out
+        assert 'HTTP error: 300' in caplog.text
 
-    def test_update_http_error(self, data_update, requests_mock, capsys):
+    def test_update_http_error(self, data_update, requests_mock, caplog):
         """Test update function HTTP error"""
         requests_mock.put(data_url, status_code=300)
         with pytest.raises(RuntimeError):
             r = operations.update(data_url, data=data_update)
-        assert 'HTTP error: 300' in capsys.readouterr().out
+        assert 'HTTP error: 300' in caplog.text
 
-    def test_delete_http_error(self, requests_mock, capsys):
+    def test_delete_http_error(self, requests_mock, caplog):
         """Test read function HTTP error"""
         requests_mock.delete(data_url, status_code=300)
         with pytest.raises(RuntimeError):
             r = operations.delete(data_url)
-        assert 'HTTP error: 300' in capsys.readouterr().out
\ No newline at end of file
+        assert 'HTTP error: 300' in caplog.text
+
+class TestStream:
+    """Test streaming reads of fdpclient.operations functions"""
+
+    @pytest.mark.parametrize('format, file', [
+        ('turtle', 'catalog01.ttl'), ('nt', 'catalog01.nt'),
+        ('xml', 'catalog01.rdf'), ('json-ld', 'catalog01.jsonld')])
+    def test_read_stream(self, datadir, requests_mock, format, file):
+        """Test read function parsing the response stream"""
+        with open(datadir[file], 'rb') as f:
+            requests_mock.get(data_url, content=f.read())
+        r = operations.read(data_url, format=format, stream=True)
+        assert isinstance(r, rdflib.Graph)
+        assert isomorphic(r, operations.read(data_url, format=format))
+
+    def test_iter_ntriples(self, datadir, requests_mock):
+        """Test iter_ntriples function"""
+        with open(datadir['catalog01.nt'], 'rb') as f:
+            requests_mock.get(data_url, content=f.read())
+        triples = operations.iter_ntriples(data_url)
+        assert requests_mock.call_count == 0
+        triples = set(triples)
+        assert requests_mock.last_request.headers['Accept'] == 'application/n-triples'
+        assert triples == set(operations.read(data_url, format='nt'))
+
+    def test_iter_ntriples_http_error(self, requests_mock, caplog):
+        """Test iter_ntriples function HTTP error"""
+        requests_mock.get(data_url, status_code=404)
+        with pytest.raises(RuntimeError):
+            list(operations.iter_ntriples(data_url))
+        assert 'HTTP error: 404' in caplog.text
+
+
+class TestTriples:
+    """Test reading triples without building a graph"""
+
+    @pytest.mark.parametrize('format, file', [
+        ('turtle', 'catalog01.ttl'), ('nt', 'catalog01.nt'), ('n3', 'catalog01.n3'),
+        ('xml', 'catalog01.rdf'), ('json-ld', 'catalog01.jsonld')])
+    def test_read_triples(self, datadir, requests_mock, format, file):
+        """Test read function returning triples"""
+        with open(datadir[file], 'rb') as f:
+            requests_mock.get(data_url, content=f.read())
+        triples = operations.read(data_url, format=format, result='triples')
+        assert not isinstance(triples, rdflib.Graph)
+        assert set(triples) == set(operations.read(data_url, format=format))
+
+    @pytest.mark.parametrize('format', ['turtle', 'nt'])
+    def test_read_triples_predicates(self, data, graph_data, requests_mock, format):
+        """Test the predicate filter"""
+        requests_mock.get(data_url, text=graph_data.serialize(format=format))
+        title = 'http://purl.org/dc/terms/title'
+        triples = list(operations.read(data_url, format=format, result='triples',
+                                       predicates=[title]))
+        assert triples == [(rdflib.URIRef('http://fdp.fairdatapoint.nl/catalog/catalog01'),
+                            rdflib.URIRef(title), rdflib.Literal('First sample catalog'))]
+
+    def test_invalid_result(self):
+        """Test invalid result type"""
+        with pytest.raises(ValueError):
+            operations.read(data_url, result='dict')
+        with pytest.raises(ValueError):
+            operations.read(data_url, pages=True)
+        with pytest.raises(ValueError):
+            operations.read(data_url, result='triples', stream=True)
+
+    def test_read_triples_pages(self, datadir, requests_mock):
+        """Test the triples of the next pages are read with the same headers"""
+        with open(datadir['catalog01.nt']) as f:
+            data = f.read()
+        requests_mock.get(data_url, text=data, headers={'Link': '</page2>; rel="next"'})
+        requests_mock.get('http://example.org/page2', text=data)
+        triples = list(operations.read(data_url, format='nt', result='triples', pages=True))
+        assert len(triples) == 20
+        assert requests_mock.last_request.headers['Accept'].startswith('application/n-triples')
+
+class TestReadRaw:
+    """Test fdpclient.operations.read_raw function"""
+
+    def test_read_raw(self, data, requests_mock):
+        """Test the body is returned unparsed"""
+        requests_mock.get(data_url, text=data, headers={'Content-Type': 'text/turtle'})
+        assert operations.read_raw(data_url) == data.encode('utf-8')
+        assert requests_mock.last_request.headers['Accept'] == 'text/turtle'
+
+    def test_read_raw_format(self, requests_mock):
+        """Test the format sets the accept header"""
+        requests_mock.get(data_url, content=b'')
+        operations.read_raw(data_url, format='nt')
+        assert requests_mock.last_request.headers['Accept'] == 'application/n-triples'
+
+    def test_read_raw_http_error(self, requests_mock, caplog):
+        """Test HTTP error of a raw read"""
+        requests_mock.get(data_url, status_code=404, reason='Not Found')
+        with pytest.raises(RuntimeError):
+            operations.read_raw(data_url)
+        assert 'HTTP error: 404 Not Found' in caplog.text
+
+
+class TestReadResponse:
+    """Test fdpclient.operations.read_response function"""
+
+    def test_read_response(self, data, requests_mock):
+        """Test the response is returned with the accept header of read"""
+        requests_mock.get(data_url, text=data, headers={'ETag': '"v1"'})
+        r = operations.read_response(data_url, format='nt')
+        assert (r.status_code, r.headers['ETag'], r.text) == (200, '"v1"', data)
+        assert requests_mock.last_request.headers['Accept'].startswith('application/n-triples,')
+        assert 'If-None-Match' not in requests_mock.last_request.headers
+
+    def test_conditional(self, requests_mock):
+        """Test the validators are sent and a 304 is returned"""
+        requests_mock.get(data_url, status_code=304)
+        r = operations.read_response(data_url, etag='"v1"', last_modified='today')
+        assert r.status_code == 304
+        assert requests_mock.last_request.headers['If-None-Match'] == '"v1"'
+        assert requests_mock.last_request.headers['If-Modified-Since'] == 'today'
+        with pytest.raises(RuntimeError):
+            operations.read_response(data_url)
@@ -0,0 +1,43 @@
+import itertools
+import time
+import pytest
+
+from fdpclient.parallel import imap
+
+
+def slow_square(x):
+    time.sleep(0.001 * (5 - x % 5))
+    if x == 3:
+        raise KeyError(x)
+    return x * x
+
+
+class TestImap:
+    """Test fdpclient.parallel.imap function"""
+
+    def test_ordered(self):
+        """Test results in input order with exceptions as results"""
+        results = list(imap(slow_square, range(10), workers=3, ordered=True))
+        assert [x for x, _ in results] == list(range(10))
+        assert isinstance(results[3][1], KeyError)
+        assert results[9][1] == 81
+
+    def test_unordered(self):
+        """Test all results are yielded in completion order"""
+        results = dict(imap(slow_square, range(10), workers=3))
+        assert sorted(results) == list(range(10))
+        assert results[4] == 16
+
+    def test_bounded_submission(self):
+        """Test a lazy iterable is consumed as the results are yielded"""
+        consumed = []
+        items = (consumed.append(x) or x for x in itertools.count())
+        results = imap(lambda x: x, items, workers=2, ordered=True)
+        assert next(results) == (0, 0)
+        assert len(consumed) <= 4
+        results.close()
+
+    def test_invalid_workers(self):
+        """Test invalid number of workers"""
+        with pytest.raises(ValueError):
+            list(imap(slow_square, range(3), workers=0))
@@ -0,0 +1,93 @@
+import pytest
+import rdflib
+from rdflib.compare import isomorphic
+
+from fdpclient import parsers
+from fdpclient.parsers import (parse, parser_backends, preferred_format,
+                               register_parser, unregister_parser)
+
+EX = rdflib.Namespace('http://example.org/')
+
+@pytest.fixture()
+def backends():
+    saved = {format: list(b) for format, b in parsers._backends.items()}
+    yield
+    parsers._backends.clear()
+    parsers._backends.update(saved)
+
+@pytest.fixture()
+def data_nt(datadir):
+    with open(datadir['catalog01.nt']) as f:
+        return f.read()
+
+@pytest.fixture()
+def data_ttl(datadir):
+    with open(datadir['catalog01.ttl']) as f:
+        return f.read()
+
+
+class TestRegistry:
+    """Test the parser backend registry"""
+
+    def test_builtin(self):
+        """Test the built-in N-Triples backend"""
+        assert parser_backends('nt') == ['ntriples']
+        assert preferred_format() == 'nt'
+
+    def test_order(self, backends):
+        """Test backends are tried from the last registered, and failing
+        backends hand over to the next one"""
+        calls = []
+
+        def failing(data):
+            calls.append('failing')
+            raise ValueError('unsupported')
+
+        def fixed(data):
+            calls.append('fixed')
+            return [(EX.a, EX.p, EX.b)]
+
+        register_parser('turtle', fixed)
+        register_parser('turtle', failing)
+        assert parser_backends('turtle') == ['failing', 'fixed']
+        g = parse('ignored', 'turtle', rdflib.Graph())
+        assert calls == ['failing', 'fixed']
+        assert set(g) == {(EX.a, EX.p, EX.b)}
+
+    def test_replace_unregister(self, backends):
+        """Test registering a name twice and unregistering"""
+        register_parser('turtle', lambda data: [], name='custom')
+        register_parser('turtle', lambda data: [(EX.a, EX.p, EX.b)], name='custom')
+        assert parser_backends('turtle') == ['custom']
+        assert len(parse('', 'turtle', rdflib.Graph())) == 1
+        assert unregister_parser('turtle', 'custom')
+        assert not unregister_parser('turtle', 'custom')
+
+    def test_invalid_format(self):
+        """Test registering a backend of an unknown format"""
+        with pytest.raises(ValueError):
+            register_parser('csv', lambda data: [])
+
+    def test_preferred_format(self, backends):
+        """Test the default format without an N-Triples backend"""
+        unregister_parser('nt', 'ntriples')
+        assert preferred_format() == 'turtle'
+
+
+class TestParse:
+    """Test fdpclient.parsers.parse function"""
+
+    def test_nt(self, data_nt):
+        """Test the fast path parses like rdflib"""
+        g = parse(data_nt, 'nt', rdflib.Graph())
+        assert isomorphic(g, rdflib.Graph().parse(data=data_nt, format='nt'))
+
+    def test_nt_fallback(self, data_ttl):
+        """Test Turtle answered to an N-Triples request is parsed"""
+        g = parse(data_ttl, 'nt', rdflib.Graph())
+        assert isomorphic(g, rdflib.Graph().parse(data=data_ttl, format='turtle'))
+
+    def test_rdflib(self, data_ttl):
+        """Test formats without backends are parsed by rdflib"""
+        g = parse(data_ttl.encode('utf-8'), 'turtle', rdflib.Graph())
+        assert len(g) == 10
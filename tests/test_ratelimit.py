@@ -0,0 +1,166 @@
+import gc
+import threading
+import time
+import pytest
+
+from fdpclient.client import Client
+from fdpclient.ratelimit import (AdaptiveConcurrency, LimiterChain, RateLimiter,
+                                 TokenBucket)
+
+base_url = 'http://example.org'
+data_url = base_url + '/catalog/catalog01'
+
+@pytest.fixture()
+def data(datadir):
+    with open(datadir['catalog01.ttl']) as f:
+        return f.read()
+
+
+class TestTokenBucket:
+    """Test fdpclient.ratelimit.TokenBucket"""
+
+    def test_try_acquire(self):
+        """Test tokens are taken up to the capacity"""
+        bucket = TokenBucket(rate=1, capacity=2)
+        assert bucket.try_acquire() == 0
+        assert bucket.try_acquire() == 0
+        assert 0 < bucket.try_acquire() <= 1
+
+    def test_acquire(self):
+        """Test acquire waits for the rate"""
+        bucket = TokenBucket(rate=200, capacity=1)
+        start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        assert time.monotonic() - start >= 0.015
+
+    def test_invalid(self):
+        """Test invalid rate"""
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestRateLimiter:
+    """Test fdpclient.ratelimit.RateLimiter"""
+
+    def test_buckets(self):
+        """Test the buckets per host and per operation"""
+        limiter = RateLimiter(rate=10, operations={'create': 1})
+        read = limiter.bucket('http://a.org/catalog/1', 'read')
+        assert read is limiter.bucket('http://A.org/dataset/2', 'delete')
+        assert read is not limiter.bucket('http://b.org/catalog/1', 'read')
+        create = limiter.bucket('http://a.org/catalog', 'create')
+        assert create is not read and create.rate == 1
+        assert read.rate == 10
+
+    def test_hosts(self):
+        """Test the hosts with their own rate"""
+        limiter = RateLimiter(rate=10, hosts={'A.org': 2, 'c.org:8080': 1})
+        assert limiter.bucket('http://a.org/catalog/1', 'read').rate == 2
+        assert limiter.bucket('http://b.org/catalog/1', 'read').rate == 10
+        assert limiter.bucket('http://c.org:8080/fdp', 'read').rate == 1
+        limiter = RateLimiter(hosts={'a.org': 2}, operations={'create': 1})
+        assert limiter.bucket('http://b.org/catalog/1', 'read') is None
+        assert limiter.bucket('http://a.org/catalog', 'create').rate == 1
+        with pytest.raises(ValueError):
+            RateLimiter(hosts={'a.org': 0})
+
+    def test_operation_only(self):
+        """Test only the operations with a rate are limited"""
+        limiter = RateLimiter(operations={'create': 1})
+        assert limiter.bucket(data_url, 'read') is None
+        limiter.acquire(data_url, 'read')
+
+    def test_client(self, data, requests_mock):
+        """Test the requests of a client are paced"""
+        requests_mock.get(data_url, text=data)
+        client = Client(base_url, fdp_path='fdp',
+                        limiter=RateLimiter(rate=100, burst=1))
+        start = time.monotonic()
+        for _ in range(4):
+            client.read_catalog('catalog01')
+        assert time.monotonic() - start >= 0.025
+
+
+class TestAdaptiveConcurrency:
+    """Test fdpclient.ratelimit.AdaptiveConcurrency"""
+
+    def test_increase(self):
+        """Test the limit grows by about 1 per round of successes"""
+        limiter = AdaptiveConcurrency(initial=2, max_limit=3)
+        for _ in range(3):
+            limiter.release(limiter.acquire(), 200, 0.01)
+        assert limiter.limit == 3
+        for _ in range(10):
+            limiter.release(limiter.acquire(), 200, 0.01)
+        assert limiter.limit == 3
+
+    def test_decrease_once_per_round(self):
+        """Test overload responses halve the limit once per round"""
+        limiter = AdaptiveConcurrency(initial=8)
+        tokens = [limiter.acquire() for _ in range(4)]
+        for token in tokens:
+            limiter.release(token, 503, 0.01)
+        assert limiter.limit == 4
+        limiter.release(limiter.acquire(), 429, 0.01)
+        assert limiter.limit == 2
+        assert limiter.in_flight == 0
+
+    def test_latency(self):
+        """Test slow responses decrease the limit"""
+        limiter = AdaptiveConcurrency(initial=4, latency_tolerance=2)
+        limiter.release(limiter.acquire(), 200, 0.01)
+        limiter.release(limiter.acquire(), 200, 0.015)
+        assert limiter.limit == 4
+        limiter.release(limiter.acquire(), 200, 0.05)
+        assert limiter.limit == 2
+
+    def test_blocking(self):
+        """Test at most limit requests are in flight"""
+        limiter = AdaptiveConcurrency(initial=2, max_limit=2)
+        in_flight = []
+        def work():
+            token = limiter.acquire()
+            in_flight.append(limiter.in_flight)
+            time.sleep(0.01)
+            limiter.release(token, 200, 0.01)
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert max(in_flight) == 2
+
+    def test_invalid(self):
+        """Test invalid limits"""
+        with pytest.raises(ValueError):
+            AdaptiveConcurrency(initial=0)
+        with pytest.raises(ValueError):
+            AdaptiveConcurrency(decrease=1)
+
+    def test_client(self, data, requests_mock):
+        """Test a client adapts the limit to the responses"""
+        requests_mock.get(data_url, [{'status_code': 503}, {'text': data}])
+        adaptive = AdaptiveConcurrency(initial=4)
+        client = Client(base_url, fdp_path='fdp',
+                        limiter=LimiterChain(RateLimiter(rate=1000), adaptive))
+        with pytest.raises(RuntimeError):
+            client.read_catalog('catalog01')
+        assert adaptive.limit == 2
+        client.read_catalog('catalog01')
+        assert adaptive.in_flight == 0
+
+    def test_stream(self, datadir, requests_mock):
+        """Test the slot of a streamed read is held until its body is read"""
+        with open(datadir['catalog01.nt'], 'rb') as f:
+            requests_mock.get(data_url, content=f.read())
+        adaptive = AdaptiveConcurrency(initial=4)
+        client = Client(base_url, fdp_path='fdp', limiter=adaptive)
+        triples = client.iter_catalog('catalog01')
+        assert adaptive.in_flight == 1
+        assert len(list(triples)) == 10
+        assert adaptive.in_flight == 0
+        triples = client.iter_catalog('catalog01')
+        del triples
+        gc.collect()
+        assert adaptive.in_flight == 0
@@ -0,0 +1,145 @@
+import io
+import pytest
+import requests
+from email.utils import formatdate
+
+from fdpclient import operations
+from fdpclient.client import Client
+from fdpclient.exceptions import HTTPError
+from fdpclient.retry import RetryBudget, RetryPolicy, parse_retry_after
+
+base_url = 'http://example.org'
+catalog_url = base_url + '/catalog'
+data_url = catalog_url + '/catalog01'
+
+@pytest.fixture()
+def data(datadir):
+    with open(datadir['catalog01.ttl']) as f:
+        return f.read()
+
+@pytest.fixture()
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(operations.time, 'sleep', sleeps.append)
+    return sleeps
+
+def policy(**kwargs):
+    kwargs.setdefault('backoff_factor', 1)
+    kwargs.setdefault('jitter', False)
+    return RetryPolicy(**kwargs)
+
+
+class TestRetryPolicy:
+    """Test fdpclient.retry.RetryPolicy"""
+
+    def test_backoff(self):
+        """Test exponential backoff with and without jitter"""
+        p = policy(max_backoff=5)
+        assert [p.backoff(n) for n in range(4)] == [1, 2, 4, 5]
+        p = policy(jitter=True)
+        assert all(0 <= p.backoff(2) <= 4 for _ in range(20))
+
+    def test_delay(self):
+        """Test which failures are retried"""
+        p = policy(max_retries=2)
+        assert p.delay('read', 0, 503) == 1
+        assert p.delay('read', 1, 502) == 2
+        assert p.delay('read', 2, 503) is None
+        assert p.delay('read', 0, 404) is None
+        assert p.delay('create', 0, 503) is None
+        assert p.delay('delete', 0, error=requests.ConnectionError()) == 1
+        assert p.delay('delete', 0, error=ValueError()) is None
+        assert policy(operations=('create',)).delay('create', 0, 503) == 1
+
+    def test_statuses(self):
+        """Test the retried statuses are the retryable HTTP errors"""
+        p = policy()
+        for status in (408, 429, 500, 502, 503, 504):
+            error = HTTPError(status, 'Error', data_url)
+            assert (p.delay('read', 0, status) is not None) == error.retryable
+
+    def test_retry_after(self):
+        """Test Retry-After is waited for unless it is too long"""
+        p = policy(max_backoff=10)
+        assert p.delay('read', 0, 429, {'Retry-After': '3'}) == 3
+        assert p.delay('read', 0, 429, {'Retry-After': '0'}) == 1
+        assert p.delay('read', 0, 429, {'Retry-After': '60'}) is None
+
+    def test_budget(self):
+        """Test the retry budget"""
+        budget = RetryBudget(ratio=0.5, burst=1)
+        p = policy(budget=budget)
+        assert p.delay('read', 0, 503) == 1
+        assert p.delay('read', 0, 503) is None
+        p.record_request()
+        p.record_request()
+        assert p.delay('read', 0, 503) == 1
+
+    def test_parse_retry_after(self):
+        """Test parse_retry_after function"""
+        assert parse_retry_after(None) is None
+        assert parse_retry_after('2.5') == 2.5
+        assert parse_retry_after('invalid') is None
+        assert 0 <= parse_retry_after(formatdate(usegmt=True)) <= 1
+
+
+class TestRetryOperations:
+    """Test retries of fdpclient.operations functions"""
+
+    def test_read(self, data, sleeps, requests_mock):
+        """Test a read is retried until it succeeds"""
+        requests_mock.get(data_url, [{'status_code': 503}, {'status_code': 502},
+                                     {'text': data}])
+        g = operations.read(data_url, retry=policy())
+        assert len(g) > 0
+        assert sleeps == [1, 2]
+
+    def test_exhausted(self, sleeps, requests_mock, caplog):
+        """Test the HTTPError after the last retry"""
+        requests_mock.get(data_url, status_code=503, reason='Service Unavailable',
+                          headers={'Retry-After': '2'}, text='busy')
+        with pytest.raises(HTTPError) as excinfo:
+            operations.read(data_url, retry=policy(max_retries=2))
+        error = excinfo.value
+        assert (error.status, error.reason, error.url) == (503, 'Service Unavailable', data_url)
+        assert error.attempts == 3
+        assert error.retry_after == 2
+        assert error.text == 'busy'
+        assert error.retryable
+        assert isinstance(error, RuntimeError)
+        assert sleeps == [2, 2]
+        assert 'HTTP error: 503' in caplog.text
+
+    def test_create_not_retried(self, data, sleeps, requests_mock):
+        """Test creates are not retried by default"""
+        requests_mock.post(catalog_url, [{'status_code': 503}, {'status_code': 201}])
+        with pytest.raises(HTTPError):
+            operations.create(catalog_url, data, retry=policy())
+        assert sleeps == []
+
+    def test_connection_error(self, sleeps, requests_mock):
+        """Test connection errors are retried"""
+        requests_mock.delete(data_url, [{'exc': requests.ConnectionError},
+                                        {'status_code': 204}])
+        operations.delete(data_url, retry=policy())
+        assert sleeps == [1]
+
+    def test_file_rewound(self, data, sleeps, requests_mock):
+        """Test a file-like body is sent again from its start"""
+        bodies = []
+        def callback(request, context):
+            bodies.append(request.body.read())
+            context.status_code = 503 if len(bodies) == 1 else 200
+            return ''
+        requests_mock.put(data_url, text=callback)
+        operations.update(data_url, io.BytesIO(data.encode('utf-8')), retry=policy())
+        assert bodies == [data.encode('utf-8')] * 2
+
+    def test_client(self, data, sleeps, requests_mock):
+        """Test the retry policy of a client and the retries of its events"""
+        requests_mock.get(data_url, [{'status_code': 503}, {'text': data}])
+        events = []
+        client = Client(base_url, fdp_path='fdp', retry=policy(), hooks=[events.append])
+        client.read_catalog('catalog01')
+        assert events[0].retries == 1
+        assert events[0].status == 200
@@ -0,0 +1,38 @@
+import requests
+
+from fdpclient.session import create_session
+
+
+class TestCreateSession:
+    """Test fdpclient.session.create_session function"""
+
+    def test_default(self):
+        """Test the default pooled session"""
+        session = create_session()
+        assert isinstance(session, requests.Session)
+        adapter = session.get_adapter('http://example.org')
+        assert adapter._pool_connections == 10
+        assert adapter._pool_maxsize == 10
+        assert adapter.max_retries.total == 0
+        assert session.headers['Connection'] == 'keep-alive'
+
+    def test_options(self):
+        """Test pool size, per-host limit, retries and keep-alive options"""
+        session = create_session(pool_connections=2, pool_maxsize=20,
+                                 pool_block=True, max_retries=3,
+                                 backoff_factor=0.5, keep_alive=False)
+        for url in ('http://example.org', 'https://example.org'):
+            adapter = session.get_adapter(url)
+            assert adapter._pool_connections == 2
+            assert adapter._pool_maxsize == 20
+            assert adapter._pool_block is True
+            assert adapter.max_retries.total == 3
+            assert adapter.max_retries.backoff_factor == 0.5
+        assert session.headers['Connection'] == 'close'
+
+    def test_reuse(self, requests_mock):
+        """Test requests are sent through the session"""
+        requests_mock.get('http://example.org/catalog/catalog01', text='ok')
+        session = create_session()
+        r = session.get('http://example.org/catalog/catalog01')
+        assert r.text == 'ok'
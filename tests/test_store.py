@@ -0,0 +1,137 @@
+import random
+import pytest
+import rdflib
+from rdflib import BNode, Literal, URIRef
+from rdflib.compare import isomorphic
+from rdflib.namespace import DCTERMS, RDF
+
+from fdpclient import store as store_module
+from fdpclient.client import Client
+from fdpclient.store import CompactStore, compact_graph
+
+base_url = 'http://fdp.fairdatapoint.nl'
+EX = rdflib.Namespace('http://example.org/')
+
+@pytest.fixture()
+def fdp(datadir):
+    return rdflib.Graph().parse(datadir['fdp.ttl'])
+
+
+class TestCompactStore:
+    """Test fdpclient.store.CompactStore"""
+
+    @pytest.mark.parametrize('format', ['turtle', 'n3', 'nt', 'xml', 'json-ld'])
+    def test_parse(self, fdp, format):
+        """Test parsing each format into the store"""
+        g = rdflib.Graph(store=CompactStore())
+        g.parse(data=fdp.serialize(format=format), format=format)
+        assert len(g) == len(fdp)
+        assert isomorphic(g, fdp)
+
+    def test_interned(self):
+        """Test terms are stored once and duplicate triples are ignored"""
+        g = rdflib.Graph(store=CompactStore())
+        g.add((EX.a, EX.p, EX.b))
+        g.add((EX.b, EX.p, EX.a))
+        g.add((EX.a, EX.p, EX.b))
+        assert len(g) == 2
+        assert g.store.term_count() == 3
+
+    def test_patterns(self, monkeypatch):
+        """Test all triple patterns against the rdflib memory store"""
+        monkeypatch.setattr(store_module, 'MIN_MERGE', 16)
+        random.seed(0)
+        terms = [EX[f't{i}'] for i in range(20)] + [Literal(i) for i in range(5)] + [BNode()]
+        expected = rdflib.Graph()
+        g = rdflib.Graph(store=CompactStore())
+        for _ in range(1000):
+            triple = (random.choice(terms[:20]), random.choice(terms[:4]), random.choice(terms))
+            expected.add(triple)
+            g.add(triple)
+        for _ in range(300):
+            pattern = tuple(random.choice(terms + [None] * 8) for _ in range(3))
+            assert set(g.triples(pattern)) == set(expected.triples(pattern))
+        assert len(g) == len(expected)
+
+    def test_merged_queries(self):
+        """Test queries between additions merging a few pending triples"""
+        random.seed(1)
+        terms = [EX[f't{i}'] for i in range(10)]
+        expected = rdflib.Graph()
+        g = rdflib.Graph(store=CompactStore())
+        for _ in range(200):
+            triple = tuple(random.choice(terms) for _ in range(3))
+            expected.add(triple)
+            g.add(triple)
+            pattern = (None, triple[1], random.choice([None, triple[2]]))
+            assert set(g.triples(pattern)) == set(expected.triples(pattern))
+        assert set(g) == set(expected)
+
+    def test_chunks(self, monkeypatch):
+        """Test a query is copied in chunks from the arrays at its start"""
+        monkeypatch.setattr(store_module, 'CHUNK', 2)
+        monkeypatch.setattr(store_module, 'MIN_MERGE', 1)
+        g = rdflib.Graph(store=CompactStore())
+        for i in range(5):
+            g.add((EX.a, EX.p, Literal(i)))
+        rows = []
+        for triple in g.triples((EX.a, None, None)):
+            rows.append(triple)
+            g.add((EX.a, EX.q, Literal(len(rows))))
+        assert len(rows) == 5
+        assert len(g) == 10
+
+    def test_remove(self, fdp):
+        """Test removing the triples of a pattern"""
+        g = compact_graph(fdp)
+        g.remove((None, RDF.type, None))
+        fdp.remove((None, RDF.type, None))
+        assert set(g) == set(fdp)
+        g.remove((EX.missing, None, None))
+        assert len(g) == len(fdp)
+
+    def test_namespaces(self, fdp):
+        """Test namespace bindings are kept"""
+        fdp.bind('ex', EX)
+        g = compact_graph(fdp)
+        assert g.store.namespace('ex') == URIRef(EX)
+        assert g.store.prefix(URIRef(EX)) == 'ex'
+        g.add((EX.a, DCTERMS.title, Literal('A')))
+        assert '@prefix ex:' in g.serialize(format='turtle')
+
+    def test_shared(self, fdp):
+        """Test graphs in a shared store share its triples"""
+        store = CompactStore()
+        g = rdflib.Graph(store=store)
+        g.add((EX.a, EX.p, EX.b))
+        h = rdflib.Graph(store=store)
+        h += fdp
+        assert len(g) == len(h) == len(fdp) + 1
+
+
+class TestReadStore:
+    """Test reading metadata into a store"""
+
+    def test_read_store_class(self, requests_mock, datadir):
+        """Test a store class creates a store per read"""
+        with open(datadir['catalog01.ttl']) as f:
+            requests_mock.get(base_url + '/catalog/catalog01', text=f.read())
+        client = Client(base_url, fdp_path='fdp')
+        g = client.read_catalog('catalog01', store=CompactStore)
+        h = client.read_catalog('catalog01', store=CompactStore)
+        assert isinstance(g.store, CompactStore)
+        assert g.store is not h.store
+        assert isomorphic(g, rdflib.Graph().parse(datadir['catalog01.ttl']))
+
+    def test_read_store_instance(self, requests_mock, datadir):
+        """Test a store instance is shared by the reads"""
+        with open(datadir['catalog01.ttl']) as f:
+            requests_mock.get(base_url + '/catalog/catalog01', text=f.read())
+        with open(datadir['fdp.ttl']) as f:
+            requests_mock.get(base_url + '/fdp', text=f.read())
+        client = Client(base_url, fdp_path='fdp')
+        store = CompactStore()
+        client.read_catalog('catalog01', store=store)
+        g = client.read_fdp(store=store)
+        assert g.store is store
+        assert (URIRef(base_url + '/catalog/catalog01'), RDF.type, None) in g
@@ -0,0 +1,193 @@
+import gc
+import gzip
+import pytest
+import rdflib
+
+httpx = pytest.importorskip('httpx')
+pytest.importorskip('h2')
+
+from fdpclient import operations
+from fdpclient.client import Client
+from fdpclient.metrics import RequestEvent
+from fdpclient.retry import RetryPolicy
+from fdpclient.transport import (HTTP2Transport, create_transport,
+                                 register_transport, transports)
+
+base_url = 'http://example.org'
+data_url = base_url + '/catalog/catalog01'
+
+# datadir fixture provided via pytest-datadir-ng
+@pytest.fixture()
+def data(datadir):
+    with open(datadir['catalog01.ttl']) as f:
+        return f.read()
+
+@pytest.fixture()
+def nt_data(datadir):
+    with open(datadir['catalog01.nt']) as f:
+        return f.read()
+
+class MockServer:
+    """Record requests and answer them from a dictionary of routes"""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = []
+
+    def handler(self, request):
+        self.requests.append(request)
+        route = self.routes.get((request.method, str(request.url)))
+        if route is None:
+            return httpx.Response(404, text='Not Found')
+        if isinstance(route, list):
+            route = route.pop(0)
+        if isinstance(route, Exception):
+            raise route
+        status, content, headers = route
+        async def stream():
+            # streamed as from a connection
+            yield content
+        return httpx.Response(status, content=stream(), headers=headers)
+
+    def transport(self):
+        return HTTP2Transport(transport=httpx.MockTransport(self.handler))
+
+
+class TestCreateTransport:
+    """Test fdpclient.transport.create_transport function"""
+
+    def test_transports(self):
+        """Test the default transports"""
+        assert transports() == ['http1', 'http2']
+        with create_transport('http2') as session:
+            assert isinstance(session, HTTP2Transport)
+
+    def test_register(self):
+        """Test a registered transport is created with its arguments"""
+        register_transport('test', lambda **kwargs: kwargs)
+        try:
+            assert create_transport('test', a=1) == {'a': 1}
+        finally:
+            from fdpclient import transport
+            transport._transports.pop('test')
+
+    def test_invalid(self):
+        """Test an unknown transport"""
+        with pytest.raises(ValueError):
+            create_transport('http3')
+
+    def test_collected(self):
+        """Test the event loop thread of a collected transport is stopped"""
+        session = HTTP2Transport()
+        thread, loop = session._thread, session._loop
+        assert thread.daemon
+        del session
+        gc.collect()
+        assert not thread.is_alive()
+        assert loop.is_closed()
+
+
+class TestOperations:
+    """Test the operations with fdpclient.transport.HTTP2Transport"""
+
+    def test_read(self, data):
+        """Test read parses the response"""
+        server = MockServer({('GET', data_url): (200, data.encode('utf-8'),
+                                                 {'Content-Type': 'text/turtle'})})
+        with server.transport() as session:
+            g = operations.read(data_url, session=session)
+        assert len(g) > 0
+        assert server.requests[0].headers['Accept'].startswith('text/turtle')
+
+    def test_read_stream_compressed(self, nt_data):
+        """Test a streamed gzip response is decoded and counted"""
+        body = gzip.compress(nt_data.encode('utf-8'))
+        server = MockServer({('GET', data_url): (200, body, {
+            'Content-Type': 'application/n-triples', 'Content-Encoding': 'gzip'})})
+        event = RequestEvent('read', 'catalog', data_url)
+        with server.transport() as session:
+            g = operations.read(data_url, format='nt', session=session, stream=True,
+                                event=event)
+        expected = rdflib.Graph().parse(data=nt_data, format='nt')
+        assert len(g) == len(expected)
+        assert event.bytes_received == len(nt_data.encode('utf-8'))
+        assert event.wire_bytes_received == len(body)
+
+    def test_read_triples(self, nt_data):
+        """Test N-Triples are streamed line by line"""
+        server = MockServer({('GET', data_url): (200, nt_data.encode('utf-8'),
+                                                 {'Content-Type': 'application/n-triples'})})
+        with server.transport() as session:
+            triples = list(operations.read(data_url, format='nt', session=session,
+                                           result='triples'))
+        assert len(triples) == len(rdflib.Graph().parse(data=nt_data, format='nt'))
+
+    def test_read_pages(self, nt_data):
+        """Test the next pages of a response are followed"""
+        server = MockServer({
+            ('GET', data_url): (200, nt_data.encode('utf-8'), {'Link': '<?page=2>; rel="next"'}),
+            ('GET', data_url + '?page=2'): (200, nt_data.encode('utf-8'), {})})
+        with server.transport() as session:
+            triples = list(operations.read(data_url, format='nt', session=session,
+                                           result='triples', pages=True))
+        assert len(triples) == 20
+        assert len(server.requests) == 2
+
+    def test_create_update_delete(self, data):
+        """Test the bodies and methods of the write requests"""
+        server = MockServer({('POST', base_url + '/catalog'): (201, b'', {}),
+                             ('PUT', data_url): (200, b'', {}),
+                             ('DELETE', data_url): (204, b'', {})})
+        with server.transport() as session:
+            operations.create(base_url + '/catalog', data, session=session)
+            operations.update(data_url, data, session=session, compress='gzip')
+            operations.delete(data_url, session=session)
+        create, update, delete = server.requests
+        assert create.content == data.encode('utf-8')
+        assert create.headers['content-type'] == 'text/turtle'
+        assert gzip.decompress(update.content) == data.encode('utf-8')
+        assert delete.method == 'DELETE'
+
+    def test_http_error(self, caplog):
+        """Test HTTP error"""
+        server = MockServer({})
+        with server.transport() as session:
+            with pytest.raises(RuntimeError):
+                operations.read(data_url, session=session)
+        assert 'HTTP error: 404' in caplog.text
+
+    def test_retry_transport_error(self, data):
+        """Test httpx connection errors are retried"""
+        server = MockServer({('GET', data_url): [
+            httpx.ConnectError('refused'), (200, data.encode('utf-8'), {})]})
+        retry = RetryPolicy(backoff_factor=0)
+        with server.transport() as session:
+            assert len(operations.read(data_url, session=session, retry=retry)) > 0
+        assert len(server.requests) == 2
+
+
+class TestClient:
+    """Test fdpclient.client.Client with a transport"""
+
+    def test_transport(self):
+        """Test the client creates a session of the transport and closes it"""
+        with Client(base_url, fdp_path='fdp', transport='http2') as client:
+            assert isinstance(client.session, HTTP2Transport)
+        assert not client.session._thread.is_alive()
+        assert client.session._loop.is_closed()
+
+    def test_session_and_transport(self):
+        """Test a session and a transport cannot both be given"""
+        with pytest.raises(ValueError):
+            Client(base_url, session=create_transport(), transport='http2')
+
+    def test_read_many(self, data):
+        """Test concurrent reads over one transport"""
+        routes = {('GET', f'{data_url}{i}'): (200, data.encode('utf-8'), {})
+                  for i in range(8)}
+        server = MockServer(routes)
+        with Client(base_url, session=server.transport(), fdp_path='fdp') as client:
+            results = dict(client.read_many('catalog', [f'catalog01{i}' for i in range(8)],
+                                            workers=4))
+        assert all(isinstance(g, rdflib.Graph) for g in results.values())
+        assert len(server.requests) == 8